@@ -24,6 +24,8 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import asyncio
+import gzip
 import os
 import io
 import json
@@ -39,6 +41,15 @@ from cogs.utils.dataIO import dataIO
 
 PATH = os.path.join("data", "archive")
 JSON = os.path.join(PATH, "settings.json")
+CHANNELS_PATH = os.path.join(PATH, "channels")
+EXPORT_PATH = os.path.join(PATH, "export")
+
+# number of channels exported at the same time
+EXPORT_CONCURRENCY = 3
+# write checkpoint every n messages
+EXPORT_CHECKPOINT_INTERVAL = 500
+# messages requested per logs_from call
+EXPORT_PAGE_SIZE = 1000
 
 
 def nested_dict():
@@ -46,6 +57,140 @@ def nested_dict():
     return defaultdict(nested_dict)
 
 
+def message_reactions(message):
+    """Reactions of a message as a list of dicts."""
+    reactions = []
+    for reaction in message.reactions:
+        r = {
+            'custom_emoji': reaction.custom_emoji,
+            'count': reaction.count
+        }
+        if reaction.custom_emoji:
+            # <:emoji_name:emoji_id>
+            r['emoji'] = '<:{}:{}>'.format(
+                reaction.emoji.name,
+                reaction.emoji.id)
+        else:
+            r['emoji'] = reaction.emoji
+        reactions.append(r)
+    return reactions
+
+
+def message_record(message):
+    """Full message record used for server exports."""
+    return {
+        "id": message.id,
+        "timestamp": message.timestamp.isoformat(),
+        "author_id": message.author.id,
+        "author_name": message.author.name,
+        "content": message.content,
+        "embeds": message.embeds,
+        "channel_id": message.channel.id,
+        "channel_name": message.channel.name,
+        "server_id": message.server.id,
+        "server_name": message.server.name,
+        "mention_everyone": message.mention_everyone,
+        "mentions_id": [m.id for m in message.mentions],
+        "mentions_name": [m.name for m in message.mentions],
+        "reactions": message_reactions(message),
+        "attachments": [attach['url'] for attach in message.attachments]
+    }
+
+
+class ServerExporter:
+    """Stream server messages to per-channel NDJSON files.
+
+    Messages are written as they are paged from the API so memory use
+    does not depend on channel size. The last exported message id of
+    each channel is checkpointed so that subsequent runs only fetch
+    new messages.
+    """
+
+    def __init__(self, bot, server, use_gzip=False):
+        self.bot = bot
+        self.server = server
+        self.use_gzip = use_gzip
+        self.path = os.path.join(EXPORT_PATH, server.id)
+        self.checkpoint_file = os.path.join(self.path, "checkpoint.json")
+        self.checkpoint = {}
+        self.counts = {}
+
+    def channel_file(self, channel):
+        ext = "ndjson.gz" if self.use_gzip else "ndjson"
+        return os.path.join(self.path, "{}.{}".format(channel.id, ext))
+
+    def open_channel_file(self, channel):
+        filename = self.channel_file(channel)
+        if self.use_gzip:
+            return gzip.open(filename, "at", encoding="utf-8")
+        return open(filename, "a", encoding="utf-8")
+
+    def load_checkpoint(self):
+        if dataIO.is_valid_json(self.checkpoint_file):
+            self.checkpoint = dataIO.load_json(self.checkpoint_file)
+
+    def save_checkpoint(self):
+        dataIO.save_json(self.checkpoint_file, self.checkpoint)
+
+    def reset(self):
+        """Remove checkpoint and exported channel files."""
+        if not os.path.isdir(self.path):
+            return
+        for filename in os.listdir(self.path):
+            if filename == "checkpoint.json" or filename.endswith((".ndjson", ".ndjson.gz")):
+                os.remove(os.path.join(self.path, filename))
+        self.checkpoint = {}
+
+    async def export_channel(self, channel, semaphore, limit=None):
+        """Export messages in channel newer than the checkpoint.
+
+        History is paged oldest first from the checkpoint, or from the
+        beginning of the channel, until no messages are left or limit
+        messages are exported.
+        """
+        async with semaphore:
+            count = 0
+            with self.open_channel_file(channel) as f:
+                try:
+                    while limit is None or count < limit:
+                        page_size = EXPORT_PAGE_SIZE
+                        if limit is not None:
+                            page_size = min(page_size, limit - count)
+                        after = discord.Object(id=self.checkpoint.get(channel.id, "0"))
+                        page_count = 0
+                        async for message in self.bot.logs_from(
+                                channel, limit=page_size, after=after, reverse=True):
+                            f.write(json.dumps(message_record(message)))
+                            f.write("\n")
+                            count += 1
+                            page_count += 1
+                            self.checkpoint[channel.id] = message.id
+                            if count % EXPORT_CHECKPOINT_INTERVAL == 0:
+                                f.flush()
+                                self.save_checkpoint()
+                        if page_count < page_size:
+                            break
+                except discord.Forbidden:
+                    pass
+            self.counts[channel.id] = count
+            self.save_checkpoint()
+            return count
+
+    async def run(self, limit=None):
+        """Export all text channels of the server.
+
+        Return number of new messages exported by channel id.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        self.load_checkpoint()
+        semaphore = asyncio.Semaphore(EXPORT_CONCURRENCY)
+        channels = [c for c in self.server.channels if c.type == discord.ChannelType.text]
+        await asyncio.gather(*[
+            self.export_channel(channel, semaphore, limit=limit) for channel in channels
+        ])
+        return self.counts
+
+
 class Archive:
     """Archive activity.
 
@@ -78,9 +223,6 @@ class Archive:
     async def save_channel(self, channel: discord.Channel, count=1000, before=None, after=None, reverse=False):
         """Save channel messages."""
         server = channel.server
-        if server.id not in self.settings:
-            self.settings[server.id] = {}
-
         channel_messages = []
 
         async for message in self.bot.logs_from(
@@ -90,34 +232,37 @@ class Archive:
                 'content': message.content,
                 'timestamp': message.timestamp.isoformat(),
                 'id': message.id,
-                'reactions': []
+                'reactions': message_reactions(message)
             }
-            for reaction in message.reactions:
-                r = {
-                    'custom_emoji': reaction.custom_emoji,
-                    'count': reaction.count
-                }
-                if reaction.custom_emoji:
-                    # <:emoji_name:emoji_id>
-                    r['emoji'] = '<:{}:{}>'.format(
-                        reaction.emoji.name,
-                        reaction.emoji.id)
-                else:
-                    r['emoji'] = reaction.emoji
-                msg['reactions'].append(r)
             channel_messages.append(msg)
 
         channel_messages = sorted(
             channel_messages, key=lambda x: x['timestamp'])
 
-        self.settings[server.id][channel.id] = channel_messages
-        dataIO.save_json(JSON, self.settings)
+        self.save_channel_messages(server, channel, channel_messages)
+
+    def channel_messages_file(self, server, channel):
+        """Per-channel file for saved channel messages."""
+        return os.path.join(CHANNELS_PATH, server.id, "{}.json".format(channel.id))
+
+    def save_channel_messages(self, server, channel, channel_messages):
+        """Save channel messages to their own file instead of settings."""
+        os.makedirs(os.path.join(CHANNELS_PATH, server.id), exist_ok=True)
+        dataIO.save_json(self.channel_messages_file(server, channel), channel_messages)
+
+    def load_channel_messages(self, server, channel):
+        """Load saved channel messages."""
+        filename = self.channel_messages_file(server, channel)
+        if dataIO.is_valid_json(filename):
+            return dataIO.load_json(filename)
+        # legacy: messages stored in settings
+        return self.settings.get(server.id, {}).get(channel.id, [])
 
     async def log_channel(self, ctx, channel: discord.Channel):
         """Write channel messages from a channel."""
         server = ctx.message.server
 
-        channel_messages = self.settings[server.id][channel.id]
+        channel_messages = self.load_channel_messages(server, channel)
         for message in channel_messages:
             author_id = message['author_id']
             author = server.get_member(author_id)
@@ -225,6 +370,33 @@ class Archive:
                 filename=filename
             )
 
+    @checks.serverowner_or_permissions()
+    @archiveserver.command(name="export", pass_context=True, no_pm=True)
+    async def archiveserver_export(self, ctx, server_name, *args):
+        """Export all messages from a server as NDJSON.
+
+        Messages are written to one file per channel on the bot host.
+        Re-running the command only exports messages newer than the last run.
+
+        Options:
+        gzip: compress output files
+        reset: discard checkpoints and export from the beginning
+        """
+        server = discord.utils.get(self.bot.servers, name=server_name)
+        if server is None:
+            await self.bot.say("Server not found.")
+            return
+
+        exporter = ServerExporter(self.bot, server, use_gzip='gzip' in args)
+        if 'reset' in args:
+            exporter.reset()
+
+        await self.bot.type()
+        counts = await exporter.run()
+        await self.bot.say(
+            "Exported {:,} new messages from {:,} channels to `{}`.".format(
+                sum(counts.values()), len(counts), exporter.path))
+
     @checks.serverowner_or_permissions()
     @archiveserver.command(name="listen", pass_context=True, no_pm=True)
     async def archiveserver_listen(self, ctx, server_name, channel_name):
@@ -276,25 +448,9 @@ class Archive:
             'content': message.content,
             'timestamp': message.timestamp.isoformat(),
             'id': message.id,
-            'reactions': [],
-            'attachments': []
+            'reactions': message_reactions(message),
+            'attachments': [attach['url'] for attach in message.attachments]
         }
-        for reaction in message.reactions:
-            r = {
-                'custom_emoji': reaction.custom_emoji,
-                'count': reaction.count
-            }
-            if reaction.custom_emoji:
-                # <:emoji_name:emoji_id>
-                r['emoji'] = '<:{}:{}>'.format(
-                    reaction.emoji.name,
-                    reaction.emoji.id)
-            else:
-                r['emoji'] = reaction.emoji
-            msg['reactions'].append(r)
-
-        for attach in message.attachments:
-            msg['attachments'].append(attach['url'])
         em = self.message_embed(message.server, message.channel, msg)
         await self.bot.send_message(channel, embed=em)
 
@@ -305,39 +461,7 @@ class Archive:
 
         async for message in self.bot.logs_from(
                 channel, limit=count, before=before, after=after, reverse=reverse):
-            msg = {
-                "timestamp": message.timestamp.isoformat(),
-                "author_id": message.author.id,
-                "author_name": message.author.name,
-                "content": message.content,
-                "embeds": message.embeds,
-                "channel_id": message.channel.id,
-                "channel_name": message.channel.name,
-                "server_id": message.server.id,
-                "server_name": message.server.name,
-                "mention_everyone": message.mention_everyone,
-                "mentions_id": [m.id for m in message.mentions],
-                "mentions_name": [m.name for m in message.mentions],
-                "reactions": [],
-                "attachments": []
-            }
-            for reaction in message.reactions:
-                r = {
-                    'custom_emoji': reaction.custom_emoji,
-                    'count': reaction.count
-                }
-                if reaction.custom_emoji:
-                    # <:emoji_name:emoji_id>
-                    r['emoji'] = '<:{}:{}>'.format(
-                        reaction.emoji.name,
-                        reaction.emoji.id)
-                else:
-                    r['emoji'] = reaction.emoji
-                msg['reactions'].append(r)
-
-            for attach in message.attachments:
-                msg['attachments'].append(attach['url'])
-                messages.append(msg)
+            messages.append(message_record(message))
 
         messages = sorted(messages, key=lambda x: x['timestamp'])
         return messages
@@ -358,32 +482,15 @@ class Archive:
                 'content': message.content,
                 'timestamp': message.timestamp.isoformat(),
                 'id': message.id,
-                'reactions': [],
-                'attachments': []
+                'reactions': message_reactions(message),
+                'attachments': [attach['url'] for attach in message.attachments]
             }
-            for reaction in message.reactions:
-                r = {
-                    'custom_emoji': reaction.custom_emoji,
-                    'count': reaction.count
-                }
-                if reaction.custom_emoji:
-                    # <:emoji_name:emoji_id>
-                    r['emoji'] = '<:{}:{}>'.format(
-                        reaction.emoji.name,
-                        reaction.emoji.id)
-                else:
-                    r['emoji'] = reaction.emoji
-                msg['reactions'].append(r)
-
-            for attach in message.attachments:
-                msg['attachments'].append(attach['url'])
             channel_messages.append(msg)
 
         channel_messages = sorted(
             channel_messages, key=lambda x: x['timestamp'])
 
-        self.settings[server.id][channel.id] = channel_messages
-        dataIO.save_json(JSON, self.settings)
+        self.save_channel_messages(server, channel, channel_messages)
 
         # write out
         for message in channel_messages:
@@ -419,8 +526,9 @@ class Archive:
 
 def check_folder():
     """Check folder."""
-    if not os.path.exists(PATH):
-        os.makedirs(PATH)
+    for path in [PATH, CHANNELS_PATH, EXPORT_PATH]:
+        if not os.path.exists(path):
+            os.makedirs(path)
 
 
 def check_file():
@@ -22,8 +22,14 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import asyncio
 import os
+import re
+import time
 import datetime as dt
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
 import aiohttp
 
 import discord
@@ -37,6 +43,7 @@ from __main__ import send_cmd_help
 from oauth2client.service_account import ServiceAccountCredentials
 
 import gspread
+import unidecode
 from fuzzywuzzy import fuzz
 
 PATH = os.path.join("data", "banned")
@@ -50,6 +57,10 @@ SCOPES = [
     'https://www.googleapis.com/auth/drive'
 ]
 SERVICE_KEY_JSON = os.path.join(PATH, "service_key.json")
+# number of trigram candidates ranked by fuzz ratio
+FUZZY_CANDIDATES = 50
+# seconds before cached sheet records are checked for changes
+SHEET_CACHE_TTL = 300
 APPLICATION_NAME = "Red Discord Bot Banned Cog"
 
 FIELDS = {
@@ -64,6 +75,153 @@ FIELDS = {
 }
 
 
+def normalize_name(name):
+    """Lowercase ASCII word characters of a name."""
+    s = unidecode.unidecode(name)
+    return ''.join(re.findall(r'\w', s)).lower()
+
+
+def trigrams(s):
+    """Set of trigrams of a normalized name."""
+    return set(s[i:i + 3] for i in range(len(s) - 2))
+
+
+class NameIndex:
+    """Trigram index of normalized names.
+
+    Keys are any hashable id. update() only reindexes names which changed.
+    The same class is in banned and clans; keep both copies in sync.
+    """
+
+    def __init__(self):
+        self.names = {}
+        self.normalized = {}
+        self.postings = defaultdict(set)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, key, name):
+        if self.names.get(key) == name:
+            return
+        self.remove(key)
+        norm = normalize_name(name)
+        self.names[key] = name
+        self.normalized[key] = norm
+        for t in trigrams(norm):
+            self.postings[t].add(key)
+
+    def remove(self, key):
+        if key not in self.names:
+            return
+        del self.names[key]
+        norm = self.normalized.pop(key)
+        for t in trigrams(norm):
+            keys = self.postings[t]
+            keys.discard(key)
+            if not keys:
+                del self.postings[t]
+
+    def update(self, names):
+        """Sync index with dict of key: name."""
+        for key in set(self.names) - set(names):
+            self.remove(key)
+        for key, name in names.items():
+            self.add(key, name)
+
+    def candidates(self, query):
+        """Keys sharing trigrams with query, most shared first."""
+        counts = defaultdict(int)
+        for t in trigrams(normalize_name(query)):
+            for key in self.postings.get(t, ()):
+                counts[key] += 1
+        return sorted(counts, key=counts.get, reverse=True)
+
+    def contains(self, query):
+        """Keys whose name, raw or normalized, contains query."""
+        q = query.lower()
+        norm = normalize_name(query)
+        if len(norm) < 3:
+            keys = self.names.keys()
+        else:
+            postings = sorted((self.postings.get(t, set()) for t in trigrams(norm)), key=len)
+            keys = set.intersection(*postings)
+        return [
+            k for k in keys
+            if q in self.names[k].lower() or q in self.normalized[k]]
+
+
+class SheetRecords:
+    """Records of a worksheet with lookups by player tag and IGN."""
+
+    def __init__(self, records, revision, ign_index=None):
+        self.records = records
+        self.revision = revision
+        self.loaded = time.time()
+        self.by_tag = {}
+        self.by_ign = {}
+        for r in records:
+            self.by_tag.setdefault(str(r['PlayerTag']).upper(), r)
+            self.by_ign.setdefault(str(r['IGN']), r)
+        # reused from the previous records so only changed IGNs are reindexed
+        self.ign_index = ign_index if ign_index is not None else NameIndex()
+        self.ign_index.update({i: str(r['IGN']) for i, r in enumerate(records)})
+
+
+class SheetClient:
+    """Async Google Sheets access with cached records.
+
+    Keeps one authorized gspread client. gspread calls run in a single
+    worker thread so they never block the event loop. After
+    SHEET_CACHE_TTL the worksheet revision is checked and records are
+    only downloaded again when the sheet changed.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.client = None
+        self.cache = {}
+        self.locks = defaultdict(asyncio.Lock)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    def authorize(self):
+        if self.client is None:
+            credentials = ServiceAccountCredentials.from_json_keyfile_name(
+                SERVICE_KEY_JSON, scopes=SCOPES)
+            self.client = gspread.authorize(credentials)
+        elif getattr(self.client.auth, 'access_token_expired', False):
+            self.client.login()
+        return self.client
+
+    def fetch(self, sheet_id, revision):
+        """Download records unless worksheet revision is unchanged."""
+        worksheet = self.authorize().open_by_key(sheet_id).get_worksheet(0)
+        new_revision = getattr(worksheet, 'updated', None)
+        if revision is not None and new_revision == revision:
+            return None, revision
+        return worksheet.get_all_records(default_blank="-"), new_revision
+
+    async def records(self, sheet_id, force=False):
+        """Return SheetRecords of first worksheet."""
+        async with self.locks[sheet_id]:
+            cached = self.cache.get(sheet_id)
+            if cached is not None and not force:
+                if time.time() - cached.loaded < SHEET_CACHE_TTL:
+                    return cached
+            revision = cached.revision if cached is not None and not force else None
+            records, revision = await self.loop.run_in_executor(
+                self.executor, self.fetch, sheet_id, revision)
+            if records is None:
+                cached.loaded = time.time()
+                return cached
+            ign_index = cached.ign_index if cached is not None else None
+            self.cache[sheet_id] = SheetRecords(records, revision, ign_index=ign_index)
+            return self.cache[sheet_id]
+
+
 class Player:
     """Player. A row in Sheet."""
 
@@ -88,6 +246,23 @@ class Banned:
         """Constructor."""
         self.bot = bot
         self.settings = dataIO.load_json(JSON)
+        self.sheets = SheetClient(bot.loop)
+
+    def __unload(self):
+        self.sheets.close()
+
+    def closest_players(self, players, ign, limit=5):
+        """Records with IGN closest to ign by fuzz ratio.
+
+        Only the best trigram candidates of the IGN index are ranked.
+        """
+        keys = players.ign_index.candidates(ign)[:FUZZY_CANDIDATES]
+        if not keys:
+            keys = range(len(players.records))
+        keys = sorted(
+            keys, key=lambda i: fuzz.ratio(ign, str(players.records[i]['IGN'])),
+            reverse=True)
+        return [players.records[i] for i in keys[:limit]]
 
     def check_server_settings(self, server):
         """check server settings. Init if necessary."""
@@ -225,24 +400,18 @@ class Banned:
         if ctx.invoked_subcommand is None:
             await send_cmd_help(ctx)
 
-    def get_sheet(self, ctx) -> gspread.Worksheet:
-        """Return values from spreadsheet."""
+    async def get_players(self, ctx, force=False):
+        """Return SheetRecords of banned players."""
         server = ctx.message.server
-
-        credentials = ServiceAccountCredentials.from_json_keyfile_name(
-            SERVICE_KEY_JSON, scopes=SCOPES)
         spreadsheetId = self.settings[server.id]["SHEET_ID"]
-        gc = gspread.authorize(credentials)
-        sh = gc.open_by_key(spreadsheetId)
-        worksheet = sh.get_worksheet(0)
-
-        return worksheet
+        return await self.sheets.records(spreadsheetId, force=force)
 
-    def get_players(self, ctx):
-        """Return lisst of players as dictionary."""
-        sheet = self.get_sheet(ctx)
-        records = sheet.get_all_records(default_blank="-")
-        return records
+    @banned.command(name="reload", pass_context=True)
+    async def banned_reload(self, ctx):
+        """Reload list from spreadsheet."""
+        await self.bot.type()
+        players = await self.get_players(ctx, force=True)
+        await self.bot.say("Loaded {:,} banned players.".format(len(players.records)))
 
     @banned.command(name="list", pass_context=True)
     async def banned_list(self, ctx):
@@ -253,8 +422,8 @@ class Banned:
 
         Optional arguments.
         """
-        players = self.get_players(ctx)
-        players = sorted(players, key=lambda x: x['IGN'])
+        players = await self.get_players(ctx)
+        players = sorted(players.records, key=lambda x: x['IGN'])
 
         out = [
             '+ {} ({})'.format(player['IGN'], player['PlayerTag'])
@@ -282,12 +451,8 @@ class Banned:
         """Show banned player by player tag."""
         if not tag.startswith('#'):
             tag = '#{}'.format(tag)
-        players = self.get_players(ctx)
-        player = None
-        for p in players:
-            if p['PlayerTag'] == tag:
-                player = p
-                break
+        players = await self.get_players(ctx)
+        player = players.by_tag.get(tag.upper())
         if player is None:
             await self.bot.say('Cannot find player with that tag.')
             return
@@ -297,29 +462,22 @@ class Banned:
     @banned.command(name="ign", pass_context=True, aliases=['name'])
     async def banned_ign(self, ctx, *, ign):
         """Find player by IGN."""
-        players = self.get_players(ctx)
-        player = None
+        players = await self.get_players(ctx)
 
         # find exact match
-        for p in players:
-            if p['IGN'] == ign:
-                player = p
-                break
+        player = players.by_ign.get(ign)
 
         if player is not None:
             await self.bot.say(embed=self.player_embed(ctx, player))
             return
 
         # find fuzzy match
-        fuzz_ratio = []
-        for id, p in enumerate(players):
-            ratio = fuzz.ratio(ign, p['IGN'])
-            fuzz_ratio.append({
-                "id": id,
-                "ratio": ratio,
-                "player": p
-            })
-        fuzz_ratio = sorted(fuzz_ratio, key=lambda x: x["ratio"], reverse=True)
+        fuzz_ratio = [
+            {"player": player}
+            for player in self.closest_players(players, ign, limit=6)]
+        if not fuzz_ratio:
+            await self.bot.say('No banned players found.')
+            return
 
         await self.bot.say('Exact IGN not found. Showing closest match:')
         await self.bot.say(
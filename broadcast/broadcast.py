@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2017 SML
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import asyncio
+import time
+
+import discord
+from cogs.utils.chat_formatting import pagify
+
+# number of DMs sent at the same time
+CONCURRENCY = 5
+# pending recipients held in memory
+QUEUE_SIZE = 100
+RETRIES = 3
+RETRY_DELAY = 2
+# seconds between progress message edits
+PROGRESS_INTERVAL = 3
+
+
+class BroadcastReport:
+    """Per-recipient result of a broadcast."""
+
+    def __init__(self, title, total):
+        self.title = title
+        self.total = total
+        self.sent = []
+        # (member, reason)
+        self.failed = []
+        self.start = time.time()
+        self.end = None
+
+    @property
+    def done(self):
+        return len(self.sent) + len(self.failed)
+
+    def summary(self):
+        elapsed = (self.end or time.time()) - self.start
+        state = "finished" if self.end else "sending"
+        return "**{}** {}: {:,}/{:,} sent, {:,} failed ({:.0f}s)".format(
+            self.title, state, len(self.sent), self.total, len(self.failed), elapsed)
+
+    def lines(self):
+        out = [self.summary()]
+        for member, reason in self.failed:
+            out.append("Failed {}: {}".format(member.display_name, reason))
+        return out
+
+    def pages(self):
+        return pagify('\n'.join(self.lines()), shorten_by=12)
+
+
+class Broadcast:
+    """DM broadcast engine.
+
+    Recipients go through a bounded queue to CONCURRENCY workers.
+    discord.py waits out 429s on the DM bucket; other 5xx errors are
+    retried with backoff. Progress is shown in one message edited in place.
+
+    Usage from another cog:
+    broadcast = self.bot.get_cog("Broadcast")
+    if broadcast is not None:
+        report = await broadcast.send(members, embed=em, channel=ctx.message.channel)
+        report = await broadcast.send_to_roles(server, ['Member'], exclude=['Visitor'], content="Hi")
+    """
+
+    def __init__(self, bot):
+        """Init."""
+        self.bot = bot
+
+    async def send_one(self, member, content, embed):
+        for attempt in range(RETRIES):
+            try:
+                await self.bot.send_message(member, content, embed=embed)
+                return
+            except discord.HTTPException as e:
+                status = getattr(e.response, 'status', None)
+                if isinstance(e, (discord.Forbidden, discord.NotFound)) or attempt == RETRIES - 1:
+                    raise
+                if status is not None and status != 429 and status < 500:
+                    raise
+                await asyncio.sleep(RETRY_DELAY * 2 ** attempt)
+
+    async def worker(self, queue, report, content, embed):
+        while True:
+            member = await queue.get()
+            try:
+                if member is None:
+                    return
+                try:
+                    await self.send_one(member, content, embed)
+                except discord.Forbidden:
+                    report.failed.append((member, "does not accept DMs"))
+                except discord.HTTPException as e:
+                    report.failed.append((member, str(e)))
+                else:
+                    report.sent.append(member)
+            finally:
+                queue.task_done()
+
+    async def progress(self, report, message):
+        while report.end is None:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            if report.end is not None:
+                return
+            try:
+                await self.bot.edit_message(message, report.summary())
+            except discord.HTTPException:
+                pass
+
+    async def send(self, members, content=None, embed=None, channel=None, title="DM"):
+        """Send DM to members.
+
+        members: iterable of discord.Member, duplicates are sent once
+        channel: if set, one progress message is posted and edited there
+        Return BroadcastReport.
+        """
+        recipients = []
+        seen = set()
+        for m in members:
+            if m is None or m.id in seen or m.bot:
+                continue
+            seen.add(m.id)
+            recipients.append(m)
+
+        report = BroadcastReport(title, len(recipients))
+        message = None
+        progress_task = None
+        if channel is not None:
+            message = await self.bot.send_message(channel, report.summary())
+            progress_task = self.bot.loop.create_task(self.progress(report, message))
+
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        workers = [
+            self.bot.loop.create_task(self.worker(queue, report, content, embed))
+            for _ in range(min(CONCURRENCY, len(recipients)) or 1)]
+        try:
+            for m in recipients:
+                await queue.put(m)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for w in workers:
+                w.cancel()
+            report.end = time.time()
+            if progress_task is not None:
+                progress_task.cancel()
+
+        if message is not None:
+            try:
+                await self.bot.edit_message(message, report.summary())
+            except discord.HTTPException:
+                pass
+            details = '\n'.join(report.lines()[1:])
+            if details:
+                for page in pagify(details, shorten_by=12):
+                    await self.bot.send_message(channel, page)
+        return report
+
+    def role_members(self, server, include, exclude=None):
+        """Members with all include role names and none of exclude role names."""
+        include = [r.lower() for r in include]
+        exclude = [r.lower() for r in exclude or []]
+        if not include:
+            return []
+        index = self.bot.get_cog("RoleIndex")
+        if index is not None:
+            return list(index.query(server, include=include, exclude=exclude))
+        members = []
+        for m in server.members:
+            names = set(r.name.lower() for r in m.roles)
+            if names >= set(include) and not names & set(exclude):
+                members.append(m)
+        return members
+
+    async def send_to_roles(self, server, include, exclude=None, **kwargs):
+        """Send DM to members by roles. See send for kwargs."""
+        members = self.role_members(server, include, exclude)
+        return await self.send(members, **kwargs)
+
+
+def setup(bot):
+    """Setup."""
+    n = Broadcast(bot)
+    bot.add_cog(n)
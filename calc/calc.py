@@ -28,14 +28,121 @@ from cogs.utils.chat_formatting import box
 from discord.ext import commands
 from py_expression_eval import Parser
 import wolframalpha
+import asyncio
+import math
 import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 from cogs.utils.dataIO import dataIO
 
+try:
+    import resource
+except ImportError:
+    resource = None
+
 
 
 PATH = os.path.join("data", "calc")
 JSON = os.path.join(PATH, "settings.json")
 
+WORKERS = 2
+# limits per expression
+CPU_TIME_LIMIT = 2
+MEMORY_LIMIT = 256 * 1024 * 1024
+TIMEOUT = 5
+CACHE_SIZE = 1024
+# longest result text sent back from a worker
+MAX_OUTPUT_LENGTH = 1800
+# larger integers are reported by digit count only
+MAX_INT_DIGITS = 4000
+# functions returning different results on each call
+NON_DETERMINISTIC = ['random', 'roll']
+
+
+class CalcTimeout(Exception):
+    pass
+
+
+class CalcInterrupted(Exception):
+    """Worker pool was reset while the expression was running."""
+    pass
+
+
+_worker_initialized = False
+
+
+def init_worker():
+    """Limit memory of worker process to its current size + MEMORY_LIMIT."""
+    global _worker_initialized
+    if resource is None or _worker_initialized:
+        return
+    _worker_initialized = True
+    try:
+        with open('/proc/self/statm') as f:
+            size = int(f.read().split()[0]) * resource.getpagesize()
+        soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = size + MEMORY_LIMIT
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (OSError, ValueError):
+        pass
+
+
+def set_cpu_limit():
+    """Allow CPU_TIME_LIMIT more seconds of CPU time to the worker process.
+
+    The process is killed by SIGXCPU when exceeded, which also stops
+    computations running inside C code such as huge integer powers.
+    """
+    if resource is None:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    limit = int(usage.ru_utime + usage.ru_stime) + CPU_TIME_LIMIT + 1
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    try:
+        resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+    except ValueError:
+        pass
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_expression(expression):
+    """Parsed expression, cached in each worker."""
+    return Parser().parse(expression)
+
+
+def format_result(result):
+    """Result as text no longer than MAX_OUTPUT_LENGTH.
+
+    Runs in the worker so that huge numbers are never converted to
+    text on the event loop.
+    """
+    if isinstance(result, int) and not isinstance(result, bool):
+        digits = int(abs(result).bit_length() * math.log10(2)) + 1
+        if digits > MAX_INT_DIGITS:
+            return "Integer with about {:,} digits".format(digits)
+    out = str(result)
+    if len(out) > MAX_OUTPUT_LENGTH:
+        out = out[:MAX_OUTPUT_LENGTH] + "..."
+    return out
+
+
+def evaluate_expression(expression):
+    init_worker()
+    set_cpu_limit()
+    return format_result(parse_expression(expression).evaluate({}))
+
+
+def simplify_expression(expression):
+    init_worker()
+    set_cpu_limit()
+    return format_result(parse_expression(expression).simplify({}).toString())
+
 
 class Calc:
     """Simple Calculator"""
@@ -44,6 +151,50 @@ class Calc:
         """Init."""
         self.bot = bot
         self.config = dataIO.load_json(JSON)
+        self.executor = None
+        self.results = OrderedDict()
+
+    def __unload(self):
+        self.reset_executor()
+
+    def reset_executor(self):
+        """Kill worker processes, e.g. when one is stuck."""
+        if self.executor is None:
+            return
+        for process in list(self.executor._processes.values()):
+            process.terminate()
+        self.executor.shutdown(wait=False)
+        self.executor = None
+
+    async def run_expression(self, func, expression):
+        """Run expression function in worker process.
+
+        Results are cached unless the expression is non-deterministic.
+        """
+        key = (func.__name__, expression)
+        if key in self.results:
+            self.results.move_to_end(key)
+            return self.results[key]
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=WORKERS)
+        executor = self.executor
+        try:
+            out = await asyncio.wait_for(
+                self.bot.loop.run_in_executor(executor, func, expression),
+                TIMEOUT)
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            # a pool already replaced was reset by another expression
+            if executor is not self.executor:
+                raise CalcInterrupted
+            self.reset_executor()
+            raise CalcTimeout
+
+        if not any(name in expression.lower() for name in NON_DETERMINISTIC):
+            self.results[key] = out
+            while len(self.results) > CACHE_SIZE:
+                self.results.popitem(last=False)
+        return out
 
     @property
     def wolframalpha_appid(self):
@@ -103,9 +254,21 @@ class Calc:
 
         await self.bot.say(box(input))
 
-        parser = Parser()
         try:
-            out = parser.parse(input).evaluate({})
+            out = await self.run_expression(evaluate_expression, input)
+        except CalcTimeout:
+            await self.bot.say(
+                ":warning: Expression took too long to evaluate. "
+                "Other calculations running at the same time were cancelled.")
+            return
+        except CalcInterrupted:
+            await self.bot.say(
+                ":warning: Calculation was cancelled by another expression "
+                "that took too long. Please try again.")
+            return
+        except MemoryError:
+            await self.bot.say(":warning: Expression uses too much memory.")
+            return
         except ZeroDivisionError:
             await self.bot.say(":warning: Zero division error")
             return
@@ -115,6 +278,9 @@ class Calc:
         except FloatingPointError:
             await self.bot.say(":warning: floating point error.")
             return
+        except Exception as err:
+            await self.bot.say(':warning:' + str(err))
+            return
 
         await self.bot.say(box(out))
 
@@ -131,11 +297,17 @@ class Calc:
             await send_cmd_help(ctx)
             return
         try:
-            parser = Parser()
-            exp = parser.parse(expression)
-            out = exp.simplify({}).toString()
+            out = await self.run_expression(simplify_expression, expression)
             await self.bot.say(box(expression))
             await self.bot.say(box(out))
+        except CalcTimeout:
+            await self.bot.say(
+                ":warning: Expression took too long to simplify. "
+                "Other calculations running at the same time were cancelled.")
+        except CalcInterrupted:
+            await self.bot.say(
+                ":warning: Calculation was cancelled by another expression "
+                "that took too long. Please try again.")
         except Exception as err:
             await self.bot.say(':warning:' + str(err))
 
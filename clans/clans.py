@@ -29,6 +29,7 @@ import asyncio
 import json
 import os
 import re
+import time
 from collections import defaultdict
 
 import aiohttp
@@ -49,6 +50,9 @@ CONFIG_YAML = os.path.join(PATH, "config.yml")
 AUTH_YAML = os.path.join(PATH, "auth.yml")
 BADGES = os.path.join(PATH, "alliance_badges.json")
 
+# seconds before member search reloads clans
+SEARCH_CACHE_TTL = 300
+
 
 def nested_dict():
     """Recursively nested defaultdict."""
@@ -65,6 +69,83 @@ def clean_tag(tag):
     t = t.upper()
     return t
 
+
+def normalize_name(name):
+    """Lowercase ASCII word characters of a name."""
+    s = unidecode.unidecode(name)
+    return ''.join(re.findall(r'\w', s)).lower()
+
+
+def trigrams(s):
+    """Set of trigrams of a normalized name."""
+    return set(s[i:i + 3] for i in range(len(s) - 2))
+
+
+class NameIndex:
+    """Trigram index of normalized names.
+
+    Keys are any hashable id. update() only reindexes names which changed.
+    The same class is in banned and clans; keep both copies in sync.
+    """
+
+    def __init__(self):
+        self.names = {}
+        self.normalized = {}
+        self.postings = defaultdict(set)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, key, name):
+        if self.names.get(key) == name:
+            return
+        self.remove(key)
+        norm = normalize_name(name)
+        self.names[key] = name
+        self.normalized[key] = norm
+        for t in trigrams(norm):
+            self.postings[t].add(key)
+
+    def remove(self, key):
+        if key not in self.names:
+            return
+        del self.names[key]
+        norm = self.normalized.pop(key)
+        for t in trigrams(norm):
+            keys = self.postings[t]
+            keys.discard(key)
+            if not keys:
+                del self.postings[t]
+
+    def update(self, names):
+        """Sync index with dict of key: name."""
+        for key in set(self.names) - set(names):
+            self.remove(key)
+        for key, name in names.items():
+            self.add(key, name)
+
+    def candidates(self, query):
+        """Keys sharing trigrams with query, most shared first."""
+        counts = defaultdict(int)
+        for t in trigrams(normalize_name(query)):
+            for key in self.postings.get(t, ()):
+                counts[key] += 1
+        return sorted(counts, key=counts.get, reverse=True)
+
+    def contains(self, query):
+        """Keys whose name, raw or normalized, contains query."""
+        q = query.lower()
+        norm = normalize_name(query)
+        if len(norm) < 3:
+            keys = self.names.keys()
+        else:
+            postings = sorted((self.postings.get(t, set()) for t in trigrams(norm)), key=len)
+            keys = set.intersection(*postings)
+        return [
+            k for k in keys
+            if q in self.names[k].lower() or q in self.normalized[k]]
+
+
 class APIError(Exception):
     def __init__(self, message):
         self.message = message
@@ -80,6 +161,10 @@ class Clans:
         self.settings.update(dataIO.load_json(JSON))
         self.badges = dataIO.load_json(BADGES)
         self._auth = None
+        self.members = {}
+        self.member_index = NameIndex()
+        self.members_updated = 0
+        self.members_version = None
 
         provider = self.settings.get('provider')
         if provider is None:
@@ -193,6 +278,11 @@ class Clans:
 
     async def get_clans(self, tags):
         """Return list of clans"""
+        roster = self.bot.get_cog("FamilyRoster")
+        if roster is not None:
+            clans = roster.clan_models(tags, provider=self.api_provider)
+            if clans is not None:
+                return clans
         try:
             if self.api_provider == 'official':
                 urls = ['https://api.clashroyale.com/v1/clans/%23{}'.format(tag) for tag in tags]
@@ -343,6 +433,50 @@ class Clans:
 
         return parser
 
+    async def family_members(self):
+        """Family members by tag, with the name index kept in sync.
+
+        Reuses the last load until the roster snapshot changes or,
+        without FamilyRoster, until SEARCH_CACHE_TTL has passed.
+        """
+        config = self.clans_config
+        clan_tags = [clan.tag for clan in config.clans]
+        version = None
+        roster = self.bot.get_cog("FamilyRoster")
+        if roster is not None:
+            snapshot = roster.usable_snapshot(clan_tags, provider=self.api_provider)
+            if snapshot is not None:
+                version = snapshot.version
+        if version is not None:
+            if version == self.members_version:
+                return self.members
+        elif self.members and time.time() - self.members_updated < SEARCH_CACHE_TTL:
+            return self.members
+
+        await self.bot.type()
+        clans = await self.get_clans(clan_tags)
+        if roster is None or version is None:
+            dataIO.save_json(CACHE, clans)
+
+        members = {}
+        for clan in clans:
+            if self.api_provider == 'official':
+                member_list = clan.get('memberList')
+            else:
+                member_list = clan.get('members')
+
+            for member in member_list:
+                member = Box(member)
+                member.clan = clan
+                member.tag = clean_tag(member.tag)
+                members[member.tag] = member
+
+        self.member_index.update({tag: m['name'] for tag, m in members.items()})
+        self.members = members
+        self.members_updated = time.time()
+        self.members_version = version
+        return members
+
     @checks.mod_or_permissions(manage_roles=True)
     @commands.command(pass_context=True)
     async def clanmembersearch(self, ctx, *args):
@@ -367,51 +501,16 @@ class Clans:
             await self.bot.send_cmd_help(ctx)
             return
 
-        await self.bot.type()
-        config = self.clans_config
-        clan_tags = [clan.tag for clan in config.clans]
-
-        api_error = False
-        clans = []
         try:
-            clans = await self.get_clans(clan_tags)
-            dataIO.save_json(CACHE, clans)
+            members = await self.family_members()
         except APIError:
-            api_error = True
-
-        if api_error:
             await self.bot.say("Cannot load clans from API.")
             return
 
-        members = []
-        for clan in clans:
-            if self.api_provider == 'official':
-                member_list = clan.get('memberList')
-            else:
-                member_list = clan.get('members')
-
-            for member in member_list:
-                member = Box(member)
-                member.clan = clan
-                member.tag = clean_tag(member.tag)
-                members.append(member)
-
-        results = []
-
         if pargs.name != '_':
-            for member in members:
-                # simple search
-                if pargs.name.lower() in member['name'].lower():
-                    results.append(member)
-                else:
-                    # unidecode search
-                    s = unidecode.unidecode(member['name'])
-                    s = ''.join(re.findall(r'\w', s))
-                    if pargs.name.lower() in s.lower():
-                        results.append(member)
+            results = [members[tag] for tag in self.member_index.contains(pargs.name)]
         else:
-            results = members
-            print(len(results))
+            results = list(members.values())
 
         # filter by clan name
         if pargs.clan:
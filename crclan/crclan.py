@@ -708,7 +708,11 @@ class ClanManager:
         tag = self.key2tag(server, key)
         clan = self.server_settings(server)["clans"][tag]
         role = discord.utils.get(server.roles, id=clan['role_id'])
-        members = [m for m in server.members if role in m.roles]
+        index = self.bot.get_cog("RoleIndex")
+        if index is not None:
+            members = index.members(server, role)
+        else:
+            members = [m for m in server.members if role in m.roles]
         if sort:
             members = sorted(members, key=lambda x: x.display_name.lower())
         return members
@@ -758,9 +762,17 @@ class ClanManager:
     async def update_data(self):
         """Update all data and save to disk."""
         dataset = []
+        roster = self.bot.get_cog("FamilyRoster")
         for server_id in self.settings["servers"]:
             clans = self.settings["servers"][server_id]["clans"]
             for tag in clans.keys():
+                if roster is not None:
+                    snapshot = roster.usable_snapshot([tag], provider='cr-api')
+                    if snapshot is not None:
+                        dataset.append(CRClanModel(
+                            data=snapshot.clan_models([tag])[0],
+                            timestamp=snapshot.datetime))
+                        continue
                 data = await self.update_clan_data(tag)
                 if not data:
                     data = self.cached_clan_data(tag)
@@ -1574,6 +1586,17 @@ class CRClan:
             for m in clan_members_not_registered_on_dc:
                 out.append("+ {}".format(m["name"]))
 
+        planner = self.bot.get_cog("RolePlanner")
+        if planner is not None and (option_remove_role or option_add_role):
+            changes = []
+            if option_remove_role:
+                changes.extend((m, [], [clanrole]) for m in dc_members_not_in_clan)
+            if option_add_role:
+                changes.extend((m, [clanrole], []) for m in dc_members_without_role)
+            report = await planner.apply(changes)
+            out.extend(report.lines())
+            option_remove_role = option_add_role = False
+
         # remove role from members not in clan
         if option_remove_role:
             for m in dc_members_not_in_clan:
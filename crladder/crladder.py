@@ -22,8 +22,10 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import asyncio
 import datetime as dt
 import itertools
+import logging
 import math
 import os
 from random import choice
@@ -40,6 +42,13 @@ from trueskill import TrueSkill, rate_1vs1, quality_1vs1
 
 PATH = os.path.join("data", "crladder")
 JSON = os.path.join(PATH, "settings.json")
+CRPROFILE_JSON = os.path.join("data", "crprofile", "settings.json")
+
+# background battle ingestion
+INGEST_INTERVAL = 600
+INGEST_CONCURRENCY = 5
+
+logger = logging.getLogger("red.crladder")
 
 SERVER_DEFAULTS = {
     "SERIES": {}
@@ -264,6 +273,14 @@ class Battle:
     def opponent_crowns(self):
         return self.data.get("opponentCrowns")
 
+    @property
+    def key(self):
+        """Identify a battle regardless of which side reported it."""
+        return (
+            str(self.timestamp),
+            frozenset([normalize_tag(self.team_tag), normalize_tag(self.opponent_tag)])
+        )
+
 
 class Match:
     """A match."""
@@ -336,6 +353,9 @@ class Settings:
         if "servers" not in self.model:
             self.model["servers"] = {}
 
+        self._crprofile = None
+        self._crprofile_mtime = None
+
     def save(self):
         """Save settings to file."""
         # preprocess rating if found
@@ -359,6 +379,26 @@ class Settings:
         self.model['auth'] = value
         self.save()
 
+    @property
+    def ingest_interval(self):
+        """Background battle ingestion interval in seconds."""
+        return self.model.get('ingest_interval', INGEST_INTERVAL)
+
+    @ingest_interval.setter
+    def ingest_interval(self, value):
+        self.model['ingest_interval'] = int(value)
+        self.save()
+
+    @property
+    def ingest_enabled(self):
+        """Whether battles are ingested automatically."""
+        return self.model.get('ingest_enabled', False)
+
+    @ingest_enabled.setter
+    def ingest_enabled(self, value):
+        self.model['ingest_enabled'] = bool(value)
+        self.save()
+
     def legacy_update(self):
         """Update players from dict to list."""
         for server_k, server in self.model['servers'].items():
@@ -476,12 +516,24 @@ class Settings:
             self.save()
             return True
 
+    @property
+    def crprofile(self):
+        """crprofile settings, reloaded only when the file changes."""
+        try:
+            mtime = os.path.getmtime(CRPROFILE_JSON)
+        except OSError:
+            mtime = None
+        if self._crprofile is None or mtime != self._crprofile_mtime:
+            model = {}
+            if mtime is not None:
+                model = dataIO.load_json(CRPROFILE_JSON)
+            self._crprofile = Box(model, default_box=True, default_box_attr=None)
+            self._crprofile_mtime = mtime
+        return self._crprofile
+
     def get_player_tag(self, server, player: discord.Member):
         """Search crprofile cog for Clash Royale player tag."""
-        cps = Box(
-            dataIO.load_json(os.path.join("data", "crprofile", "settings.json")),
-            default_box=True, default_box_attr=None)
-        cps_players = cps.servers[server.id].players
+        cps_players = self.crprofile.servers[server.id].players
         player_tag = cps_players.get(player.id)
         if player_tag is None:
             raise CannotFindPlayer
@@ -495,6 +547,15 @@ class Settings:
                 return True
         return False
 
+    async def fetch_battles(self, session, tag):
+        """Fetch battle log of a player."""
+        url = 'http://api.cr-api.com/player/{}?keys=battles'.format(tag)
+        async with session.get(url, headers={'auth': self.auth}) as resp:
+            if resp.status != 200:
+                raise APIError(resp)
+            response = await resp.json()
+        return [Battle(battle) for battle in response.get('battles', [])]
+
     async def find_battles(self, series, member1: discord.Member, member2: discord.Member):
         """Find battle by member1 vs member2."""
         player1, player2 = None, None
@@ -504,19 +565,11 @@ class Settings:
             if player['discord_id'] == member2.id:
                 player2 = player
 
-        url = 'http://api.cr-api.com/player/{}?keys=battles'.format(player1['tag'])
-        response = {}
         async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers={'auth': self.auth}) as resp:
-                if resp.status != 200:
-                    raise APIError(resp)
-                else:
-                    response = await resp.json()
+            all_battles = await self.fetch_battles(session, player1['tag'])
 
-        all_battles = response.get('battles')
         battles = []
-        for battle in all_battles:
-            b = Battle(battle)
+        for b in all_battles:
             add_this = True
             if not b.valid_type:
                 add_this = False
@@ -561,6 +614,109 @@ class Settings:
         self.save()
         return True
 
+    def active_series(self):
+        """All active series as (server_id, name, series) tuples."""
+        for server_id, server in self.model['servers'].items():
+            for name, series in server['series'].items():
+                if series.get('status') == 'active':
+                    yield server_id, name, series
+
+    def record_battle(self, series, battle: Battle):
+        """Rate a battle between two series players and store the match.
+
+        Does not write to disk; caller is expected to save.
+        Return the match, or None if the battle does not qualify.
+        """
+        team_tag = normalize_tag(battle.team_tag)
+        opponent_tag = normalize_tag(battle.opponent_tag)
+        team, opponent = None, None
+        for p in series['players']:
+            if p['tag'] == team_tag:
+                team = p
+            if p['tag'] == opponent_tag:
+                opponent = p
+        if team is None or opponent is None or team is opponent:
+            return None
+
+        p_team = Player.from_dict(team)
+        p_opponent = Player.from_dict(opponent)
+        p_team_rating_old = env.create_rating(mu=p_team.rating.mu, sigma=p_team.rating.sigma)
+        p_opponent_rating_old = env.create_rating(mu=p_opponent.rating.mu, sigma=p_opponent.rating.sigma)
+
+        if battle.winner < 0:
+            p_opponent.rating, p_team.rating = rate_1vs1(p_opponent.rating, p_team.rating)
+        else:
+            p_team.rating, p_opponent.rating = rate_1vs1(
+                p_team.rating, p_opponent.rating, drawn=battle.winner == 0)
+
+        for p, player in ((team, p_team), (opponent, p_opponent)):
+            p['rating'] = {
+                "mu": float(player.rating.mu),
+                "sigma": float(player.rating.sigma)
+            }
+
+        match = Match(player1=p_team, player2=p_opponent, player1_old_rating=p_team_rating_old,
+                      player2_old_rating=p_opponent_rating_old, battle=battle)
+        series['matches'][str(battle.timestamp)] = match.to_dict()
+        return match
+
+    async def ingest_battles(self):
+        """Fetch battle logs of all players in active series and rate new matches.
+
+        Each player tag is fetched once even if it is in multiple series.
+        Battles seen from both sides are deduplicated by timestamp and tags.
+
+        Return number of matches recorded by series name.
+        """
+        all_series = list(self.active_series())
+        tags = set()
+        for server_id, name, series in all_series:
+            for p in series['players']:
+                if p.get('tag'):
+                    tags.add(p['tag'])
+
+        semaphore = asyncio.Semaphore(INGEST_CONCURRENCY)
+
+        async def fetch(session, tag):
+            async with semaphore:
+                try:
+                    return await self.fetch_battles(session, tag)
+                except APIError as e:
+                    logger.warning(
+                        "Failed to fetch battles of %s: HTTP %s",
+                        tag, getattr(e.response, 'status', None))
+                    return []
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(
+                        "Failed to fetch battles of %s: %r", tag, e)
+                    return []
+
+        async with aiohttp.ClientSession() as session:
+            results = await asyncio.gather(*[fetch(session, tag) for tag in tags])
+
+        battles = {}
+        for battle_list in results:
+            for battle in battle_list:
+                if battle.valid_type:
+                    battles.setdefault(battle.key, battle)
+        battles = sorted(battles.values(), key=lambda x: int(x.timestamp))
+
+        recorded = {}
+        for server_id, name, series in all_series:
+            series_tags = set(p['tag'] for p in series['players'])
+            for battle in battles:
+                timestamp, battle_tags = battle.key
+                if not battle_tags <= series_tags:
+                    continue
+                if timestamp in series['matches']:
+                    continue
+                if self.record_battle(series, battle) is not None:
+                    recorded[name] = recorded.get(name, 0) + 1
+
+        if recorded:
+            self.save()
+        return recorded
+
 
 class CRLadder:
     """CRLadder ranking system.
@@ -576,6 +732,25 @@ class CRLadder:
         """Init."""
         self.bot = bot
         self.settings = Settings(bot)
+        self.task = bot.loop.create_task(self.loop_task())
+
+    def __unload(self):
+        self.task.cancel()
+
+    async def loop_task(self):
+        """Loop task: ingest battles from active series."""
+        await self.bot.wait_until_ready()
+        if self.settings.ingest_enabled:
+            try:
+                await self.settings.ingest_battles()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # keep looping: the next interval may succeed
+                logger.exception("Failed to ingest battles.")
+        await asyncio.sleep(self.settings.ingest_interval)
+        if self is self.bot.get_cog('CRLadder'):
+            self.task = self.bot.loop.create_task(self.loop_task())
 
     @commands.group(pass_context=True)
     async def crladderset(self, ctx):
@@ -598,6 +773,34 @@ class CRLadder:
         self.settings.legacy_update()
         await self.bot.say("Updated old DB to new.")
 
+    @checks.is_owner()
+    @crladderset.command(name="autoingest", pass_context=True)
+    async def crladderset_autoingest(self, ctx, enabled: bool, interval: int = None):
+        """Automatically record battles of all active series.
+
+        interval: seconds between battle log fetches.
+        """
+        self.settings.ingest_enabled = enabled
+        if interval is not None:
+            self.settings.ingest_interval = interval
+        await self.bot.say(
+            "Auto ingestion {} (every {} seconds).".format(
+                "enabled" if enabled else "disabled",
+                self.settings.ingest_interval))
+
+    @checks.mod_or_permissions()
+    @crladderset.command(name="ingest", pass_context=True)
+    async def crladderset_ingest(self, ctx):
+        """Fetch and record battles for all active series now."""
+        await self.bot.type()
+        recorded = await self.settings.ingest_battles()
+        if not recorded:
+            await self.bot.say("No new battles found.")
+            return
+        await self.bot.say(
+            "Recorded battles:\n{}".format(
+                '\n'.join('+ {}: {}'.format(k, v) for k, v in sorted(recorded.items()))))
+
     @checks.mod_or_permissions()
     @crladderset.command(name="create", pass_context=True)
     async def crladderset_create(self, ctx, name):
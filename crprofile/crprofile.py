@@ -51,6 +51,12 @@ DATA_UPDATE_INTERVAL = timedelta(minutes=30).seconds
 
 API_FETCH_TIMEOUT = 10
 
+# player data younger than this is served without refresh
+PLAYER_CACHE_TTL = timedelta(minutes=2).seconds
+# stale player data is served while refreshing in the background
+PLAYER_CACHE_STALE = DATA_UPDATE_INTERVAL
+PLAYER_CACHE_SIZE = 1000
+
 BOTCOMMANDER_ROLES = ["Bot Commander"]
 
 CREDITS = 'Selfish + SML'
@@ -819,6 +825,10 @@ class Settings:
         self.filepath = filepath
         self.settings = nested_dict()
         self.settings.update(dataIO.load_json(filepath))
+        # tag: (timestamp, CRPlayerModel)
+        self.player_cache = OrderedDict()
+        # tag: background refresh task
+        self.player_refresh = {}
 
     def init_server(self, server):
         """Initialized server settings.
@@ -885,10 +895,8 @@ class Settings:
         """Return server settings."""
         return self.settings["servers"][server.id]
 
-    async def player_data(self, tag):
-        """Return CRPlayerModel by tag."""
-        tag = SCTag(tag).tag
-
+    async def fetch_player_data(self, tag):
+        """Fetch player info and upcoming chests concurrently."""
         error = False
         data = {
             'info': {},
@@ -904,24 +912,69 @@ class Settings:
             chest_url = 'http://api.cr-api.com/player/{}/chests'.format(tag)
             headers = {"auth": self.auth}
 
+        async def fetch(session, url):
+            async with session.get(url, timeout=API_FETCH_TIMEOUT, headers=headers) as resp:
+                if resp.status != 200:
+                    return None
+                return await resp.json()
+
+        async with aiohttp.ClientSession() as session:
+            info, chests = await asyncio.gather(
+                fetch(session, info_url),
+                fetch(session, chest_url))
+
+        if info is None or chests is None:
+            error = True
+        data['info'] = info or {}
+        data['chests'] = chests or {}
+
+        player = CRPlayerModel(data=data, error=error, api_provider=self.api_provider)
+        if not error:
+            self.player_cache[tag] = (dt.datetime.utcnow(), player)
+            self.player_cache.move_to_end(tag)
+            while len(self.player_cache) > PLAYER_CACHE_SIZE:
+                self.player_cache.popitem(last=False)
+            dataIO.save_json(
+                self.cached_filepath(tag),
+                dict(data, api_provider=self.api_provider))
+        return player
+
+    async def refresh_player_data(self, tag):
+        """Refresh player data in the background."""
         try:
-            async with aiohttp.ClientSession() as session:
-                for url in [info_url, chest_url]:
-                    async with session.get(url, timeout=API_FETCH_TIMEOUT, headers=headers) as resp:
-                        if resp.status != 200:
-                            error = True
-                        else:
-                            if url == info_url:
-                                data['info'] = await resp.json()
-                            elif url == chest_url:
-                                data['chests'] = await resp.json()
+            await self.fetch_player_data(tag)
+        except (json.decoder.JSONDecodeError, asyncio.TimeoutError, aiohttp.ClientError):
+            pass
+        finally:
+            self.player_refresh.pop(tag, None)
 
-        except json.decoder.JSONDecodeError:
-            raise
-        except asyncio.TimeoutError:
-            raise
+    async def player_data(self, tag):
+        """Return CRPlayerModel by tag.
+
+        Recently fetched players are served from memory.
+        Stale players are served from memory while being refreshed in the background.
+        Falls back to data cached on disk if the API returns an error.
+        """
+        tag = SCTag(tag).tag
 
-        return CRPlayerModel(data=data, error=error, api_provider=self.api_provider)
+        cached = self.player_cache.get(tag)
+        if cached is not None:
+            timestamp, player = cached
+            age = (dt.datetime.utcnow() - timestamp).total_seconds()
+            if age < PLAYER_CACHE_TTL:
+                return player
+            if age < PLAYER_CACHE_STALE:
+                if tag not in self.player_refresh:
+                    self.player_refresh[tag] = self.bot.loop.create_task(
+                        self.refresh_player_data(tag))
+                return player
+
+        player = await self.fetch_player_data(tag)
+        if player.error:
+            cached_player = self.cached_player_data(tag)
+            if cached_player is not None:
+                return cached_player
+        return player
 
     def cached_player_data(self, tag):
         """Return cached data by tag."""
@@ -929,7 +982,9 @@ class Settings:
         if not os.path.exists(file_path):
             return None
         data = dataIO.load_json(file_path)
-        return CRPlayerModel(is_cache=True, data=data)
+        # files cached before the provider was stored use the current one
+        api_provider = data.get('api_provider', self.api_provider)
+        return CRPlayerModel(is_cache=True, data=data, api_provider=api_provider)
 
     def cached_player_data_timestamp(self, tag):
         """Return timestamp in days-since format of cached data."""
@@ -1332,9 +1387,9 @@ class CRProfile:
         try:
             player_data = await self.model.player_data(sctag.tag)
         except json.decoder.JSONDecodeError:
-            player_data = self.model.cached_player_data(tag)
-        except asyncio.TimeoutError:
-            player_data = self.model.cached_player_data(tag)
+            player_data = self.model.cached_player_data(sctag.tag)
+        except (asyncio.TimeoutError, aiohttp.ClientError):
+            player_data = self.model.cached_player_data(sctag.tag)
 
         if player_data is None:
             await self.bot.send_message(ctx.message.channel, "Unable to load from API.")
@@ -1345,7 +1400,7 @@ class CRProfile:
                 (
                     "Unable to load from API. "
                     "Showing cached data from: {}.".format(
-                        self.model.cached_player_data_timestamp(tag))
+                        self.model.cached_player_data_timestamp(sctag.tag))
                 )
             )
 
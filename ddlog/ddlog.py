@@ -299,9 +299,14 @@ class DataDogLog:
         roles = {}
         for role in server.roles:
             roles[role.id] = {'role': role, 'count': 0}
-        for member in server.members:
-            for role in member.roles:
-                roles[role.id]['count'] += 1
+        role_index = self.bot.get_cog("RoleIndex")
+        if role_index is not None:
+            for role in server.roles:
+                roles[role.id]['count'] = role_index.count(server, role)
+        else:
+            for member in server.members:
+                for role in member.roles:
+                    roles[role.id]['count'] += 1
 
         for role in server.roles:
             role_count = roles[role.id]['count']
@@ -27,6 +27,8 @@ import os
 import io
 import datetime
 import asyncio
+from collections import namedtuple
+
 import discord
 
 from discord import Message
@@ -57,6 +59,36 @@ JSON = os.path.join(*PATH_LIST, "settings.json")
 HOST = '127.0.0.1'
 INTERVAL = 5
 
+# fields of MessageBus MessageFeatures used for tags
+LoggedMessage = namedtuple(
+    'LoggedMessage', [
+        'server_id',
+        'server_name',
+        'channel_id',
+        'channel_name',
+        'author_id',
+        'author_name',
+        'author_display_name',
+        'author_is_me',
+    ])
+
+
+def logged_message(message):
+    """LoggedMessage of a message, when MessageBus is not loaded."""
+    server = message.server
+    channel = message.channel
+    is_private = channel is None or channel.is_private
+    return LoggedMessage(
+        server_id=server.id if server is not None else None,
+        server_name=server.name if server is not None else None,
+        channel_id=channel.id if not is_private else None,
+        channel_name=channel.name if not is_private else None,
+        author_id=message.author.id,
+        author_name=message.author.name,
+        author_display_name=message.author.display_name,
+        author_is_me=server is not None and message.author is server.me)
+
+
 class DataDogLogMessage:
     """DataDog Message Logger.
 
@@ -66,15 +98,20 @@ class DataDogLogMessage:
     def __init__(self, bot):
         self.bot = bot
         self.tags = []
+        self.bus = None
         self.task = bot.loop.create_task(self.loop_task())
         self.settings = dataIO.load_json(JSON)
         datadog.initialize(statsd_host=self.settings['HOST'])
+        self.subscribe(bot.get_cog('MessageBus'))
 
     def save(self):
         dataIO.save_json(JSON, self.settings)
 
     def __unload(self):
         self.task.cancel()
+        bus = self.bot.get_cog('MessageBus')
+        if bus is not None and bus is self.bus:
+            bus.unsubscribe('DataDogLogMessage')
 
     async def loop_task(self):
         await self.bot.wait_until_ready()
@@ -87,42 +124,59 @@ class DataDogLogMessage:
         if self is self.bot.get_cog('DataDogLog'):
             self.task = self.bot.loop.create_task(self.loop_task())
 
+    def subscribe(self, bus):
+        """Log messages from MessageBus instead of on_message.
+
+        Subscribing replaces the callback of a previously loaded
+        instance of this cog.
+        """
+        self.bus = bus
+        if bus is not None:
+            bus.subscribe('DataDogLogMessage', self.on_message_features)
+
+    async def on_message_bus_load(self, bus):
+        """Subscribe when MessageBus is loaded after this cog."""
+        self.subscribe(bus)
+
+    async def on_message_bus_unload(self, bus):
+        """Fall back to on_message when MessageBus is unloaded."""
+        if bus is self.bus:
+            self.bus = None
+
     async def on_message(self, message: Message):
         """Logs messages."""
-        author = message.author
-        server = message.server
-        # Don’t log bot messages
-        if author is server.me:
+        # Handled by on_message_features if MessageBus is loaded
+        if self.bus is not None:
             return
-        self.dd_log_messages(message)
-
+        self.on_message_features(logged_message(message))
 
-    def dd_log_messages(self, message: discord.Message):
-        """Send message stats to datadog."""
-        channel = message.channel
-        channel_name = ''
-        channel_id = ''
-        if channel is not None:
-            if not channel.is_private:
-                channel_name = channel.name
-                channel_id = channel.id
+    def on_message_features(self, features):
+        """Logs messages from MessageBus."""
+        if features.server_id is None:
+            return
+        # Don’t log bot messages
+        if features.author_is_me:
+            return
+        self.dd_log_messages(features)
 
-        server_id = message.server.id
-        server_name = message.server.name
+    def dd_log_messages(self, features):
+        """Send message stats to datadog.
 
+        features: MessageBus MessageFeatures or LoggedMessage.
+        """
+        channel_name = features.channel_name or ''
         statsd.increment(
             'bot.msglog',
             tags=[
                 *self.tags,
-                'author:' + str(message.author.display_name),
-                'author_id:' + str(message.author.id),
-                'author_name:' + str(message.author.name),
-                'server_id:' + str(server_id),
-                'server_name:' + str(server_name),
+                'author:' + str(features.author_display_name),
+                'author_id:' + str(features.author_id),
+                'author_name:' + str(features.author_name),
+                'server_id:' + str(features.server_id),
+                'server_name:' + str(features.server_name),
                 'channel:' + str(channel_name),
                 'channel_name:' + str(channel_name),
-                'channel_id:' + str(channel_id)])
-
+                'channel_id:' + str(features.channel_id or '')])
 
 
 def check_folders():
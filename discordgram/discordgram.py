@@ -22,9 +22,13 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import json
 import os
 import re
+import time
+from collections import OrderedDict
 
+import discord
 from discord import Message
 from discord.ext import commands
 
@@ -34,12 +38,24 @@ from cogs.utils.dataIO import dataIO
 
 PATH = os.path.join("data", "discordgram")
 JSON = os.path.join(PATH, "settings.json")
+POSTS_PATH = os.path.join(PATH, "posts")
 
 SERVER_DEFAULTS = {
     "CHANNEL": None,
-    "MESSAGES": []
+    "NEXT_ID": 0,
+    "RETENTION_DAYS": 90
 }
 
+MAX_POSTS = 10000
+# rewrite log when it has this many more lines than live posts
+COMPACT_SLACK = 1000
+DISCORD_EPOCH = 1420070400
+
+
+def snowflake_time(snowflake):
+    """Unix time of a Discord id."""
+    return ((int(snowflake) >> 22) / 1000) + DISCORD_EPOCH
+
 
 class DGMessage:
     """Discordgram message."""
@@ -62,6 +78,117 @@ class DGMessage:
         }
 
 
+class ServerPostStore:
+    """Append-only Discordgram post log of a server.
+
+    Each line of the log file is one post, or a deletion of one. Posts
+    are indexed by Discordgram id and by original message id. Ids keep
+    increasing after old posts expire, so footers never point to a
+    reused id. Compacted logs start with a NEXT_ID line for that reason.
+    """
+
+    def __init__(self, server_id, next_id=0):
+        self.server_id = server_id
+        self.path = os.path.join(POSTS_PATH, "{}.ndjson".format(server_id))
+        # Discordgram id: post, in id order
+        self.posts = OrderedDict()
+        self.by_message_id = {}
+        self.next_id = next_id
+        self.lines = 0
+        if os.path.exists(self.path):
+            self.load()
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        with open(self.path) as f:
+            for line in f:
+                self.lines += 1
+                try:
+                    post = json.loads(line)
+                    self.index(post)
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    def index(self, post):
+        if "NEXT_ID" in post:
+            self.next_id = max(self.next_id, post["NEXT_ID"])
+            return
+        if post.get("DELETED"):
+            self.unindex(post["ID"])
+            return
+        self.posts[post["ID"]] = post
+        self.by_message_id[post["MESSAGE_ID"]] = post
+        self.next_id = max(self.next_id, post["ID"] + 1)
+
+    def unindex(self, id):
+        post = self.posts.pop(id, None)
+        if post is not None:
+            self.by_message_id.pop(post["MESSAGE_ID"], None)
+        return post
+
+    def write(self, posts):
+        with open(self.path, "a") as f:
+            for post in posts:
+                f.write(json.dumps(post) + "\n")
+        self.lines += len(posts)
+
+    def append(self, posts):
+        self.write(posts)
+        for post in posts:
+            self.index(post)
+
+    def reserve_id(self):
+        """Next Discordgram id, not given out again."""
+        id = self.next_id
+        self.next_id += 1
+        return id
+
+    def get(self, id):
+        return self.posts.get(id)
+
+    def get_by_message_id(self, message_id):
+        return self.by_message_id.get(message_id)
+
+    def delete(self, id):
+        post = self.unindex(id)
+        if post is not None:
+            self.write([{"ID": id, "DELETED": True}])
+        return post
+
+    def expire(self, retention_days):
+        """Delete posts beyond MAX_POSTS or older than retention_days."""
+        expired = []
+        cutoff = None
+        if retention_days:
+            cutoff = time.time() - retention_days * 86400
+        while self.posts:
+            id, post = next(iter(self.posts.items()))
+            if len(self.posts) <= MAX_POSTS and (
+                    cutoff is None or
+                    snowflake_time(post["MESSAGE_ID"]) >= cutoff):
+                break
+            self.unindex(id)
+            expired.append({"ID": id, "DELETED": True})
+        if expired:
+            self.write(expired)
+        if self.lines > len(self.posts) + COMPACT_SLACK:
+            self.compact()
+        return len(expired)
+
+    def compact(self):
+        """Rewrite log with next id and live posts only."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps({"NEXT_ID": self.next_id}) + "\n")
+            for post in self.posts.values():
+                f.write(json.dumps(post) + "\n")
+        os.replace(tmp_path, self.path)
+        self.lines = len(self.posts) + 1
+
+
 class Discordgram:
     """Discordgram utility functions."""
 
@@ -69,6 +196,28 @@ class Discordgram:
         """Init."""
         self.bot = bot
         self.settings = dataIO.load_json(JSON)
+        self.stores = {}
+
+    def server_store(self, server):
+        """Post store of server, migrated from settings on first use."""
+        store = self.stores.get(server.id)
+        if store is None:
+            server_settings = self.settings[server.id]
+            store = ServerPostStore(
+                server.id, server_settings.get("NEXT_ID", 0))
+            legacy = server_settings.pop("MESSAGES", None)
+            if legacy:
+                if not store.exists:
+                    store.append(legacy)
+                self.save_next_id(server, store)
+            store.expire(server_settings.get("RETENTION_DAYS"))
+            self.stores[server.id] = store
+        return store
+
+    def save_next_id(self, server, store):
+        """Persist next id of migrated posts."""
+        self.settings[server.id]["NEXT_ID"] = store.next_id
+        dataIO.save_json(JSON, self.settings)
 
     @checks.mod_or_permissions()
     @commands.group(pass_context=True, aliases=['sdg'])
@@ -87,7 +236,7 @@ class Discordgram:
         server = ctx.message.server
         channel = ctx.message.channel
         if server.id not in self.settings:
-            self.settings[server.id] = SERVER_DEFAULTS
+            self.settings[server.id] = dict(SERVER_DEFAULTS)
         channelid = self.settings[server.id]["CHANNEL"]
         if channelid is not None:
             previous_channel = self.bot.get_channel(channelid)
@@ -101,6 +250,24 @@ class Discordgram:
                 "Discordgram channel set to {}.".format(channel.mention))
         dataIO.save_json(JSON, self.settings)
 
+    @setdiscordgram.command(name="retention", pass_context=True)
+    async def setdiscordgram_retention(self, ctx, days: int):
+        """Set days to keep Discordgram posts for replies.
+
+        0 keeps posts until there are more than the maximum.
+        """
+        server = ctx.message.server
+        if server.id not in self.settings:
+            self.settings[server.id] = dict(SERVER_DEFAULTS)
+        # load first: loading expires posts with the previous retention
+        store = self.server_store(server)
+        self.settings[server.id]["RETENTION_DAYS"] = max(days, 0)
+        dataIO.save_json(JSON, self.settings)
+        expired = store.expire(self.settings[server.id]["RETENTION_DAYS"])
+        await self.bot.say(
+            "Discordgram posts are kept for {} days. "
+            "Removed {} expired posts.".format(max(days, 0), expired))
+
     async def on_message(self, message):
         """Monitor activity if messages posted in Discordgram channel."""
         server = message.server
@@ -124,7 +291,8 @@ class Discordgram:
             #         author.mention))
             return
 
-        dgm_id = len(self.settings[server.id]["MESSAGES"])
+        store = self.server_store(server)
+        dgm_id = store.reserve_id()
 
         footer_text = (
             ":: Type `!dgr {} <reply message>` "
@@ -135,8 +303,8 @@ class Discordgram:
         bot_msg = await self.bot.send_message(channel, footer_text)
 
         dgm = DGMessage(message, dgm_id, bot_msg)
-        self.settings[server.id]["MESSAGES"].append(dgm.data)
-        dataIO.save_json(JSON, self.settings)
+        store.append([dgm.data])
+        store.expire(self.settings[server.id].get("RETENTION_DAYS"))
 
         # await self.bot.send_message(channel, embed=em)
         # await self.bot.delete_message(message)
@@ -160,11 +328,10 @@ class Discordgram:
             return
 
         id = int(id)
-        messages = self.settings[server.id]["MESSAGES"]
-        if id >= len(messages):
+        message = self.server_store(server).get(id)
+        if message is None:
             await self.bot.say("That is not a valid Discordgram id.")
             return
-        message = messages[id]
         channel_id = self.settings[server.id]["CHANNEL"]
         channel = self.bot.get_channel(channel_id)
 
@@ -189,11 +356,34 @@ class Discordgram:
             prev_content[1].rstrip())
         await self.bot.edit_message(bot_msg, new_content=content)
 
+    async def on_message_delete(self, message):
+        """Remove post and its reply thread when an image is deleted."""
+        server = message.server
+        if server is None:
+            return
+        if server.id not in self.settings:
+            return
+        if message.channel.id != self.settings[server.id]["CHANNEL"]:
+            return
+        store = self.server_store(server)
+        post = store.get_by_message_id(message.id)
+        if post is None:
+            return
+        store.delete(post["ID"])
+        try:
+            bot_msg = await self.bot.get_message(
+                message.channel, post["BOT_MESSAGE_ID"])
+            await self.bot.delete_message(bot_msg)
+        except discord.HTTPException:
+            pass
+
 
 def check_folder():
     """Check folder."""
     if not os.path.exists(PATH):
         os.makedirs(PATH)
+    if not os.path.exists(POSTS_PATH):
+        os.makedirs(POSTS_PATH)
 
 
 def check_file():
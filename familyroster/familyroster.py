@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2017 SML
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import asyncio
+import datetime as dt
+import json
+import logging
+import os
+import time
+from types import MappingProxyType
+
+import aiohttp
+from __main__ import send_cmd_help
+from cogs.utils import checks
+from cogs.utils.chat_formatting import box
+from cogs.utils.dataIO import dataIO
+from discord.ext import commands
+
+PATH = os.path.join("data", "familyroster")
+JSON = os.path.join(PATH, "settings.json")
+SNAPSHOT_JSON = os.path.join(PATH, "snapshot.json")
+
+# seconds between roster refreshes
+UPDATE_INTERVAL = 300
+# snapshots older than this many refresh intervals are not served
+MAX_AGE_INTERVALS = 3
+# number of clans fetched at the same time
+CONCURRENCY = 5
+API_TIMEOUT = 30
+
+logger = logging.getLogger("red.familyroster")
+
+PROVIDERS = {
+    'official': 'https://api.clashroyale.com/v1/clans/%23{}',
+    'cr-api': 'http://api.cr-api.com/clan/{}',
+}
+
+
+def clean_tag(tag):
+    """clean up tag."""
+    if tag is None:
+        return None
+    return tag.strip().lstrip('#').upper()
+
+
+def clan_member_list(clan):
+    """Member list of a clan from either provider."""
+    return clan.get('memberList') or clan.get('members') or []
+
+
+class Snapshot:
+    """Immutable, indexed view of all family clans at one point in time.
+
+    Clans are stored as returned by the API provider. Use the model
+    methods to get copies which can be modified. fetched has the fetch
+    time of each clan tag; timestamp is the oldest of them.
+    """
+
+    def __init__(self, version, timestamp, provider, clans, fetched=None):
+        self.version = version
+        self.provider = provider
+        clans_by_tag = {}
+        members_by_tag = {}
+        members_by_clan = {}
+        members_by_name = {}
+        for clan in clans:
+            clan_tag = clean_tag(clan.get('tag'))
+            clans_by_tag[clan_tag] = clan
+            members = []
+            for member in clan_member_list(clan):
+                member = MappingProxyType(dict(member, tag=clean_tag(member.get('tag')), clan_tag=clan_tag))
+                members_by_tag[member['tag']] = member
+                members_by_name.setdefault(member.get('name', '').lower(), []).append(member)
+                members.append(member)
+            members_by_clan[clan_tag] = tuple(members)
+        self.clans_by_tag = MappingProxyType(clans_by_tag)
+        self.members_by_tag = MappingProxyType(members_by_tag)
+        self.members_by_clan = MappingProxyType(members_by_clan)
+        self.members_by_name = MappingProxyType({k: tuple(v) for k, v in members_by_name.items()})
+        fetched = fetched or {}
+        self.fetched = MappingProxyType({
+            tag: fetched.get(tag, timestamp) for tag in clans_by_tag})
+        self.timestamp = min(self.fetched.values(), default=timestamp)
+
+    @property
+    def datetime(self):
+        return dt.datetime.utcfromtimestamp(self.timestamp)
+
+    @property
+    def member_count(self):
+        return len(self.members_by_tag)
+
+    def has_clans(self, tags):
+        return all(clean_tag(tag) in self.clans_by_tag for tag in tags)
+
+    def clan(self, tag):
+        return self.clans_by_tag.get(clean_tag(tag))
+
+    def member(self, tag):
+        return self.members_by_tag.get(clean_tag(tag))
+
+    def members_named(self, name):
+        return self.members_by_name.get(name.lower(), ())
+
+    def clan_models(self, tags):
+        """Copies of clan dicts, in the order of tags."""
+        return [json.loads(json.dumps(self.clans_by_tag[clean_tag(tag)])) for tag in tags]
+
+    def member_models(self, tags):
+        """Copies of member dicts of clans, with clan dict under 'clan'."""
+        members = []
+        for clan in self.clan_models(tags):
+            for member in clan_member_list(clan):
+                member['tag'] = clean_tag(member.get('tag'))
+                member['clan'] = clan
+                members.append(member)
+        return members
+
+
+class FamilyRoster:
+    """Family roster snapshot service.
+
+    Fetches all family clans once per interval and publishes a Snapshot.
+    Other cogs read the snapshot instead of calling the API:
+
+    roster = self.bot.get_cog("FamilyRoster")
+    if roster is not None:
+        members = roster.member_models(tags, provider='official')
+        if members is not None:
+            ...
+
+    member_models and clan_models return None when the snapshot
+    does not include all tags or comes from a different provider.
+    """
+
+    def __init__(self, bot):
+        """Init."""
+        self.bot = bot
+        self.settings = dataIO.load_json(JSON)
+        self.snapshot = self.load_snapshot()
+        self.semaphore = asyncio.Semaphore(CONCURRENCY)
+        self.task = bot.loop.create_task(self.loop_task())
+
+    def __unload(self):
+        self.task.cancel()
+
+    def save(self):
+        dataIO.save_json(JSON, self.settings)
+
+    @property
+    def tags(self):
+        return self.settings.get("tags", [])
+
+    @property
+    def provider(self):
+        return self.settings.get("provider", "official")
+
+    @property
+    def interval(self):
+        return int(self.settings.get("interval", UPDATE_INTERVAL))
+
+    def load_snapshot(self):
+        """Last snapshot from disk so commands work before the first refresh."""
+        if not os.path.exists(SNAPSHOT_JSON):
+            return None
+        data = dataIO.load_json(SNAPSHOT_JSON)
+        try:
+            return Snapshot(
+                0, data["timestamp"], data["provider"], data["clans"],
+                fetched=data.get("fetched"))
+        except KeyError:
+            return None
+
+    @property
+    def max_age(self):
+        return self.interval * MAX_AGE_INTERVALS
+
+    def usable_snapshot(self, tags, provider=None, max_age=None):
+        """Current snapshot if it has all tags from provider, else None.
+
+        Snapshots older than max_age seconds, by default MAX_AGE_INTERVALS
+        refresh intervals, are not used so that callers fetch live data
+        while refreshes are failing.
+        """
+        snapshot = self.snapshot
+        if snapshot is None or not snapshot.has_clans(tags):
+            return None
+        if provider is not None and snapshot.provider != provider:
+            return None
+        if max_age is None:
+            max_age = self.max_age
+        if time.time() - snapshot.timestamp > max_age:
+            return None
+        return snapshot
+
+    def clan_models(self, tags, provider=None, max_age=None):
+        snapshot = self.usable_snapshot(tags, provider=provider, max_age=max_age)
+        return snapshot.clan_models(tags) if snapshot is not None else None
+
+    def member_models(self, tags, provider=None, max_age=None):
+        snapshot = self.usable_snapshot(tags, provider=provider, max_age=max_age)
+        return snapshot.member_models(tags) if snapshot is not None else None
+
+    async def loop_task(self):
+        await self.bot.wait_until_ready()
+        while self == self.bot.get_cog("FamilyRoster"):
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # keep looping: the next interval may succeed
+                logger.exception("Failed to refresh family roster.")
+            await asyncio.sleep(self.interval)
+
+    async def fetch_clan(self, session, tag):
+        url = PROVIDERS[self.provider].format(tag)
+        if self.provider == 'official':
+            headers = {'Authorization': 'Bearer {}'.format(self.settings.get("auth"))}
+        else:
+            headers = {'auth': self.settings.get("auth")}
+        try:
+            async with self.semaphore:
+                async with session.get(url, headers=headers, timeout=API_TIMEOUT) as resp:
+                    if resp.status != 200:
+                        return None
+                    return await resp.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError, json.JSONDecodeError):
+            return None
+
+    async def refresh(self):
+        """Fetch all clans and publish a new snapshot.
+
+        Clans which fail to load keep their data from the previous snapshot
+        with its fetch time, until that is older than max_age.
+        Return number of clans fetched.
+        """
+        tags = [clean_tag(t) for t in self.tags]
+        if not tags or not self.settings.get("auth"):
+            return 0
+        async with aiohttp.ClientSession() as session:
+            results = await asyncio.gather(*[self.fetch_clan(session, tag) for tag in tags])
+
+        previous = self.snapshot
+        if previous is not None and previous.provider != self.provider:
+            previous = None
+        now = time.time()
+        clans = []
+        fetched = {}
+        for tag, clan in zip(tags, results):
+            if clan is not None:
+                fetched[tag] = now
+            elif previous is not None and previous.clan(tag) is not None:
+                if now - previous.fetched[tag] > self.max_age:
+                    continue
+                clan = previous.clan(tag)
+                fetched[tag] = previous.fetched[tag]
+            if clan is not None:
+                clans.append(clan)
+        if now not in fetched.values():
+            return 0
+
+        version = self.snapshot.version + 1 if self.snapshot is not None else 1
+        self.snapshot = Snapshot(version, now, self.provider, clans, fetched=fetched)
+        dataIO.save_json(SNAPSHOT_JSON, {
+            "timestamp": self.snapshot.timestamp,
+            "provider": self.provider,
+            "clans": clans,
+            "fetched": fetched
+        })
+        return sum(1 for t in fetched.values() if t == now)
+
+    @checks.mod_or_permissions()
+    @commands.group(pass_context=True)
+    async def familyrosterset(self, ctx):
+        """Family roster settings."""
+        if ctx.invoked_subcommand is None:
+            await send_cmd_help(ctx)
+
+    @familyrosterset.command(name="clans", pass_context=True)
+    async def familyrosterset_clans(self, ctx, *tags):
+        """Set family clan tags."""
+        self.settings["tags"] = [clean_tag(t) for t in tags]
+        self.save()
+        await self.bot.say("Family clans: {}".format(", ".join(self.tags)))
+
+    @familyrosterset.command(name="auth", pass_context=True)
+    async def familyrosterset_auth(self, ctx, token):
+        """Set API token."""
+        self.settings["auth"] = token
+        self.save()
+        await self.bot.delete_message(ctx.message)
+        await self.bot.say("API token saved.")
+
+    @familyrosterset.command(name="provider", pass_context=True)
+    async def familyrosterset_provider(self, ctx, provider):
+        """Set API provider: official or cr-api."""
+        if provider not in PROVIDERS:
+            await self.bot.say("Provider must be one of: {}".format(", ".join(PROVIDERS)))
+            return
+        self.settings["provider"] = provider
+        self.save()
+        await self.bot.say("API provider set to {}.".format(provider))
+
+    @familyrosterset.command(name="interval", pass_context=True)
+    async def familyrosterset_interval(self, ctx, seconds: int):
+        """Set refresh interval in seconds."""
+        self.settings["interval"] = max(60, seconds)
+        self.save()
+        await self.bot.say("Refresh interval set to {} seconds.".format(self.interval))
+
+    @commands.group(pass_context=True)
+    async def familyroster(self, ctx):
+        """Family roster."""
+        if ctx.invoked_subcommand is None:
+            await send_cmd_help(ctx)
+
+    @familyroster.command(name="status", pass_context=True)
+    async def familyroster_status(self, ctx):
+        """Snapshot status."""
+        snapshot = self.snapshot
+        if snapshot is None:
+            await self.bot.say("No snapshot yet.")
+            return
+        out = [
+            "Version: {}".format(snapshot.version),
+            "Updated: {:.0f}s ago{}".format(
+                time.time() - snapshot.timestamp,
+                " (stale)" if time.time() - snapshot.timestamp > self.max_age else ""),
+            "Provider: {}".format(snapshot.provider),
+            "Clans: {} / {}".format(len(snapshot.clans_by_tag), len(self.tags)),
+            "Members: {:,}".format(snapshot.member_count),
+        ]
+        await self.bot.say(box('\n'.join(out)))
+
+    @checks.mod_or_permissions()
+    @familyroster.command(name="refresh", pass_context=True)
+    async def familyroster_refresh(self, ctx):
+        """Refresh snapshot now."""
+        await self.bot.type()
+        fetched = await self.refresh()
+        await self.bot.say("Fetched {} / {} clans.".format(fetched, len(self.tags)))
+
+
+def check_folder():
+    """Check folder."""
+    os.makedirs(PATH, exist_ok=True)
+
+
+def check_file():
+    """Check files."""
+    if not dataIO.is_valid_json(JSON):
+        dataIO.save_json(JSON, {})
+
+
+def setup(bot):
+    """Setup."""
+    check_folder()
+    check_file()
+    n = FamilyRoster(bot)
+    bot.add_cog(n)
@@ -25,6 +25,7 @@ DEALINGS IN THE SOFTWARE.
 """
 
 import random
+from collections import OrderedDict
 
 import discord
 from discord import Message
@@ -43,6 +44,45 @@ try:
 except ImportError:
     raise ImportError("Please install the pyfiglet package.") from None
 
+DEFAULT_FONT = 'slant'
+DEFAULT_WIDTH = 80
+RENDER_CACHE_SIZE = 256
+
+
+class FontRegistry:
+    """Figlet renderers parsed once per font, and recently rendered text."""
+
+    def __init__(self, width=DEFAULT_WIDTH):
+        """Init."""
+        self.width = width
+        self.fonts = FigletFont.getFonts()
+        self.renderers = {}
+        self.rendered = OrderedDict()
+
+    def random_font(self):
+        """Random font name."""
+        return random.choice(self.fonts)
+
+    def renderer(self, font):
+        """Figlet renderer for font, raise FontNotFound if unknown."""
+        f = self.renderers.get(font)
+        if f is None:
+            f = Figlet(font=font, width=self.width)
+            self.renderers[font] = f
+        return f
+
+    def render(self, text, font):
+        """Render text with font."""
+        key = (text, font, self.width)
+        if key in self.rendered:
+            self.rendered.move_to_end(key)
+            return self.rendered[key]
+        out = self.renderer(font).renderText(text)
+        self.rendered[key] = out
+        while len(self.rendered) > RENDER_CACHE_SIZE:
+            self.rendered.popitem(last=False)
+        return out
+
 
 class FigletCog:
     """Ascii art generator."""
@@ -50,13 +90,13 @@ class FigletCog:
     def __init__(self, bot):
         """Init."""
         self.bot = bot
-
+        self.registry = FontRegistry()
 
     @commands.command(pass_context=True, no_pm=True)
     async def figletfonts(self, ctx: Context):
         """List all fonts."""
         await self.bot.say("List of supported fonts:")
-        out = FigletFont.getFonts()
+        out = self.registry.fonts
         for page in pagify(', '.join(out), shorten_by=24):
             await self.bot.say(box(page))
 
@@ -64,22 +104,23 @@ class FigletCog:
     async def figlet(self, ctx: Context, text: str, font=None):
         """Convert text to ascii art."""
         if font is None:
-            font = 'slant'
+            font = DEFAULT_FONT
         if font == 'random':
-            fonts = FigletFont.getFonts()
-            font = random.choice(fonts)
+            font = self.registry.random_font()
 
-        f = Figlet(font=font)
-        out = f.renderText(text)
+        try:
+            out = self.registry.render(text, font)
+        except FontNotFound:
+            await self.bot.say("Font not found.")
+            return
         for page in pagify(out, shorten_by=24):
             await self.bot.say(box(page))
 
     @commands.command(pass_context=True, no_pm=True)
     async def figletrandom(self, ctx: Context, text: str):
         """Convert text to ascii art using random font."""
-        font = random.choice(FigletFont.getFonts())
-        f = Figlet(font=font)
-        out = f.renderText(text)
+        font = self.registry.random_font()
+        out = self.registry.render(text, font)
         for page in pagify(out, shorten_by=24):
             await self.bot.say(box(page))
         await self.bot.say("Font: {}".format(font))
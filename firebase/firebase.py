@@ -27,9 +27,11 @@ DEALINGS IN THE SOFTWARE.
 
 import os
 import io
+import json
 import datetime as dt
 import asyncio
 import discord
+from concurrent.futures import ThreadPoolExecutor
 
 from urllib.parse import urljoin
 import pyrebase
@@ -42,6 +44,7 @@ from discord.ext.commands import Command
 from discord.ext.commands import Context
 
 from cogs.utils import checks
+from cogs.utils.chat_formatting import box
 
 from __main__ import send_cmd_help
 
@@ -52,6 +55,7 @@ from cogs.utils.dataIO import dataIO
 PATH = os.path.join('data', 'firebase')
 JSON = os.path.join(PATH, 'settings.json')
 SERVICE_KEY_JSON = os.path.join(PATH, "service_key.json")
+JOURNAL = os.path.join(PATH, "journal.ndjson")
 APP_NAME = "Discord"
 
 REQUIRED_SETTINGS = [
@@ -64,6 +68,160 @@ REQUIRED_SETTINGS = [
 
 HELP_SETTINGS = 'Please set all settings.'
 
+# write buffered messages after this many seconds or this many messages
+FLUSH_INTERVAL = 0.5
+FLUSH_SIZE = 100
+# max paths per update when replaying the journal
+JOURNAL_CHUNK = 500
+# seconds between retries while Firebase is unreachable
+MIN_BACKOFF = 1
+MAX_BACKOFF = 300
+
+
+class FirebaseWriter:
+    """Buffered multi-path writer.
+
+    Values are keyed by database path and written with one update per
+    batch from a single worker thread. While Firebase is unreachable
+    batches are appended to a local journal, which is replayed with
+    exponential backoff.
+    """
+
+    def __init__(self, loop, database):
+        self.loop = loop
+        self.database = database
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.lock = asyncio.Lock()
+        self.buffer = {}
+        self.handle = None
+        self.backoff = 0
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self.journaled = 0
+        if os.path.exists(JOURNAL):
+            self.schedule(MIN_BACKOFF)
+
+    def put(self, path, value):
+        self.buffer[path] = value
+        if len(self.buffer) < FLUSH_SIZE:
+            if self.handle is None:
+                self.schedule(FLUSH_INTERVAL)
+        elif self.backoff:
+            # keep the retry delay, move full buffers to the journal
+            self.loop.create_task(self.spill())
+        else:
+            self.schedule(0)
+
+    def schedule(self, delay):
+        if self.handle is not None:
+            self.handle.cancel()
+        self.handle = self.loop.call_later(
+            delay, lambda: self.loop.create_task(self.flush()))
+
+    def close(self):
+        """Keep unwritten values in the journal for next load."""
+        if self.handle is not None:
+            self.handle.cancel()
+        if self.buffer:
+            self.append_journal(self.buffer)
+            self.buffer = {}
+        self.executor.shutdown(wait=False)
+
+    def append_journal(self, batch):
+        with open(JOURNAL, 'a') as f:
+            f.write(json.dumps(batch) + '\n')
+        self.journaled += len(batch)
+
+    def read_journal(self):
+        batch = {}
+        with open(JOURNAL) as f:
+            for line in f:
+                try:
+                    batch.update(json.loads(line))
+                except ValueError:
+                    pass
+        return batch
+
+    def rewrite_journal(self, batch):
+        """Replace journal with values not written yet."""
+        tmp = JOURNAL + '.tmp'
+        with open(tmp, 'w') as f:
+            f.write(json.dumps(batch) + '\n')
+        os.replace(tmp, JOURNAL)
+
+    async def run(self, func, *args):
+        """Run journal I/O or update in the worker thread, in order."""
+        return await self.loop.run_in_executor(self.executor, func, *args)
+
+    def update(self, batch):
+        self.database().update(batch)
+
+    async def write(self, batch):
+        await self.run(self.update, batch)
+        self.batches += 1
+        self.written += len(batch)
+
+    async def spill(self):
+        """Move buffer to the journal while waiting to retry."""
+        async with self.lock:
+            batch, self.buffer = self.buffer, {}
+            if batch:
+                await self.run(self.append_journal, batch)
+
+    async def flush(self):
+        async with self.lock:
+            self.handle = None
+            batch, self.buffer = self.buffer, {}
+            if os.path.exists(JOURNAL):
+                # keep write order: new values go after the journal
+                if batch:
+                    await self.run(self.append_journal, batch)
+                await self.replay_journal()
+                return
+            if not batch:
+                return
+            try:
+                await self.write(batch)
+            except Exception:
+                self.failed += 1
+                await self.run(self.append_journal, batch)
+                self.retry()
+            else:
+                self.backoff = 0
+
+    async def replay_journal(self):
+        """Write journal in chunks, keeping only unwritten values on failure."""
+        batch = await self.run(self.read_journal)
+        paths = list(batch)
+        for i in range(0, len(paths), JOURNAL_CHUNK):
+            try:
+                await self.write({p: batch[p] for p in paths[i:i + JOURNAL_CHUNK]})
+            except Exception:
+                self.failed += 1
+                if i > 0:
+                    await self.run(
+                        self.rewrite_journal, {p: batch[p] for p in paths[i:]})
+                self.retry()
+                return
+        await self.run(os.remove, JOURNAL)
+        self.backoff = 0
+
+    def retry(self):
+        self.backoff = min(max(self.backoff * 2, MIN_BACKOFF), MAX_BACKOFF)
+        self.schedule(self.backoff)
+
+    def stats(self):
+        return [
+            ("buffered", len(self.buffer)),
+            ("batches", self.batches),
+            ("written", self.written),
+            ("failed", self.failed),
+            ("journaled", self.journaled),
+            ("journal", os.path.exists(JOURNAL)),
+            ("backoff", self.backoff),
+        ]
+
 
 class Firebase:
     """Send activity of Discord using Google Analytics."""
@@ -73,6 +231,11 @@ class Firebase:
         self.bot = bot
         self.settings = dataIO.load_json(JSON)
         self._fbapp = None
+        self._db = None
+        self.writer = FirebaseWriter(bot.loop, self.database)
+
+    def __unload(self):
+        self.writer.close()
 
     @property
     def fbapp(self):
@@ -90,6 +253,16 @@ class Firebase:
             self._fbapp = pyrebase.initialize_app(config)
         return self._fbapp
 
+    def database(self):
+        """Database handle, created once."""
+        if self._db is None:
+            self._db = self.fbapp.database()
+        return self._db
+
+    def push_path(self, *path):
+        """Database path with a new push key."""
+        return '/'.join(path + (self.database().generate_key(),))
+
     def check_settings(self):
         """Check all settings set."""
         for setting in REQUIRED_SETTINGS:
@@ -231,6 +404,11 @@ class Firebase:
                 self.settings["SERVERS"][server.id]))
         dataIO.save_json(JSON, self.settings)
 
+    @firebase.command(name="writer", pass_context=True)
+    async def firebase_writer(self, ctx):
+        """Show writer statistics."""
+        out = ['{:<10} {}'.format(k, v) for k, v in self.writer.stats()]
+        await self.bot.say(box('\n'.join(out)))
 
     @firebase.command(name="data", pass_context=True)
     async def firebase_data(self, ctx, *, msg):
@@ -240,8 +418,7 @@ class Firebase:
             "author_id": author.id,
             "message": msg
         }
-        db = self.fbapp.database()
-        db.child("users").push(data)
+        self.writer.put(self.push_path("users"), data)
 
     async def on_message(self, msg: Message):
         """Track on message."""
@@ -267,8 +444,7 @@ class Firebase:
             "message": msg.content,
             "datetime": dt.datetime.utcnow().isoformat()
         }
-        db = self.fbapp.database()
-        db.child("servers").child(server.id).push(data)
+        self.writer.put(self.push_path("servers", server.id), data)
 
 
 def check_folder():
@@ -25,11 +25,16 @@ DEALINGS IN THE SOFTWARE.
 """
 
 
+import asyncio
+import logging
 import os
+import random
 import re
 import uuid
-
 from collections import OrderedDict
+from urllib.parse import urlencode
+
+import aiohttp
 
 from discord import Message
 from discord import Member
@@ -41,11 +46,10 @@ from discord.ext.commands import Command
 from discord.ext.commands import Context
 
 from cogs.utils import checks
+from cogs.utils.chat_formatting import box
 
 from __main__ import send_cmd_help
 
-import google_measurement_protocol as gmp
-
 from cogs.utils.dataIO import dataIO
 
 PATH = os.path.join('data', 'ga')
@@ -53,6 +57,102 @@ JSON = os.path.join(PATH, 'settings.json')
 
 ALPHANUM_PROG = re.compile('\W')
 
+BATCH_URL = 'https://www.google-analytics.com/batch'
+# Measurement Protocol limits: 20 hits and 16K bytes per batch
+BATCH_SIZE = 20
+BATCH_BYTES = 16 * 1024
+# hits waiting to be sent; more are dropped
+QUEUE_SIZE = 10000
+# seconds to wait for more hits before sending a partial batch
+BATCH_WAIT = 1
+API_TIMEOUT = 10
+
+logger = logging.getLogger("red.ga")
+
+
+class HitSender:
+    """Background Measurement Protocol sender.
+
+    Hits are queued without blocking and posted to the /batch endpoint
+    by a single worker, up to BATCH_SIZE hits per request.
+    """
+
+    def __init__(self, loop, queue_size=QUEUE_SIZE):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.sent = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        # hit which did not fit in the previous batch
+        self.pending = None
+        self.task = loop.create_task(self.worker())
+
+    def put(self, hit):
+        try:
+            self.queue.put_nowait(urlencode(hit))
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def stop(self):
+        self.task.cancel()
+
+    async def next_batch(self):
+        if self.pending is not None:
+            batch, self.pending = [self.pending], None
+        else:
+            batch = [await self.queue.get()]
+        size = len(batch[0])
+        deadline = self.loop.time() + BATCH_WAIT
+        while len(batch) < BATCH_SIZE:
+            timeout = deadline - self.loop.time()
+            if timeout <= 0:
+                break
+            try:
+                hit = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if size + len(hit) + 1 > BATCH_BYTES:
+                # start next batch with it, keeping hit order
+                self.pending = hit
+                break
+            batch.append(hit)
+            size += len(hit) + 1
+        return batch
+
+    async def worker(self):
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    await self.send_batch(session)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Failed to send hits.")
+
+    async def send_batch(self, session):
+        batch = await self.next_batch()
+        try:
+            async with session.post(
+                    BATCH_URL, data='\n'.join(batch), timeout=API_TIMEOUT) as resp:
+                ok = resp.status == 200
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            ok = False
+        self.batches += 1
+        if ok:
+            self.sent += len(batch)
+        else:
+            self.failed += len(batch)
+
+    def stats(self):
+        return OrderedDict([
+            ("queued", self.queue.qsize() + (self.pending is not None)),
+            ("sent", self.sent),
+            ("batches", self.batches),
+            ("failed", self.failed),
+            ("dropped", self.dropped),
+        ])
+
 
 class GA:
     """Send activity of Discord using Google Analytics."""
@@ -61,6 +161,23 @@ class GA:
         """Init."""
         self.bot = bot
         self.settings = dataIO.load_json(JSON)
+        self.sender = HitSender(bot.loop)
+        self.sampled_out = 0
+
+    def __unload(self):
+        self.sender.stop()
+
+    @property
+    def sample_rate(self):
+        """Fraction of messages and commands reported."""
+        return self.settings.get("SAMPLE_RATE", 1.0)
+
+    def sampled(self):
+        """Decide if an activity is reported."""
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            return True
+        self.sampled_out += 1
+        return False
 
     @checks.serverowner_or_permissions(manage_server=True)
     @commands.group(pass_context=True)
@@ -77,6 +194,25 @@ class GA:
         await self.bot.say("Google Analaytics TID saved.")
         await self.bot.delete_message(ctx.message)
 
+    @setga.command(name="sample", pass_context=True)
+    async def setga_sample(self, ctx, rate: float):
+        """Set sampling rate (0-1) for busy servers.
+
+        Only this fraction of messages and commands are reported.
+        """
+        self.settings["SAMPLE_RATE"] = min(max(rate, 0.0), 1.0)
+        dataIO.save_json(JSON, self.settings)
+        await self.bot.say("Sampling rate set to {:.0%}.".format(self.sample_rate))
+
+    @setga.command(name="stats", pass_context=True)
+    async def setga_stats(self, ctx):
+        """Show sender statistics."""
+        stats = self.sender.stats()
+        stats["sampled out"] = self.sampled_out
+        stats["sample rate"] = self.sample_rate
+        out = ['{:<12} {}'.format(k, v) for k, v in stats.items()]
+        await self.bot.say(box('\n'.join(out)))
+
     def get_member_uuid(self, member: Member):
         """Get member uuid."""
         client_id = uuid.uuid4()
@@ -109,6 +245,8 @@ class GA:
             return
         if "TID" not in self.settings:
             return
+        if not self.sampled():
+            return
 
         # client_id = self.get_member_uuid(author)
         # use new uuid for pageviews so they will be logged as counters
@@ -135,36 +273,47 @@ class GA:
             return
         if "TID" not in self.settings:
             return
+        if not self.sampled():
+            return
 
         # client_id = self.get_member_uuid(author)
         client_id = uuid.uuid4()
         self.log_command(client_id, server, channel, author, command)
 
+    def gmp_report(self, client_id, hit):
+        """Queue Measurement Protocol hit."""
+        hit.update({
+            'v': 1,
+            'tid': self.settings["TID"],
+            'cid': str(client_id),
+        })
+        self.sender.put(hit)
+
     def gmp_report_pageview(
             self, client_id,
             path=None, title=None):
         """Send GMP Pageview."""
-        tid = self.settings["TID"]
-        gmp.report(
-            tid,
-            client_id,
-            gmp.PageView(
-                path=path,
-                title=title))
+        hit = {'t': 'pageview'}
+        if path is not None:
+            hit['dp'] = path
+        if title is not None:
+            hit['dt'] = title
+        self.gmp_report(client_id, hit)
 
     def gmp_report_event(
             self, client_id,
             category, action, label=None, value=None):
         """Send GMP event."""
-        tid = self.settings["TID"]
-        gmp.report(
-            tid,
-            client_id,
-            gmp.Event(
-                category,
-                action,
-                label=label,
-                value=value))
+        hit = {
+            't': 'event',
+            'ec': category,
+            'ea': action
+        }
+        if label is not None:
+            hit['el'] = label
+        if value is not None:
+            hit['ev'] = value
+        self.gmp_report(client_id, hit)
 
     def log_channel(
             self, client_id,
@@ -24,12 +24,16 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import asyncio
 import io
 import os
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from urllib.parse import urlparse
 
 import aiohttp
+import numpy as np
 from PIL import Image
 from __main__ import send_cmd_help
 from cogs.utils.dataIO import dataIO
@@ -38,12 +42,164 @@ from discord.ext import commands
 PATH = os.path.join("data", "imgutil")
 JSON = os.path.join(PATH, "settings.json")
 
+WORKERS = 2
+# download limits
+MAX_IMAGE_BYTES = 8 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 10
+# decode limits
+MAX_IMAGE_PIXELS = 40 * 1000 * 1000
+MAX_DIMENSION = 2048
+TIMEOUT = 15
+# dark to light, as used by the ascii package
+ASCII_RAMP = ".,:;i1tfLCG08@"
+
+
+class ImageError(Exception):
+    pass
+
+
+class ImageTooLarge(ImageError):
+    pass
+
 
 def nested_dict():
     """Recursively nested defaultdict."""
     return defaultdict(nested_dict)
 
 
+def open_image(data, size=MAX_DIMENSION):
+    """Decode image bytes, reduced to fit within size x size.
+
+    The header is checked before any pixels are decoded, and JPEGs are
+    decoded directly at a reduced scale with draft().
+    """
+    try:
+        im = Image.open(io.BytesIO(data))
+    except (IOError, SyntaxError) as e:
+        raise ImageError("Cannot identify image.") from e
+    width, height = im.size
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ImageTooLarge(
+            "Image is {} x {} pixels.".format(width, height))
+    if max(width, height) > size:
+        im.draft('RGB', (size, size))
+        im.thumbnail((size, size))
+    return im
+
+
+def rotate_image(data, degree):
+    """Rotate image bytes counter-clockwise, return JPEG bytes."""
+    im = open_image(data)
+    if im.mode not in ('RGB', 'L'):
+        im = im.convert('RGB')
+    im = im.rotate(degree, expand=True)
+    with io.BytesIO() as f:
+        im.save(f, "JPEG")
+        return f.getvalue()
+
+
+def image_to_ascii(data, columns):
+    """Convert image bytes to ascii art columns characters wide."""
+    im = open_image(data, size=max(columns, 1) * 4)
+    rows = max(int(round(columns * im.size[1] / im.size[0])), 1)
+    im = im.convert('RGB').resize((columns, rows))
+    intensity = np.asarray(im, dtype=np.uint16).sum(axis=2)
+    precision = 255 * 3 / (len(ASCII_RAMP) - 1)
+    index = np.rint(intensity / precision).astype(np.intp)
+    chars = np.array(list(ASCII_RAMP))[index]
+    return "".join("".join(row) + "\n" for row in chars)
+
+
+class ImageWorker:
+    """Capped image downloads and transforms in worker processes."""
+
+    Error = ImageError
+
+    def __init__(self, loop):
+        """Init."""
+        self.loop = loop
+        self.session = aiohttp.ClientSession(loop=loop)
+        self.executor = None
+
+    def close(self):
+        """Close session and kill worker processes."""
+        self.session.close()
+        self.reset_executor()
+
+    def reset_executor(self):
+        """Kill worker processes, e.g. when one is stuck."""
+        if self.executor is None:
+            return
+        for process in list(self.executor._processes.values()):
+            process.terminate()
+        self.executor.shutdown(wait=False)
+        self.executor = None
+
+    async def fetch(self, url):
+        """Download url, aborting once it exceeds MAX_IMAGE_BYTES."""
+        chunks = []
+        total = 0
+        try:
+            with aiohttp.Timeout(DOWNLOAD_TIMEOUT):
+                async with self.session.get(url) as resp:
+                    if resp.status != 200:
+                        raise ImageError(
+                            "Download failed: HTTP {}.".format(resp.status))
+                    length = resp.headers.get('Content-Length')
+                    if length is not None and length.isdigit() \
+                            and int(length) > MAX_IMAGE_BYTES:
+                        raise ImageTooLarge(
+                            "Image is {} bytes.".format(length))
+                    while True:
+                        chunk = await resp.content.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        total += len(chunk)
+                        if total > MAX_IMAGE_BYTES:
+                            raise ImageTooLarge(
+                                "Image is over {} bytes.".format(
+                                    MAX_IMAGE_BYTES))
+                        chunks.append(chunk)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            raise ImageError("Download failed.") from e
+        return b"".join(chunks)
+
+    async def run(self, func, *args):
+        """Run transform in a worker process.
+
+        A job that times out kills the pool, which also stops other jobs
+        running in it.
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=WORKERS)
+        executor = self.executor
+        try:
+            return await asyncio.wait_for(
+                self.loop.run_in_executor(executor, func, *args),
+                TIMEOUT)
+        except (asyncio.TimeoutError, BrokenProcessPool) as e:
+            # a pool already replaced was reset by another job
+            if executor is not self.executor:
+                raise ImageError(
+                    "Image processing was interrupted by another image. "
+                    "Please try again.") from e
+            self.reset_executor()
+            raise ImageError("Image processing timed out.") from e
+        except (OSError, ValueError) as e:
+            raise ImageError("Cannot process image: {}".format(e)) from e
+
+    async def rotate(self, url, degree):
+        """Rotated image at url as JPEG bytes."""
+        data = await self.fetch(url)
+        return await self.run(rotate_image, data, degree)
+
+    async def ascii(self, url, columns):
+        """Image at url as ascii art."""
+        data = await self.fetch(url)
+        return await self.run(image_to_ascii, data, columns)
+
+
 class ImgUtil:
     """Image utility."""
 
@@ -52,6 +208,10 @@ class ImgUtil:
         self.bot = bot
         self.settings = nested_dict()
         self.settings.update(dataIO.load_json(JSON))
+        self.worker = ImageWorker(bot.loop)
+
+    def __unload(self):
+        self.worker.close()
 
     @commands.group(name="imgutil", aliases=["iu"], pass_context=True, no_pm=True)
     async def imgutil(self, ctx):
@@ -67,18 +227,21 @@ class ImgUtil:
         """
         a = urlparse(url)
         filename = os.path.basename(a.path)
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, timeout=10) as resp:
-                img = await resp.read()
-                im = Image.open(io.BytesIO(img))
-                im = im.rotate(float(degree), expand=True)
-
-                with io.BytesIO() as f:
-                    im.save(f, "JPEG")
-                    f.seek(0)
-                    message = await ctx.bot.send_file(
-                        ctx.message.channel, f,
-                        filename=filename, content="Rotated image:")
+        try:
+            degree = float(degree)
+        except ValueError:
+            await self.bot.say("Degree must be a number.")
+            return
+        try:
+            data = await self.worker.rotate(url, degree)
+        except ImageError as e:
+            await self.bot.say(str(e))
+            return
+
+        with io.BytesIO(data) as f:
+            await ctx.bot.send_file(
+                ctx.message.channel, f,
+                filename=filename, content="Rotated image:")
 
 
 def check_folder():
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2017 SML
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+
+from __main__ import send_cmd_help
+from cogs.utils import checks
+from cogs.utils.dataIO import dataIO
+from discord.ext import commands
+
+PATH = os.path.join("data", "kvstore")
+DB = os.path.join(PATH, "store.db")
+
+# seconds to wait for more changes before writing
+FLUSH_DELAY = 2
+
+logger = logging.getLogger("red.kvstore")
+
+
+class StoreClosed(RuntimeError):
+    """Store was closed, e.g. when the KVStore cog was reloaded."""
+    pass
+
+
+class Writer(threading.Thread):
+    """Background thread writing batches of changes to SQLite.
+
+    Each batch is committed in a single transaction so that a crash
+    leaves the database either before or after the batch.
+    """
+
+    def __init__(self, path):
+        super().__init__(daemon=True)
+        self.path = path
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.rows = 0
+        self.error = None
+
+    def put(self, batch):
+        self.queue.put(batch)
+
+    def stop(self):
+        self.queue.put(None)
+        self.join()
+
+    def run(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        stop = False
+        while not stop:
+            batch = self.queue.get()
+            if batch is None:
+                break
+            # coalesce batches which are already waiting
+            while True:
+                try:
+                    more = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if more is None:
+                    stop = True
+                    break
+                batch.update(more)
+            try:
+                self.write(conn, batch)
+            except sqlite3.Error as e:
+                self.error = e
+                logger.error(
+                    "Failed to write %d keys: %s", len(batch), e)
+        conn.close()
+
+    def write(self, conn, batch):
+        upserts = []
+        deletes = []
+        for (namespace, key), value in batch.items():
+            if value is None:
+                deletes.append((namespace, key))
+            else:
+                upserts.append((namespace, key, value))
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO kv (namespace, key, value) VALUES (?, ?, ?)', upserts)
+            conn.executemany(
+                'DELETE FROM kv WHERE namespace = ? AND key = ?', deletes)
+        self.batches += 1
+        self.rows += len(batch)
+
+
+class Namespace(MutableMapping):
+    """Dict-like view of one namespace in the store.
+
+    Assigning or deleting a top-level key schedules it for writing.
+    Nested values changed in place must be marked with mark(key).
+    """
+
+    def __init__(self, store, name, data):
+        self.store = store
+        self.name = name
+        self.data = data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+        self.mark(key)
+
+    def __delitem__(self, key):
+        del self.data[key]
+        self.mark(key)
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def mark(self, key):
+        """Schedule key for writing."""
+        self.store.mark(self.name, key)
+
+    def save(self):
+        """Schedule all keys for writing.
+
+        Compatible with dataIO.save_json usage, prefer mark(key).
+        """
+        for key in self.data:
+            self.mark(key)
+
+
+class Store:
+    """SQLite backed key-value store.
+
+    Values are JSON-serialized per top-level key. Changes are collected
+    on the event loop and written by a background thread after FLUSH_DELAY
+    seconds, so that frequent changes to the same key cost one write.
+    """
+
+    def __init__(self, loop, path=DB, flush_delay=FLUSH_DELAY):
+        self.loop = loop
+        self.path = path
+        self.flush_delay = flush_delay
+        self.namespaces = {}
+        self.dirty = set()
+        self.handle = None
+        self.closed = False
+
+        conn = sqlite3.connect(path)
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS kv ('
+                'namespace TEXT NOT NULL, '
+                'key TEXT NOT NULL, '
+                'value TEXT NOT NULL, '
+                'PRIMARY KEY (namespace, key))')
+        conn.close()
+
+        self.writer = Writer(path)
+        self.writer.start()
+
+    def namespace(self, name):
+        """Return Namespace by name, loading it from disk on first use."""
+        if name not in self.namespaces:
+            conn = sqlite3.connect(self.path)
+            rows = conn.execute('SELECT key, value FROM kv WHERE namespace = ?', (name,)).fetchall()
+            conn.close()
+            data = {key: json.loads(value) for key, value in rows}
+            self.namespaces[name] = Namespace(self, name, data)
+        return self.namespaces[name]
+
+    def check_open(self):
+        if self.closed:
+            raise StoreClosed(
+                "Store is closed. Get the namespace again from the KVStore cog.")
+
+    def mark(self, namespace, key):
+        self.check_open()
+        self.dirty.add((namespace, key))
+        if self.handle is None:
+            self.handle = self.loop.call_later(self.flush_delay, self.flush)
+
+    def flush(self):
+        """Serialize changed keys and send them to the writer thread."""
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        if not self.dirty:
+            return
+        self.check_open()
+        batch = {}
+        for namespace, key in self.dirty:
+            data = self.namespaces[namespace].data
+            if key in data:
+                batch[(namespace, key)] = json.dumps(data[key])
+            else:
+                batch[(namespace, key)] = None
+        self.dirty = set()
+        self.writer.put(batch)
+
+    def close(self):
+        """Write pending changes and stop writer thread.
+
+        Later changes raise StoreClosed instead of being silently lost.
+        """
+        if self.closed:
+            return
+        self.flush()
+        self.writer.stop()
+        self.closed = True
+        if self.writer.error is not None:
+            logger.error("Last write error before close: %s", self.writer.error)
+
+    def migrate_json(self, path, name):
+        """Import top-level keys of a JSON file into a namespace.
+
+        Existing keys in the namespace are overwritten.
+        Return number of keys imported.
+        """
+        data = dataIO.load_json(path)
+        namespace = self.namespace(name)
+        for key, value in data.items():
+            namespace[key] = value
+        self.flush()
+        return len(data)
+
+
+class KVStore:
+    """Key-value store for other cogs.
+
+    Usage from another cog:
+    store = self.bot.get_cog("KVStore")
+    if store is not None:
+        settings = store.namespace("mycog")
+        settings[server.id] = {...}
+
+    Namespaces are bound to the store instance. After KVStore is
+    reloaded, changes to an old namespace raise StoreClosed.
+    """
+
+    def __init__(self, bot):
+        """Init."""
+        self.bot = bot
+        self.store = Store(bot.loop)
+
+    def __unload(self):
+        self.store.close()
+
+    def namespace(self, name):
+        """Dict-like namespace of the store."""
+        return self.store.namespace(name)
+
+    @checks.is_owner()
+    @commands.group(pass_context=True)
+    async def kvstore(self, ctx):
+        """Key-value store."""
+        if ctx.invoked_subcommand is None:
+            await send_cmd_help(ctx)
+
+    @kvstore.command(name="migrate", pass_context=True)
+    async def kvstore_migrate(self, ctx, json_path, namespace):
+        """Import a JSON settings file into a namespace.
+
+        Example:
+        [p]kvstore migrate data/rolehist/settings.json rolehist
+        """
+        if not dataIO.is_valid_json(json_path):
+            await self.bot.say("Cannot read JSON from {}.".format(json_path))
+            return
+        count = self.store.migrate_json(json_path, namespace)
+        await self.bot.say("Imported {:,} keys into {}.".format(count, namespace))
+
+    @kvstore.command(name="flush", pass_context=True)
+    async def kvstore_flush(self, ctx):
+        """Write pending changes now."""
+        self.store.flush()
+        await self.bot.say("Flushed.")
+
+    @kvstore.command(name="stats", pass_context=True)
+    async def kvstore_stats(self, ctx):
+        """Store statistics."""
+        writer = self.store.writer
+        out = [
+            "Namespaces loaded: {}".format(', '.join(sorted(self.store.namespaces)) or '-'),
+            "Pending keys: {:,}".format(len(self.store.dirty)),
+            "Batches written: {:,}".format(writer.batches),
+            "Keys written: {:,}".format(writer.rows),
+        ]
+        if writer.error is not None:
+            out.append("Last error: {}".format(writer.error))
+        await self.bot.say('\n'.join(out))
+
+
+def check_folder():
+    """Check folder."""
+    os.makedirs(PATH, exist_ok=True)
+
+
+def setup(bot):
+    """Setup."""
+    check_folder()
+    n = KVStore(bot)
+    bot.add_cog(n)
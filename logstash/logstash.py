@@ -535,10 +535,14 @@ class Logstash:
             extra['roles'] = []
 
             roles = server.role_hierarchy
+            role_index = self.bot.get_cog("RoleIndex")
 
             # count number of members with a particular role
             for index, role in enumerate(roles):
-                count = sum([1 for m in server.members if role in m.roles])
+                if role_index is not None:
+                    count = role_index.count(server, role)
+                else:
+                    count = sum([1 for m in server.members if role in m.roles])
 
                 role_params = self.get_role_params(role)
                 role_params['count'] = count
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2017 SML
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+
+import asyncio
+import logging
+import re
+import time
+from collections import namedtuple
+
+from __main__ import send_cmd_help
+from cogs.utils import checks
+from cogs.utils.chat_formatting import box
+from cogs.utils.chat_formatting import pagify
+from discord.ext import commands
+
+logger = logging.getLogger("red.messagebus")
+
+QUEUE_SIZE = 1000
+# number of latency samples kept per sink
+LATENCY_SAMPLES = 1000
+
+EMOJI_P = re.compile('\<\:.+?\:\d+\>')
+UEMOJI_P = re.compile(u'['
+                      u'\U0001F300-\U0001F64F'
+                      u'\U0001F680-\U0001F6FF'
+                      u'\uD83C-\uDBFF\uDC00-\uDFFF'
+                      u'\u2600-\u26FF\u2700-\u27BF]{1,2}',
+                      re.UNICODE)
+
+MessageFeatures = namedtuple(
+    'MessageFeatures', [
+        'message',
+        'timestamp',
+        'server_id',
+        'server_name',
+        'channel_id',
+        'channel_name',
+        'is_private',
+        'author_id',
+        'author_name',
+        'author_display_name',
+        'author_bot',
+        'author_is_me',
+        'author_role_ids',
+        'author_role_names',
+        'content',
+        'content_lower',
+        'mention_ids',
+        'mention_names',
+        'role_mention_ids',
+        'mention_everyone',
+        'emojis',
+        'unicode_emojis',
+        'attachment_urls',
+    ])
+MessageFeatures.__doc__ = """Features of a message, computed once and shared by all sinks."""
+
+
+def message_features(message):
+    """Extract MessageFeatures from a message."""
+    server = message.server
+    channel = message.channel
+    author = message.author
+    is_private = channel is None or channel.is_private
+    roles = getattr(author, 'roles', [])
+    content = message.content
+    return MessageFeatures(
+        message=message,
+        timestamp=message.timestamp,
+        server_id=server.id if server is not None else None,
+        server_name=server.name if server is not None else None,
+        channel_id=channel.id if channel is not None else None,
+        channel_name=channel.name if not is_private else None,
+        is_private=is_private,
+        author_id=author.id,
+        author_name=author.name,
+        author_display_name=author.display_name,
+        author_bot=author.bot,
+        author_is_me=server is not None and author is server.me,
+        author_role_ids=tuple(r.id for r in roles),
+        author_role_names=tuple(r.name for r in roles),
+        content=content,
+        content_lower=content.lower(),
+        mention_ids=tuple(m.id for m in message.mentions),
+        mention_names=tuple(m.name for m in message.mentions),
+        role_mention_ids=tuple(r.id for r in message.role_mentions),
+        mention_everyone=message.mention_everyone,
+        emojis=tuple(EMOJI_P.findall(content)),
+        unicode_emojis=tuple(UEMOJI_P.findall(content)),
+        attachment_urls=tuple(a.get('url') for a in message.attachments),
+    )
+
+
+class Sink:
+    """Subscribed message handler with its own bounded queue."""
+
+    def __init__(self, bot, name, callback, queue_size=QUEUE_SIZE):
+        self.bot = bot
+        self.name = name
+        self.callback = callback
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.latencies = []
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.task = bot.loop.create_task(self.worker())
+
+    def put(self, features):
+        try:
+            self.queue.put_nowait(features)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def worker(self):
+        while True:
+            features = await self.queue.get()
+            start = time.perf_counter()
+            try:
+                result = self.callback(features)
+                if asyncio.iscoroutine(result):
+                    await result
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.errors += 1
+                logger.exception("Subscriber %s failed.", self.name)
+            self.processed += 1
+            self.latencies.append(time.perf_counter() - start)
+            if len(self.latencies) > LATENCY_SAMPLES:
+                del self.latencies[:len(self.latencies) - LATENCY_SAMPLES]
+
+    def stop(self):
+        self.task.cancel()
+
+    def percentile(self, p):
+        """Latency percentile in milliseconds."""
+        if not self.latencies:
+            return 0
+        values = sorted(self.latencies)
+        index = min(int(len(values) * p / 100), len(values) - 1)
+        return values[index] * 1000
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "queued": self.queue.qsize(),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class MessageBus:
+    """Shared message event bus.
+
+    Computes MessageFeatures once per message and dispatches them to subscribed cogs.
+    Each subscriber runs from its own bounded queue so a slow subscriber
+    does not delay the others.
+
+    Subscribe from another cog:
+    bus = self.bot.get_cog("MessageBus")
+    if bus is not None:
+        bus.subscribe("MyCog", self.on_message_features)
+
+    MessageBus dispatches message_bus_load and message_bus_unload events
+    so subscribers can also subscribe when it is loaded after them.
+    """
+
+    def __init__(self, bot):
+        """Init."""
+        self.bot = bot
+        self.sinks = {}
+
+    def __unload(self):
+        for sink in self.sinks.values():
+            sink.stop()
+        self.bot.dispatch('message_bus_unload', self)
+
+    def subscribe(self, name, callback, queue_size=QUEUE_SIZE):
+        """Subscribe callback to message features.
+
+        callback can be a function or a coroutine function taking MessageFeatures.
+        Subscribing again with the same name replaces the previous callback.
+        """
+        self.unsubscribe(name)
+        self.sinks[name] = Sink(self.bot, name, callback, queue_size=queue_size)
+
+    def unsubscribe(self, name):
+        """Remove subscriber."""
+        sink = self.sinks.pop(name, None)
+        if sink is not None:
+            sink.stop()
+
+    def is_subscribed(self, name):
+        return name in self.sinks
+
+    async def on_message(self, message):
+        """Extract features and dispatch to all sinks."""
+        if not self.sinks:
+            return
+        features = message_features(message)
+        for sink in self.sinks.values():
+            sink.put(features)
+
+    @checks.is_owner()
+    @commands.group(pass_context=True)
+    async def messagebus(self, ctx):
+        """Message bus."""
+        if ctx.invoked_subcommand is None:
+            await send_cmd_help(ctx)
+
+    @messagebus.command(name="stats", pass_context=True)
+    async def messagebus_stats(self, ctx):
+        """Per-subscriber latency (ms) and queue stats."""
+        if not self.sinks:
+            await self.bot.say("No subscribers.")
+            return
+        out = ['{:<20} {:>8} {:>6} {:>6} {:>6} {:>8} {:>8} {:>8}'.format(
+            'sink', 'done', 'drop', 'err', 'queue', 'p50', 'p95', 'p99')]
+        for sink in sorted(self.sinks.values(), key=lambda x: x.name):
+            out.append(
+                '{name:<20} {processed:>8,} {dropped:>6,} {errors:>6,} {queued:>6,} '
+                '{p50:>8.2f} {p95:>8.2f} {p99:>8.2f}'.format(**sink.stats()))
+        for page in pagify('\n'.join(out), shorten_by=24):
+            await self.bot.say(box(page))
+
+
+def setup(bot):
+    """Setup."""
+    n = MessageBus(bot)
+    bot.add_cog(n)
+    bot.dispatch('message_bus_load', n)
@@ -160,6 +160,9 @@ class MemberManagement:
         parser.add_argument(
             '-m', '--macro',
             help='Macro name. Create using [p]mmset')
+        parser.add_argument(
+            '--dm',
+            help='Send this message as DM to members found')
         return parser
 
     @commands.command(pass_context=True)
@@ -201,6 +204,8 @@ class MemberManagement:
             none: Do not display results (show only count + output specified.
         --everyone
             Include everyone. Useful for finding members without specific roles.
+        --dm MESSAGE
+            Send MESSAGE as DM to all members found. Requires Broadcast cog.
         """
         parser = self.parser()
         try:
@@ -254,14 +259,18 @@ class MemberManagement:
         if len(plus):
             # include roles with '+' flag
             # exclude roles with '-' flag
-            out_members = set()
-            for m in server.members:
-                roles = set([r.name.lower() for r in m.roles])
-                if option_everyone:
-                    roles.add('@everyone')
-                exclude = len(roles & minus)
-                if not exclude and roles >= plus:
-                    out_members.add(m)
+            index = self.bot.get_cog("RoleIndex")
+            if index is not None:
+                out_members = set(index.query(server, include=plus, exclude=minus))
+            else:
+                out_members = set()
+                for m in server.members:
+                    roles = set([r.name.lower() for r in m.roles])
+                    if option_everyone:
+                        roles.add('@everyone')
+                    exclude = len(roles & minus)
+                    if not exclude and roles >= plus:
+                        out_members.add(m)
 
             # only role
             if option_only_role:
@@ -320,6 +329,20 @@ class MemberManagement:
                 for page in pagify(out, shorten_by=24):
                     await self.bot.say(box(page))
 
+            # DM members found
+            if pargs.dm:
+                broadcast = self.bot.get_cog("Broadcast")
+                if broadcast is None:
+                    await self.bot.say("Load the Broadcast cog to send DMs.")
+                    return
+                em = discord.Embed(description=pargs.dm)
+                em.set_author(
+                    name=ctx.message.author,
+                    icon_url=ctx.message.author.avatar_url)
+                em.set_footer(text=server.name)
+                await broadcast.send(
+                    out_members, embed=em, channel=ctx.message.channel, title="mm DM")
+
     @staticmethod
     def get_member_csv(members):
         """Return members as a list."""
@@ -420,6 +443,58 @@ class MemberManagement:
         for page in pagify("\n".join(out), shorten_by=12):
             await self.bot.say(page)
 
+    @staticmethod
+    def parse_role_changes(server, author, roles):
+        """Parse +role / -role arguments.
+
+        Return roles to add, roles to remove and roles author cannot edit.
+        """
+        plus = []
+        minus = []
+        for role in roles:
+            has_flag = role[0] in ['+', '-']
+            flag = role[0] if has_flag else '+'
+            name = role[1:] if has_flag else role
+            if flag == '+':
+                plus.append(name.lower())
+            else:
+                minus.append(name.lower())
+
+        to_add, to_remove, denied = [], [], []
+        for role in server.roles:
+            role_in_minus = role.name.lower() in minus
+            role_in_plus = role.name.lower() in plus
+            if not (role_in_minus or role_in_plus):
+                continue
+            # respect role hiearchy
+            if role.position >= author.top_role.position:
+                denied.append(role)
+                continue
+            if role_in_minus:
+                to_remove.append(role)
+            if role_in_plus:
+                to_add.append(role)
+        return to_add, to_remove, denied
+
+    async def plan_role_changes(self, ctx, members, roles):
+        """Change roles of members using the RolePlanner cog.
+
+        Return False if RolePlanner is not loaded.
+        """
+        planner = self.bot.get_cog("RolePlanner")
+        if planner is None:
+            return False
+        author = ctx.message.author
+        to_add, to_remove, denied = self.parse_role_changes(ctx.message.server, author, roles)
+        for role in denied:
+            await self.bot.say(
+                "{} does not have permission to edit {}.".format(
+                    author.display_name, role.name))
+        report = await planner.apply([(m, to_add, to_remove) for m in members])
+        for page in report.pages():
+            await self.bot.say(page)
+        return True
+
     @commands.command(pass_context=True, no_pm=True)
     @checks.mod_or_permissions(manage_roles=True)
     async def changerole(self, ctx, member: discord.Member = None, *roles: str):
@@ -441,6 +516,9 @@ class MemberManagement:
             await self.bot.say("You must specify a role.")
             return
 
+        if await self.plan_role_changes(ctx, [member], roles):
+            return
+
         server_role_names = [r.name for r in server.roles]
         role_args = []
         flags = ['+', '-']
@@ -546,7 +624,16 @@ class MemberManagement:
             await self.bot.say("Cannot find the role **{}** on this server.".format(to_add_role_name))
             return
 
-        server_members = [member for member in server.members]
+        index = self.bot.get_cog("RoleIndex")
+        if index is not None:
+            server_members = index.members(server, with_role)
+        else:
+            server_members = [m for m in server.members if with_role in m.roles]
+
+        to_add_members = [m for m in server_members if to_add_role not in m.roles]
+        if await self.plan_role_changes(ctx, to_add_members, [to_add_role_name]):
+            return
+
         for member in server_members:
             if with_role in member.roles:
                 if to_add_role not in member.roles:
@@ -562,6 +649,8 @@ class MemberManagement:
 
         !multiaddrole rolename User1 User2 User3
         """
+        if await self.plan_role_changes(ctx, members, [role]):
+            return
         for member in members:
             await ctx.invoke(self.changerole, member, role)
 
@@ -573,6 +662,8 @@ class MemberManagement:
         !multiremoverole rolename User1 User2 User3
         """
         role = '-{}'.format(role)
+        if await self.plan_role_changes(ctx, members, [role]):
+            return
         for member in members:
             await ctx.invoke(self.changerole, member, role)
 
@@ -23,6 +23,8 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
 FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
+import asyncio
+import hashlib
 import os
 from collections import OrderedDict
 
@@ -34,6 +36,7 @@ from discord.ext.commands import Context
 
 PATH = os.path.join("data", "nlp")
 JSON = os.path.join(PATH, "settings.json")
+CACHE_SIZE = 2048
 
 try:
     import textblob
@@ -91,6 +94,89 @@ LANG = OrderedDict([
 ])
 
 
+def text_hash(text):
+    """Hash of text used as cache key."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class Translator:
+    """Translation service.
+
+    TextBlob calls are blocking network requests so they are run in an executor.
+    Results are cached in an LRU cache keyed by (text hash, language)
+    and identical requests in flight share the same future.
+    """
+
+    def __init__(self, loop, cache_size=CACHE_SIZE):
+        self.loop = loop
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.pending = {}
+
+    def cache_get(self, key):
+        value = self.cache.get(key)
+        if value is not None:
+            self.cache.move_to_end(key)
+        return value
+
+    def cache_set(self, key, value):
+        self.cache[key] = value
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def run(self, key, func, *args):
+        """Run blocking func in executor, cached and coalesced by key."""
+        value = self.cache_get(key)
+        if value is not None:
+            return value
+        future = self.pending.get(key)
+        if future is None:
+            future = self.loop.run_in_executor(None, func, *args)
+            self.pending[key] = future
+            future.add_done_callback(lambda f: self._done(key, f))
+        return await asyncio.shield(future)
+
+    def _done(self, key, future):
+        self.pending.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            if future.result() is not None:
+                self.cache_set(key, future.result())
+
+    @staticmethod
+    def _detect(text):
+        try:
+            return TextBlob(text).detect_language()
+        except textblob.exceptions.TranslatorError:
+            return None
+
+    @staticmethod
+    def _translate(text, to_lang):
+        try:
+            return str(TextBlob(text).translate(to=to_lang))
+        except (textblob.exceptions.NotTranslated,
+                textblob.exceptions.TranslatorError):
+            return None
+
+    async def detect(self, text):
+        """Detect language of text."""
+        return await self.run((text_hash(text), None), self._detect, text)
+
+    async def translate(self, text, to_lang):
+        """Translate text. Return None if it cannot be translated."""
+        return await self.run((text_hash(text), to_lang), self._translate, text, to_lang)
+
+    async def translate_all(self, text, languages):
+        """Detect language once and translate to all languages concurrently.
+
+        Return detected language and list of (language, translation).
+        """
+        detected_lang = await self.detect(text)
+        languages = [lang for lang in languages if lang != detected_lang]
+        results = await asyncio.gather(*[self.translate(text, lang) for lang in languages])
+        return detected_lang, [(lang, r) for lang, r in zip(languages, results) if r is not None]
+
+
 class NLP:
     """Natural Launguage Processing.
     """
@@ -98,6 +184,7 @@ class NLP:
     def __init__(self, bot):
         self.bot = bot
         self.settings = dataIO.load_json(JSON)
+        self.translator = Translator(bot.loop)
 
     @commands.command(pass_context=True)
     async def translate(self, ctx: Context, to_lang: str, *, text: str):
@@ -110,8 +197,9 @@ class NLP:
         !translatelang
         will list all the supported languages
         """
-        blob = TextBlob(text)
-        out = blob.translate(to=to_lang)
+        out = await self.translator.translate(text, to_lang)
+        if out is None:
+            out = text
         await self.bot.say(out)
 
     @commands.command(pass_context=True)
@@ -230,20 +318,14 @@ class NLP:
                 return
             if msg.author.bot:
                 return
+            if not msg.content:
+                return
             if self.settings[server.id]["AUTO_TRANSLATE"]:
-                blob = TextBlob(msg.content)
-                detected_lang = blob.detect_language()
-                out = []
-                for language in self.settings[server.id]["LANGUAGE"]:
-                    if language != detected_lang:
-                        try:
-                            translated_msg = blob.translate(to=language)
-                            out.append(
-                                "`{}` {}".format(
-                                    language, translated_msg))
-                        except (textblob.exceptions.NotTranslated,
-                                textblob.exceptions.TranslatorError):
-                            pass
+                detected_lang, translations = await self.translator.translate_all(
+                    msg.content, self.settings[server.id]["LANGUAGE"])
+                out = [
+                    "`{}` {}".format(language, translated_msg)
+                    for language, translated_msg in translations]
                 if len(out):
                     out.insert(0,
                                "{}\n`{}` {}".format(
@@ -282,29 +364,23 @@ class NLP:
             return
         if msg.author.bot:
             return
-        blob = TextBlob(msg.content)
-        detected_lang = blob.detect_language()
-        out = []
-        for language in settings.get("languages"):
-            if language != detected_lang:
-                try:
-                    translated_msg = blob.translate(to=language)
-                    out.append(
-                        "`{}` {}".format(
-                            language, translated_msg))
-                except (textblob.exceptions.NotTranslated,
-                        textblob.exceptions.TranslatorError):
-                    pass
-            if len(out):
-                to_channel = self.bot.get_channel(settings.get("to_channel_id"))
-                out.insert(0,
-                           "**{}**\n`{}` {} {}".format(
-                               msg.author.display_name,
-                               detected_lang,
-                               msg.content,
-                               ' '.join([a.get('url') for a in msg.attachments])
-                           ))
-                await self.bot.send_message(to_channel, '\n'.join(out))
+        if not msg.content:
+            return
+        detected_lang, translations = await self.translator.translate_all(
+            msg.content, settings.get("languages"))
+        out = [
+            "`{}` {}".format(language, translated_msg)
+            for language, translated_msg in translations]
+        if len(out):
+            to_channel = self.bot.get_channel(settings.get("to_channel_id"))
+            out.insert(0,
+                       "**{}**\n`{}` {} {}".format(
+                           msg.author.display_name,
+                           detected_lang,
+                           msg.content,
+                           ' '.join([a.get('url') for a in msg.attachments])
+                       ))
+            await self.bot.send_message(to_channel, '\n'.join(out))
 
 
 def check_folder():
@@ -608,9 +608,15 @@ class RACF:
             await self.bot.say("You have not entered any messages.")
         else:
             out_mentions = []
-            for m in server.members:
-                if role in [r.name for r in m.roles]:
-                    out_mentions.append(m.mention)
+            index = self.bot.get_cog("RoleIndex")
+            if index is not None:
+                for r in server.roles:
+                    if r.name == role:
+                        out_mentions.extend(m.mention for m in index.members(server, r))
+            else:
+                for m in server.members:
+                    if role in [r.name for r in m.roles]:
+                        out_mentions.append(m.mention)
             await self.bot.say("{} {}".format(" ".join(out_mentions),
                                               " ".join(msg)))
 
@@ -727,7 +733,11 @@ class RACF:
         if new_role is None:
             await self.bot.say('{} is not a valid role.'.format(new_role))
             return
-        members = [m for m in server.members if with_role in m.roles]
+        index = self.bot.get_cog("RoleIndex")
+        if index is not None:
+            members = index.members(server, with_role)
+        else:
+            members = [m for m in server.members if with_role in m.roles]
         for member in members:
             await self.bot.add_roles(member, new_role)
             await self.bot.say("Added {} for {}".format(
@@ -739,6 +749,15 @@ class RACF:
         """Re-assign list of people from members to visitors."""
         server = ctx.message.server
         to_add_roles = [r for r in server.roles if r.name == 'Visitor']
+        planner = self.bot.get_cog("RolePlanner")
+        if planner is not None:
+            remove_names = self.config.roles.member_default + CLANS + ['eSports']
+            report = await planner.apply([
+                (member, to_add_roles, [r for r in member.roles if r.name in remove_names])
+                for member in members])
+            for page in report.pages():
+                await self.bot.say(page)
+            return
         for member in members:
             to_remove_roles = [
                 r for r in member.roles if r.name in self.config.roles.member_default]
@@ -796,16 +815,23 @@ class RACF:
             #     name="How to reply",
             #     value="DM or tag {0.mention} if you want to reply.".format(
             #         ctx.message.author))
+            broadcast = self.bot.get_cog("Broadcast")
+            if broadcast is not None:
+                await broadcast.send(
+                    members, embed=data, channel=ctx.message.channel)
+                return
+            failed = []
             for m in members:
                 try:
                     await self.bot.send_message(m, embed=data)
-                    await self.bot.say(
-                        "Message sent to {}".format(m.display_name))
-                except discord.errors.Forbidden:
-                    await self.bot.say(
-                        "{} does not accept DMs from me.".format(
-                            m.display_name))
-                    raise
+                except discord.errors.HTTPException:
+                    failed.append(m.display_name)
+            out = ["Message sent to {:,} of {:,} members.".format(
+                len(members) - len(failed), len(members))]
+            if failed:
+                out.append("Failed: {}".format(", ".join(failed)))
+            for page in pagify("\n".join(out)):
+                await self.bot.say(page)
 
     @commands.command(pass_context=True, no_pm=True)
     @commands.has_any_role(*BOTCOMMANDER_ROLE)
@@ -435,8 +435,13 @@ class RACFAudit:
 
     async def family_member_models(self):
         """All family member models."""
-        api = ClashRoyaleAPI(self.auth)
         tags = self.clan_tags()
+        roster = self.bot.get_cog("FamilyRoster")
+        if roster is not None:
+            members = roster.member_models(tags, provider='official')
+            if members is not None:
+                return members
+        api = ClashRoyaleAPI(self.auth)
         clan_models = await api.fetch_clan_list(tags)
         members = []
         for clan_model in clan_models:
@@ -566,6 +571,9 @@ class RACFAudit:
             action='store_true',
             default=False,
             help='Settings')
+        parser.add_argument(
+            '-n', '--notify',
+            help='DM this message to users not in our clans but with member roles')
 
         return parser
 
@@ -574,7 +582,7 @@ class RACFAudit:
     async def racfaudit_run(self, ctx, *args):
         """Audit the entire RACF family.
 
-        [p]racfaudit run [-h] [-x] [-d] [-c CLAN [CLAN ...]]
+        [p]racfaudit run [-h] [-x] [-d] [-c CLAN [CLAN ...]] [-n NOTIFY]
 
         optional arguments:
           -h, --help            show this help message and exit
@@ -582,6 +590,9 @@ class RACFAudit:
           -d, --debug           Debug
           -c CLAN [CLAN ...], --clan CLAN [CLAN ...]
                                 Clan(s) to show
+          -n NOTIFY, --notify NOTIFY
+                                DM this message to users not in our clans
+                                but with member roles (needs Broadcast cog)
         """
         parser = self.run_args_parser()
         try:
@@ -767,7 +778,13 @@ class RACFAudit:
             for page in pagify('\n'.join(out)):
                 await self.bot.say(page)
 
-            if option_exec:
+            planner = self.bot.get_cog("RolePlanner")
+            if option_exec and planner is not None:
+                changes = self.audit_role_changes(server, audit_results)
+                report = await planner.apply(changes)
+                for page in report.pages():
+                    await self.bot.say(page)
+            elif option_exec:
                 # change clan roles
                 for result in audit_results["no_clan_role"]:
                     try:
@@ -824,8 +841,66 @@ class RACFAudit:
                     await self.bot.add_roles(result, visitor_role)
                     await self.bot.say("Added Visitor to {}".format(result))
 
+            if pargs.notify:
+                await self.notify_members(ctx, audit_results['not_in_our_clans'], pargs.notify)
+
             await self.bot.say("Audit finished.")
 
+    async def notify_members(self, ctx, members, message):
+        """DM audit message to members with one summary."""
+        broadcast = self.bot.get_cog("Broadcast")
+        if broadcast is None:
+            await self.bot.say("Load the Broadcast cog to send DMs.")
+            return
+        em = discord.Embed(description=message)
+        em.set_author(
+            name=ctx.message.author,
+            icon_url=ctx.message.author.avatar_url)
+        em.set_footer(text=ctx.message.server.name)
+        await broadcast.send(
+            members, embed=em, channel=ctx.message.channel, title="Audit DM")
+
+    def audit_role_changes(self, server, audit_results):
+        """Role changes required by audit results.
+
+        Return list of (member, roles to add, roles to remove).
+        """
+        changes = []
+        member_role = discord.utils.get(server.roles, name='Member')
+        visitor_role = discord.utils.get(server.roles, name='Visitor')
+
+        # change clan roles
+        for result in audit_results["no_clan_role"]:
+            try:
+                member_model = result['member_model']
+                discord_member = result['discord_member']
+                clan_role_name = self.clan_roles[member_model['clan']['name']]
+            except KeyError:
+                continue
+            to_remove = [
+                r for r in discord_member.roles
+                if r.name in self.clan_roles.values() and r.name != clan_role_name]
+            role = discord.utils.get(server.roles, name=clan_role_name)
+            changes.append((discord_member, [role], to_remove))
+
+        for discord_member in audit_results["no_member_role"]:
+            changes.append((discord_member, [member_role], [visitor_role]))
+
+        # remove member roles from people who are not in our clans
+        for result in audit_results['not_in_our_clans']:
+            result_role_names = [r.name for r in result.roles]
+            # ignore people with special
+            if 'Special' in result_role_names:
+                continue
+            if 'Keep-Member' in result_role_names:
+                continue
+            if 'Leader-Emeritus' in result_role_names:
+                continue
+            to_remove = [r for r in result.roles if r.name in ['Member', 'Tourney', 'Practice']]
+            changes.append((result, [visitor_role], to_remove))
+
+        return changes
+
 
 def check_folder():
     """Check folder."""
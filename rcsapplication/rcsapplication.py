@@ -22,8 +22,12 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import asyncio
 import os
+import time
 import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+
 import httplib2
 import aiohttp
 
@@ -47,6 +51,10 @@ CREDENTIALS_JSON = os.path.join(PATH, CREDENTIALS_FILENAME)
 SCOPES = 'https://www.googleapis.com/auth/spreadsheets.readonly'
 SERVICE_KEY_JSON = os.path.join(PATH, "service_key.json")
 APPLICATION_NAME = "Red Discord Bot RCS Interview Cog"
+# seconds before form responses are downloaded again
+SHEET_CACHE_TTL = 300
+# min seconds between downloads for unknown application IDs
+SHEET_MIN_REFRESH = 30
 
 
 class NoDataFound(Exception):
@@ -56,6 +64,73 @@ class ApplicationIdNotFound(Exception):
     pass
 
 
+class FormResponses:
+    """Form responses with lookup by application ID."""
+
+    def __init__(self, values):
+        self.values = values
+        self.loaded = time.time()
+        self.by_app_id = {}
+        # app id is column B
+        for form in values[1:]:
+            if len(form) > 1:
+                self.by_app_id.setdefault(form[1], form)
+
+    @property
+    def questions(self):
+        # questions: first row, contains legacy field at end
+        return self.values[0][:-1]
+
+
+class SheetClient:
+    """Async Google Sheets access with cached form responses.
+
+    The Sheets service is built once and used from a single worker thread
+    so that requests do not block the event loop.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.service = None
+        self.cache = {}
+        self.locks = {}
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    def build_service(self):
+        if self.service is None:
+            credentials = ServiceAccountCredentials.from_json_keyfile_name(
+                SERVICE_KEY_JSON, scopes=SCOPES)
+            http = credentials.authorize(httplib2.Http())
+            discoveryUrl = ('https://sheets.googleapis.com/$discovery/rest?'
+                            'version=v4')
+            self.service = discovery.build('sheets', 'v4', http=http,
+                                           discoveryServiceUrl=discoveryUrl)
+        return self.service
+
+    def fetch(self, spreadsheetId):
+        # whole sheet
+        rangeName = 'FormResponses!A:O'
+        result = self.build_service().spreadsheets().values().get(
+            spreadsheetId=spreadsheetId, range=rangeName).execute()
+        return result.get('values', [])
+
+    async def responses(self, spreadsheetId, force=False):
+        """Return FormResponses, downloaded at most once per SHEET_CACHE_TTL."""
+        lock = self.locks.setdefault(spreadsheetId, asyncio.Lock())
+        async with lock:
+            cached = self.cache.get(spreadsheetId)
+            if cached is not None and not force:
+                if time.time() - cached.loaded < SHEET_CACHE_TTL:
+                    return cached
+            values = await self.loop.run_in_executor(
+                self.executor, self.fetch, spreadsheetId)
+            self.cache[spreadsheetId] = FormResponses(values)
+            return self.cache[spreadsheetId]
+
+
 class RCSApplication:
     """Reddit Clan System apps."""
 
@@ -63,6 +138,10 @@ class RCSApplication:
         """Constructor."""
         self.bot = bot
         self.settings = dataIO.load_json(JSON)
+        self.sheets = SheetClient(bot.loop)
+
+    def __unload(self):
+        self.sheets.close()
 
     @checks.mod_or_permissions()
     @commands.group(pass_context=True)
@@ -152,7 +231,7 @@ class RCSApplication:
         await self.bot.send_typing(ctx.message.channel)
         try:
             # out = self.get_application_response(ctx, app_id)
-            em = self.get_application_response_embed(ctx, app_id)
+            em = await self.get_application_response_embed(ctx, app_id)
         except NoDataFound:
             await self.bot.say('No data found.')
             return
@@ -167,7 +246,7 @@ class RCSApplication:
         """Return appliation info as markdown."""
         await self.bot.send_typing(ctx.message.channel)
         try:
-            out = self.get_application_response(ctx, app_id)
+            out = await self.get_application_response(ctx, app_id)
         except NoDataFound:
             await self.bot.say('No data found.')
             return
@@ -178,41 +257,28 @@ class RCSApplication:
         for page in pagify(out, shorten_by=80):
             await self.bot.say(box(page, lang="markdown"))
 
-    def get_application_response(self, ctx, app_id):
-        """Return application info as text."""
-        result = self.get_gspread_result(ctx.message.server)
-        values = result.get('values', [])
-
-        if not values:
-            # await self.bot.say('No data found.')
+    async def get_form_answers(self, server, app_id):
+        """Return questions and answers of an application."""
+        responses = await self.get_gspread_result(server)
+        if not responses.values:
             raise NoDataFound()
-            return
-
-        # output
-        out = []
-
-        # questions: first row
-        questions = values[0]
-        # questions contain legacy field at end
-        questions = questions[:-1]
 
-        # for question in questions:
-        #     out.append('**{}**'.format(question))
-
-        # app id is column C
-        answers = None
-        forms = values[1:]
-        for form in forms:
-            if form[1] == app_id:
-                answers = form
-                break
-
-        # process answers
+        # reload in case of a new application
+        answers = responses.by_app_id.get(app_id)
+        if answers is None and time.time() - responses.loaded > SHEET_MIN_REFRESH:
+            responses = await self.get_gspread_result(server, force=True)
+            answers = responses.by_app_id.get(app_id)
         if answers is None:
-            # await self.bot.say("Application ID not found.")
             raise ApplicationIdNotFound()
-            return
 
+        return responses.questions, answers
+
+    async def get_application_response(self, ctx, app_id):
+        """Return application info as text."""
+        questions, answers = await self.get_form_answers(ctx.message.server, app_id)
+
+        # output
+        out = []
         for id, question in enumerate(questions):
             out.append(
                 '`{}. `**{}**'.format(id + 1, question))
@@ -223,34 +289,10 @@ class RCSApplication:
 
         return '\n'.join(out)
 
-    def get_application_response_embed(self, ctx, app_id):
+    async def get_application_response_embed(self, ctx, app_id):
         """Return application info as text."""
         server = ctx.message.server
-        result = self.get_gspread_result(server)
-        values = result.get('values', [])
-
-        if not values:
-            raise NoDataFound()
-            return
-
-        # questions: first row
-        questions = values[0]
-        # questions contain legacy field at end
-        questions = questions[:-1]
-
-        # app id is column C
-        answers = None
-        forms = values[1:]
-        for form in forms:
-            if form[1] == app_id:
-                answers = form
-                break
-
-        # process answers
-        if answers is None:
-            # await self.bot.say("Application ID not found.")
-            raise ApplicationIdNotFound()
-            return
+        questions, answers = await self.get_form_answers(server, app_id)
 
         em = discord.Embed(
             title="RCS Application Response",
@@ -266,23 +308,11 @@ class RCSApplication:
 
         return em
 
-    def get_gspread_result(self, server):
-        """Return Google Spreadsheet reuslt."""
-        credentials = ServiceAccountCredentials.from_json_keyfile_name(
-            SERVICE_KEY_JSON, scopes=SCOPES)
-        http = credentials.authorize(httplib2.Http())
-        discoveryUrl = ('https://sheets.googleapis.com/$discovery/rest?'
-                        'version=v4')
-        service = discovery.build('sheets', 'v4', http=http,
-                                  discoveryServiceUrl=discoveryUrl)
+    async def get_gspread_result(self, server, force=False):
+        """Return Google Spreadsheet form responses."""
         spreadsheetId = self.settings[server.id]["SHEET_ID"]
+        return await self.sheets.responses(spreadsheetId, force=force)
 
-        # whole sheet
-        rangeName = 'FormResponses!A:O'
-        result = service.spreadsheets().values().get(
-            spreadsheetId=spreadsheetId, range=rangeName).execute()
-
-        return result
 
 def check_folder():
     """Check folder."""
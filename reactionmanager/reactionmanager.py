@@ -167,6 +167,31 @@ class ReactionManager:
         for page in pagify('\n'.join(out), shorten_by=24):
             await self.bot.say(page)
 
+    async def reaction_users(self, message):
+        """List of (emoji, users) of a message.
+
+        Uses the live tally of ReactionPoll for tracked polls.
+        """
+        poll = self.bot.get_cog("ReactionPoll")
+        if poll is not None:
+            tally = poll.get_tally(message.id)
+            if tally is not None:
+                return [(emoji, list(users.values())) for emoji, users in tally.votes.items()]
+
+        results = []
+        for reaction in message.reactions:
+            if reaction.custom_emoji:
+                # <:emoji_name:emoji_id>
+                emoji = '<:{}:{}>'.format(
+                    reaction.emoji.name,
+                    reaction.emoji.id)
+            else:
+                emoji = reaction.emoji
+
+            reaction_users = await self.bot.get_reaction_users(reaction)
+            results.append((emoji, reaction_users))
+        return results
+
     async def get_reactions(self, message, exclude_self=True):
         title = message.channel.name
         description = message.content
@@ -182,16 +207,7 @@ class ReactionManager:
 
         reaction_votes = []
 
-        for reaction in message.reactions:
-            if reaction.custom_emoji:
-                # <:emoji_name:emoji_id>
-                emoji = '<:{}:{}>'.format(
-                    reaction.emoji.name,
-                    reaction.emoji.id)
-            else:
-                emoji = reaction.emoji
-
-            reaction_users = await self.bot.get_reaction_users(reaction)
+        for emoji, reaction_users in await self.reaction_users(message):
             valid_users = []
             for u in reaction_users:
                 if exclude_self and u == self.bot.user:
@@ -24,9 +24,12 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import asyncio
 import os
+import time
 import discord
 import datetime as dt
+from collections import OrderedDict
 from collections import defaultdict
 from discord.ext import commands
 
@@ -38,12 +41,54 @@ from cogs.utils.dataIO import dataIO
 PATH = os.path.join("data", "reactionpoll")
 JSON = os.path.join(PATH, "settings.json")
 
+# default min seconds between embed edits of a poll
+EDIT_INTERVAL = 5
+
 
 def nested_dict():
     """Recursively nested defaultdict."""
     return defaultdict(nested_dict)
 
 
+def reaction_emoji(reaction):
+    """Emoji of a reaction as a string."""
+    if reaction.custom_emoji:
+        # <:emoji_name:emoji_id>
+        return '<:{}:{}>'.format(
+            reaction.emoji.name,
+            reaction.emoji.id)
+    return reaction.emoji
+
+
+class Tally:
+    """Voters by emoji of a tracked message.
+
+    Seeded once from the API, then updated from reaction events.
+    """
+
+    def __init__(self, message):
+        self.message = message
+        # emoji: OrderedDict of user id: user
+        self.votes = OrderedDict()
+        self.embed_message = None
+        self.last_edit = 0
+        self.pending = None
+
+    def add(self, emoji, user):
+        self.votes.setdefault(emoji, OrderedDict())[user.id] = user
+
+    def remove(self, emoji, user):
+        users = self.votes.get(emoji)
+        if users is None:
+            return
+        users.pop(user.id, None)
+        if not users:
+            del self.votes[emoji]
+
+    def clear(self):
+        self.votes.clear()
+
+
 class ReactionPoll:
     """Archive activity.
 
@@ -56,6 +101,13 @@ class ReactionPoll:
         self.bot = bot
         self.settings = nested_dict()
         self.settings.update(dataIO.load_json(JSON))
+        self.tallies = {}
+        self.tally_locks = defaultdict(asyncio.Lock)
+
+    def __unload(self):
+        for tally in self.tallies.values():
+            if tally.pending is not None:
+                tally.pending.cancel()
 
     def check_server_settings(self, server):
         """Verify settings have all the keys."""
@@ -89,9 +141,11 @@ class ReactionPoll:
         server = ctx.message.server
         message = await self.bot.get_message(channel, message_id)
 
-        em = await self.reaction_embed(message)
+        tally = await self.seed_tally(message)
+        em = self.reaction_embed(tally)
 
         embed_message = await self.bot.say(embed=em)
+        tally.embed_message = embed_message
 
         self.settings[server.id]["messages"][message_id] = {
             'channel_id': channel.id,
@@ -130,9 +184,11 @@ class ReactionPoll:
 
         message = await self.bot.get_message(channel, message_id)
 
-        em = await self.reaction_embed(message)
+        tally = await self.seed_tally(message)
+        em = self.reaction_embed(tally)
 
         embed_message = await self.bot.say(embed=em)
+        tally.embed_message = embed_message
 
         self.settings[server.id]["messages"][message_id] = {
             'channel_id': channel.id,
@@ -153,72 +209,121 @@ class ReactionPoll:
 
         del self.settings[server.id]["messages"][message_id]
         dataIO.save_json(JSON, self.settings)
+        tally = self.tallies.pop(message_id, None)
+        if tally is not None and tally.pending is not None:
+            tally.pending.cancel()
+
+    @reactionpoll.command(name="interval", pass_context=True, no_pm=True)
+    async def reactionpoll_interval(self, ctx, seconds: int):
+        """Set min seconds between poll embed updates."""
+        server = ctx.message.server
+        self.settings[server.id]["interval"] = max(1, seconds)
+        dataIO.save_json(JSON, self.settings)
+        await self.bot.say("Poll embeds update at most every {} seconds.".format(
+            self.settings[server.id]["interval"]))
+
+    def is_tracked(self, message):
+        server = message.server
+        if server is None:
+            return False
+        return message.id in self.settings[server.id]['messages']
+
+    def get_tally(self, message_id):
+        """Seeded tally of a tracked message, or None."""
+        return self.tallies.get(message_id)
+
+    async def seed_tally(self, message):
+        """Load voters of a message from the API once."""
+        async with self.tally_locks[message.id]:
+            tally = self.tallies.get(message.id)
+            if tally is not None:
+                return tally
+            tally = Tally(message)
+            for reaction in message.reactions:
+                emoji = reaction_emoji(reaction)
+                for user in await self.bot.get_reaction_users(reaction):
+                    tally.add(emoji, user)
+            self.tallies[message.id] = tally
+            return tally
 
     async def on_reaction_add(self, reaction, user):
         """Monitor reactions if tracked."""
         message = reaction.message
-        server = message.server
-        # print('Reaction add: {}: {}'.format(server.id, message.id))
-        if message.id not in self.settings[server.id]['messages']:
+        if not self.is_tracked(message):
             return
-
-        await self.update_reation_embed(server, message)
+        tally = await self.seed_tally(message)
+        tally.message = message
+        tally.add(reaction_emoji(reaction), user)
+        self.schedule_update(message.server, tally)
 
     async def on_reaction_remove(self, reaction, user):
         """Monitor reactions if tracked."""
         message = reaction.message
-        server = message.server
-        # print('Reaction remove: {}: {}'.format(server.id, message.id))
-        if message.id not in self.settings[server.id]['messages']:
+        if not self.is_tracked(message):
             return
+        tally = await self.seed_tally(message)
+        tally.message = message
+        tally.remove(reaction_emoji(reaction), user)
+        self.schedule_update(message.server, tally)
 
-        await self.update_reation_embed(server, message)
+    async def on_reaction_clear(self, message, reactions):
+        """Monitor reactions if tracked."""
+        if not self.is_tracked(message):
+            return
+        tally = await self.seed_tally(message)
+        tally.clear()
+        self.schedule_update(message.server, tally)
 
-    async def update_reation_embed(self, server, message):
+    def schedule_update(self, server, tally):
+        """Coalesce embed edits to one per interval."""
+        if tally.pending is not None:
+            return
+        interval = self.settings[server.id].get("interval", EDIT_INTERVAL)
+        delay = max(0, tally.last_edit + interval - time.time())
+        tally.pending = self.bot.loop.call_later(
+            delay,
+            lambda: self.bot.loop.create_task(self.update_reation_embed(server, tally)))
+
+    async def update_reation_embed(self, server, tally):
         """Update reation embeds."""
-        print('Reaction update: {}: {}'.format(server.id, message.id))
-        m = self.settings[server.id]['messages'][message.id]
-
-        embed_channel = server.get_channel(m["embed_channel_id"])
-        embed_message = await self.bot.get_message(
-            embed_channel,
-            m["embed_message_id"])
-
-        reaction_channel = server.get_channel(m["channel_id"])
-        reaction_message = await self.bot.get_message(
-            reaction_channel,
-            m["message_id"])
-
-        em = await self.reaction_embed(reaction_message)
-        await self.bot.edit_message(
-            embed_message,
-            new_content=dt.datetime.utcnow().isoformat(),
-            embed=em)
-
-    async def reaction_embed(self, message: discord.Message):
+        tally.pending = None
+        tally.last_edit = time.time()
+        message = tally.message
+        m = self.settings[server.id]['messages'].get(message.id)
+        if m is None:
+            return
+
+        if tally.embed_message is None:
+            embed_channel = server.get_channel(m["embed_channel_id"])
+            try:
+                tally.embed_message = await self.bot.get_message(
+                    embed_channel,
+                    m["embed_message_id"])
+            except discord.HTTPException:
+                return
+
+        em = self.reaction_embed(tally)
+        try:
+            await self.bot.edit_message(
+                tally.embed_message,
+                new_content=dt.datetime.utcnow().isoformat(),
+                embed=em)
+        except discord.NotFound:
+            tally.embed_message = None
+
+    def reaction_embed(self, tally):
         """Discord Embed of a message reaction."""
+        message = tally.message
         title = message.channel.name
         description = message.content
         em = discord.Embed(
             title=title,
             description=description)
 
-        for reaction in message.reactions:
-            if reaction.custom_emoji:
-                # <:emoji_name:emoji_id>
-                emoji = '<:{}:{}>'.format(
-                    reaction.emoji.name,
-                    reaction.emoji.id)
-            else:
-                emoji = reaction.emoji
-
-            reaction_users = await self.bot.get_reaction_users(reaction)
-            users = ' '.join([m.mention for m in reaction_users])
-            name = emoji
-            count = reaction.count
-            value = '{}: {}'.format(count, users)
-
-            em.add_field(name=name, value=value, inline=True)
+        for emoji, users in tally.votes.items():
+            mentions = ' '.join([u.mention for u in users.values()])
+            value = '{}: {}'.format(len(users), mentions)
+            em.add_field(name=emoji, value=value, inline=True)
 
         em.set_footer(
             text='ID: {} | Updated: {}'.format(
@@ -24,6 +24,10 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import asyncio
+import bisect
+import heapq
+import itertools
 import os
 import time
 
@@ -34,6 +38,118 @@ from discord.ext import commands
 
 PATH = os.path.join("data", "remindme_ext")
 JSON = os.path.join(PATH, "settings.json")
+REMINDERS_JSON = os.path.join("data", "remindme", "reminders.json")
+
+# seconds between reminders.json mtime checks
+WATCH_INTERVAL = 10
+# commands which modify reminders
+REMINDME_COMMANDS = ['remindme', 'forgetme']
+
+
+def reminder_key(r):
+    """Identity of a reminder as stored by remindme."""
+    return r["ID"], r["FUTURE"], r["TEXT"]
+
+
+class Entry:
+    """Indexed reminder."""
+
+    __slots__ = ['future', 'seq', 'reminder', 'cancelled']
+
+    def __init__(self, future, seq, reminder):
+        self.future = future
+        self.seq = seq
+        self.reminder = reminder
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.future, self.seq) < (other.future, other.seq)
+
+
+class ReminderIndex:
+    """Reminders indexed by due time and by user.
+
+    A global min-heap on FUTURE gives the next due reminder; per-user
+    sorted lists give a user's upcoming reminders. Cancelled entries
+    are removed from the user list and skipped lazily in the heap.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.users = {}
+        self.entries = {}
+        self.counter = itertools.count()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def insert(self, reminder):
+        """Add reminder. O(log n)."""
+        key = reminder_key(reminder)
+        if key in self.entries:
+            return self.entries[key]
+        entry = Entry(int(reminder["FUTURE"]), next(self.counter), reminder)
+        self.entries[key] = entry
+        heapq.heappush(self.heap, entry)
+        bisect.insort(self.users.setdefault(reminder["ID"], []), entry)
+        return entry
+
+    def cancel(self, reminder):
+        """Remove reminder. O(log n) plus list shift for the user."""
+        entry = self.entries.pop(reminder_key(reminder), None)
+        if entry is None:
+            return None
+        entry.cancelled = True
+        user_entries = self.users.get(reminder["ID"], [])
+        i = bisect.bisect_left(user_entries, entry)
+        if i < len(user_entries) and user_entries[i] is entry:
+            del user_entries[i]
+        if not user_entries:
+            self.users.pop(reminder["ID"], None)
+        self.compact()
+        return entry
+
+    def compact(self):
+        """Rebuild heap when cancelled entries dominate it."""
+        if len(self.heap) > 64 and len(self.heap) > 2 * len(self.entries):
+            self.heap = [e for e in self.heap if not e.cancelled]
+            heapq.heapify(self.heap)
+
+    def peek(self):
+        """Next due entry, or None."""
+        while self.heap and self.heap[0].cancelled:
+            heapq.heappop(self.heap)
+        return self.heap[0] if self.heap else None
+
+    def pop_due(self, now):
+        """Remove and return reminders due at or before now."""
+        due = []
+        entry = self.peek()
+        while entry is not None and entry.future <= now:
+            self.cancel(entry.reminder)
+            due.append(entry.reminder)
+            entry = self.peek()
+        return due
+
+    def upcoming(self, user_id, now, limit=None):
+        """User reminders due after now, in order. O(log n + k)."""
+        user_entries = self.users.get(user_id, [])
+        i = bisect.bisect_left(user_entries, Entry(now, -1, None))
+        end = len(user_entries) if limit is None else i + limit
+        return [e.reminder for e in user_entries[i:end]]
+
+    def sync(self, reminders):
+        """Update index to match reminders list.
+
+        Only new and removed reminders touch the heap.
+        """
+        keys = {}
+        for r in reminders:
+            keys[reminder_key(r)] = r
+        for key in set(self.entries) - set(keys):
+            self.cancel(self.entries[key].reminder)
+        for key in set(keys) - set(self.entries):
+            self.insert(keys[key])
 
 
 class RemindmeExt:
@@ -42,22 +158,85 @@ class RemindmeExt:
     def __init__(self, bot):
         """Init."""
         self.bot = bot
-        self.reminders = dataIO.load_json(os.path.join("data", "remindme", "reminders.json"))
+        self.index = ReminderIndex()
+        self.mtime = None
+        self.timer = None
+        self.refresh(force=True)
+        self.watch_task = bot.loop.create_task(self.watch())
+
+    def __unload(self):
+        self.watch_task.cancel()
+        if self.timer is not None:
+            self.timer.cancel()
+
+    @property
+    def remindme(self):
+        """Loaded remindme cog, if any."""
+        return self.bot.get_cog("RemindMe")
+
+    def load_reminders(self):
+        """Current reminders, from the remindme cog if loaded, else from disk."""
+        cog = self.remindme
+        if cog is not None and hasattr(cog, "reminders"):
+            return cog.reminders
+        if not os.path.exists(REMINDERS_JSON):
+            return []
+        return dataIO.load_json(REMINDERS_JSON)
+
+    def refresh(self, force=False):
+        """Resync index if reminders.json changed since last sync."""
+        try:
+            mtime = os.path.getmtime(REMINDERS_JSON)
+        except OSError:
+            mtime = None
+        if not force and mtime == self.mtime:
+            return
+        self.mtime = mtime
+        self.index.sync(self.load_reminders())
+        self.schedule()
+
+    async def watch(self):
+        """Pick up reminders.json changes made outside of commands."""
+        while self == self.bot.get_cog("RemindmeExt"):
+            await asyncio.sleep(WATCH_INTERVAL)
+            self.refresh()
+
+    async def on_command_completion(self, command, ctx):
+        """Resync as soon as remindme changes reminders."""
+        if command.qualified_name in REMINDME_COMMANDS:
+            self.refresh(force=True)
+
+    def schedule(self):
+        """Arm a single timer for the next due reminder."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        entry = self.index.peek()
+        if entry is None:
+            return
+        delay = max(entry.future - time.time(), 0)
+        self.timer = self.bot.loop.call_later(delay, self.dispatch)
+
+    def dispatch(self):
+        """Drop due reminders from the index.
+
+        This cog only reads reminders.json; delivery and removal from
+        the file are left to remindme, which owns it.
+        """
+        self.timer = None
+        self.index.pop_due(int(time.time()))
+        self.schedule()
 
     @commands.command(name='futureme', pass_context=True)
     async def futureme(self, ctx):
         """Return list of future events set by remindme."""
+        self.refresh()
         author = ctx.message.author
-        author_reminders = []
-        for r in self.reminders:
-            if r["ID"] == author.id:
-                if r["FUTURE"] >= int(time.time()):
-                    author_reminders.append(r)
+        author_reminders = self.index.upcoming(author.id, int(time.time()))
         if len(author_reminders) == 0:
             await self.bot.say("You have no future evnets.")
             return
 
-        author_reminders = sorted(author_reminders, key=lambda x: x["FUTURE"])
         out = ["Here are your list of reminders:"]
         for i, r in enumerate(author_reminders, 1):
             out.append("**{}. {}**\n{}".format(
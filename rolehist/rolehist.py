@@ -30,10 +30,95 @@ from .utils import checks
 from .utils.dataIO import dataIO
 from .general import General
 from cogs.utils.chat_formatting import pagify
+import bisect
+import json
 import os
 import datetime
+import time
+from collections import namedtuple
 
 settings_path = "data/rolehist/settings.json"
+logs_path = "data/rolehist/logs"
+
+# init events record the roles a member had when tracking started
+RoleEvent = namedtuple(
+    "RoleEvent", ["time", "member_id", "name", "added", "removed", "init"])
+
+
+def format_time(timestamp):
+    """UTC time string as used by the legacy history keys."""
+    return str(datetime.datetime.utcfromtimestamp(timestamp))
+
+
+def parse_time(value):
+    """Timestamp from a legacy history key."""
+    for fmt in ("%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S"):
+        try:
+            dt = datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        return dt.replace(tzinfo=datetime.timezone.utc).timestamp()
+    return None
+
+
+class ServerRoleLog:
+    """Append-only role change log of a server.
+
+    Each line of the log file is one event with the roles added and
+    removed. Events are indexed by member id and, for changes, by role
+    name in time order for range queries.
+    """
+
+    def __init__(self, server_id):
+        self.server_id = server_id
+        self.path = os.path.join(logs_path, "{}.ndjson".format(server_id))
+        self.members = {}
+        # lowercase role name: ([times], [events])
+        self.roles = {}
+        if os.path.exists(self.path):
+            self.load()
+
+    @property
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    event = RoleEvent(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue
+                self.index(event)
+
+    def index(self, event):
+        self.members.setdefault(event.member_id, []).append(event)
+        if event.init:
+            return
+        for name in event.added + event.removed:
+            times, events = self.roles.setdefault(name.lower(), ([], []))
+            # events are appended in time order; insort keeps migrated data sorted
+            i = bisect.bisect_right(times, event.time)
+            times.insert(i, event.time)
+            events.insert(i, event)
+
+    def append(self, events):
+        with open(self.path, "a") as f:
+            for event in events:
+                f.write(json.dumps(event._asdict()) + "\n")
+        for event in events:
+            self.index(event)
+
+    def history(self, member_id):
+        return self.members.get(member_id, [])
+
+    def role_changes(self, role_name, since, until=None):
+        """Events adding or removing a role between since and until."""
+        times, events = self.roles.get(role_name.lower(), ([], []))
+        start = bisect.bisect_left(times, since)
+        end = len(times) if until is None else bisect.bisect_right(times, until)
+        return events[start:end]
+
 
 class RoleHistory:
     """
@@ -46,20 +131,55 @@ class RoleHistory:
         self.bot = bot
         self.file_path = settings_path
         self.settings = dataIO.load_json(self.file_path)
+        self.logs = {}
+
+    def server_log(self, server):
+        """Role log of server, migrated from settings on first use."""
+        log = self.logs.get(server.id)
+        if log is None:
+            log = ServerRoleLog(server.id)
+            if not log.exists and server.id in self.settings:
+                log.append(self.legacy_events(server.id))
+            self.logs[server.id] = log
+        return log
+
+    def legacy_events(self, server_id):
+        """Convert role snapshots in settings to delta events."""
+        events = []
+        members = self.settings[server_id].get("Members", {})
+        for member_id, member_value in members.items():
+            prev_roles = None
+            for time_key, time_value in sorted(member_value["History"].items()):
+                timestamp = parse_time(time_key)
+                if timestamp is None:
+                    continue
+                roles = set(time_value["Roles"])
+                name = time_value.get("DisplayName")
+                if prev_roles is None:
+                    events.append(RoleEvent(
+                        timestamp, member_id, name, sorted(roles), [], True))
+                elif roles != prev_roles:
+                    events.append(RoleEvent(
+                        timestamp, member_id, name,
+                        sorted(roles - prev_roles), sorted(prev_roles - roles), False))
+                prev_roles = roles
+        events.sort(key=lambda e: e.time)
+        return events
+
+    def init_event(self, member):
+        return RoleEvent(
+            time.time(), member.id, member.display_name,
+            self.get_member_roles(member), [], True)
 
     def save_member_data(self, server=None, member=None):
-        """Save member data to settings."""
+        """Record current roles of member if not tracked yet."""
         if server is None:
             return
         if member is None:
             return
-        self.settings[server.id]["Members"][member.id] = {
-            "MemberID": member.id,
-            "History": {
-                str(self.server_time()): self.get_member_data(member)
-            }
-        }
-        dataIO.save_json(self.file_path, self.settings)
+        log = self.server_log(server)
+        if not log.history(member.id):
+            log.append([self.init_event(member)])
 
     @commands.command(pass_context=True, no_pm=True)
     async def rolehist(self, ctx, user: discord.Member=None):
@@ -78,146 +198,116 @@ class RoleHistory:
         if server is None:
             return
 
-        if server.id in self.settings:
-
-            found_member = None
-
-            server_settings = self.settings[server.id]
-            for member_key, member_value in server_settings["Members"].items():
-
-                member = server.get_member(member_key)
-
-                if user == member:
-                    await self.bot.say("Found Member.")
-                    # await ctx.invoke(General.userinfo, user=member)
-                    out = []
-
-                    hist = sorted(member_value["History"].items())
-
-                    prev_roles = []
-
-                    for time_key, time_value in hist:
+        history = self.server_log(server).history(user.id)
 
-                        line = "• {}: ".format(time_key)
-
-                        curr_roles = time_value["Roles"]
-                        # display role changes if not the first item
-                        if len(prev_roles):
-                            prev_roles_set = set(prev_roles)
-                            curr_roles_set = set(curr_roles)
-                            if prev_roles_set < curr_roles_set:
-                                line += 'Added: {}'.format(
-                                    list(curr_roles_set - prev_roles_set)[0])
-                            elif prev_roles_set > curr_roles_set:
-                                line += 'Removed: {}'.format(
-                                    list(prev_roles_set - curr_roles_set)[0])
-
-                        out.append(line)
-
-                        prev_roles = curr_roles
-
-                    for page in pagify("\n".join(out)):
-                        await self.bot.say(page)
+        # if no data found, add record
+        if not history:
+            await self.bot.say("Member not found in database.")
+            self.save_member_data(server, user)
+            await self.bot.say("Added member to database.")
+            return
 
-                    found_member = member
+        await self.bot.say("Found Member.")
+        out = []
+        for event in history:
+            line = "• {}: ".format(format_time(event.time))
+            # display role changes if not the first item
+            if not event.init:
+                changes = []
+                if event.added:
+                    changes.append('Added: {}'.format(', '.join(event.added)))
+                if event.removed:
+                    changes.append('Removed: {}'.format(', '.join(event.removed)))
+                line += '; '.join(changes)
+            out.append(line)
+
+        for page in pagify("\n".join(out)):
+            await self.bot.say(page)
 
-            # if no data found, add record
-            if found_member is None:
+    @commands.command(pass_context=True, no_pm=True)
+    @checks.mod_or_permissions(manage_roles=True)
+    async def rolehistrole(self, ctx, role_name, days: int=7):
+        """Display who gained or lost a role in the last days.
 
-                await self.bot.say("Member not found in database.")
+        Examples:
+        !rolehistrole Member
+        !rolehistrole Member 30
+        """
+        server = ctx.message.server
+        since = time.time() - days * 86400
+        events = self.server_log(server).role_changes(role_name, since)
+        if not events:
+            await self.bot.say(
+                "No changes to {} in the last {} days.".format(role_name, days))
+            return
 
-                member = user
+        role = role_name.lower()
+        out = ["Changes to {} in the last {} days:".format(role_name, days)]
+        for event in events:
+            added = role in [r.lower() for r in event.added]
+            member = server.get_member(event.member_id)
+            name = member.display_name if member is not None else event.name
+            out.append("• {}: {} {}".format(
+                format_time(event.time), "+" if added else "-", name))
 
-                if member is not None:
-                    self.save_member_data(server, member)
-                    await self.bot.say("Added member to database.")
-                else:
-                    await self.bot.say(
-                        "{} is not a valid user on this server.".format(user))
+        for page in pagify("\n".join(out)):
+            await self.bot.say(page)
 
     @commands.command(pass_context=True)
     @checks.mod_or_permissions(manage_server=True)
     async def rolehistinit(self, ctx):
         """(MOD) Popularize database with current role data."""
         server = ctx.message.server
-        members = server.members
-
-        if server.id not in self.settings:
-            self.settings[server.id] = {
-                "ServerName": str(server),
-                "ServerID": str(server.id),
-                "Members": {}
-            }
+        log = self.server_log(server)
 
-        for member in members:
-            if member.id not in self.settings[server.id]["Members"]:
-                # init member only if not found
-                self.save_member_data(server, member)
+        # init member only if not found
+        events = [
+            self.init_event(member) for member in server.members
+            if not log.history(member.id)]
+        log.append(events)
 
         await self.bot.say("Added all member roles to database.")
 
     async def on_member_join(self, member):
         """Add member records when new user join."""
-        server = member.server
-
-        if server.id not in self.settings:
-            self.settings[server.id] = {
-                "ServerName": str(server),
-                "ServerID": str(server.id),
-                "Members": {}
-            }
-
-        if member.id not in self.settings[server.id]["Members"]:
-            self.save_member_data(server, member)
-
-        dataIO.save_json(self.file_path, self.settings)
+        self.save_member_data(member.server, member)
 
     async def on_member_update(self, before, after):
         """Member update event."""
         server = before.server
 
         # process only on role changes
-        if before.roles != after.roles:
-
-            if server.id not in self.settings:
-                self.settings[server.id] = {
-                    "ServerName": str(server),
-                    "ServerID": str(server.id),
-                    "Members": {}
-                }
-
-            self.settings[server.id]["ServerName"] = str(server)
-
-            # add member settings if it does not exist
-            # initialize with before data
-            # using server time as unique id for role changes
-            if before.id not in self.settings[server.id]["Members"]:
-                self.save_member_data(server, before)
+        if before.roles == after.roles:
+            return
 
-            # create values for timestamp as unique key
-            history = self.settings[server.id]["Members"][after.id]["History"]
-            history[self.server_time()] = self.get_member_data(after)
+        log = self.server_log(server)
+        events = []
 
-            # save data
-            dataIO.save_json(self.file_path, self.settings)
+        # initialize with before data
+        if not log.history(before.id):
+            events.append(self.init_event(before))
 
-    def server_time(self):
-        """Get UTC time instead of server time so data can be ported."""
-        return str(datetime.datetime.utcnow())
+        before_roles = set(self.get_member_roles(before))
+        after_roles = set(self.get_member_roles(after))
+        if before_roles != after_roles:
+            events.append(RoleEvent(
+                time.time(), after.id, after.display_name,
+                sorted(after_roles - before_roles),
+                sorted(before_roles - after_roles),
+                False))
+        if events:
+            log.append(events)
 
-    def get_member_data(self, member):
-        """Return data to be stored."""
-        return {
-            "MemberName": member.name,
-            "DisplayName": member.display_name,
-            "Roles": [r.name for r in member.roles if r.name != "@everyone"]
-        }
+    def get_member_roles(self, member):
+        """Return role names to be stored."""
+        return [r.name for r in member.roles if r.name != "@everyone"]
 
 
 def check_folder():
     if not os.path.exists("data/rolehist"):
         print("Creating data/rolehist folder...")
         os.makedirs("data/rolehist")
+    os.makedirs(logs_path, exist_ok=True)
 
 
 def check_file():
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2017 SML
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+
+from collections import defaultdict
+
+from __main__ import send_cmd_help
+from cogs.utils import checks
+from discord.ext import commands
+
+
+class ServerRoleIndex:
+    """Role membership index of a server.
+
+    role_id: set of member ids
+    lowercase role name: set of role ids
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.members = defaultdict(set)
+        self.names = defaultdict(set)
+        for role in server.roles:
+            self.add_role(role)
+        for member in server.members:
+            self.add_member(member)
+
+    def add_role(self, role):
+        self.names[role.name.lower()].add(role.id)
+
+    def remove_role(self, role):
+        self.members.pop(role.id, None)
+        self.discard_name(role.name, role.id)
+
+    def discard_name(self, name, role_id):
+        role_ids = self.names.get(name.lower())
+        if role_ids is not None:
+            role_ids.discard(role_id)
+            if not role_ids:
+                self.names.pop(name.lower())
+
+    def rename_role(self, before, after):
+        self.discard_name(before.name, before.id)
+        self.add_role(after)
+
+    def add_member(self, member):
+        for role in member.roles:
+            self.members[role.id].add(member.id)
+
+    def remove_member(self, member):
+        for role in member.roles:
+            self.members[role.id].discard(member.id)
+
+    def update_member(self, before, after):
+        before_ids = set(r.id for r in before.roles)
+        after_ids = set(r.id for r in after.roles)
+        for role_id in before_ids - after_ids:
+            self.members[role_id].discard(after.id)
+        for role_id in after_ids - before_ids:
+            self.members[role_id].add(after.id)
+
+    def role_ids(self, name):
+        """Role ids by case-insensitive name."""
+        return self.names.get(name.lower(), set())
+
+    def member_ids_by_name(self, name):
+        """Member ids having any role with that name."""
+        role_ids = self.role_ids(name)
+        if len(role_ids) == 1:
+            return self.members.get(next(iter(role_ids)), set())
+        member_ids = set()
+        for role_id in role_ids:
+            member_ids |= self.members.get(role_id, set())
+        return member_ids
+
+
+class RoleIndex:
+    """Role membership index.
+
+    Keeps role -> members postings for every server so that other cogs
+    can find members by role without scanning server.members.
+    Maintained from member and role events.
+
+    Usage from another cog:
+    index = self.bot.get_cog("RoleIndex")
+    if index is not None:
+        members = index.members(server, role)
+    """
+
+    def __init__(self, bot):
+        """Init."""
+        self.bot = bot
+        self.servers = {}
+
+    def server_index(self, server):
+        """Index of a server, built on first use."""
+        index = self.servers.get(server.id)
+        if index is None:
+            index = ServerRoleIndex(server)
+            self.servers[server.id] = index
+        return index
+
+    def member_ids(self, server, role):
+        """Set of member ids with role. Do not modify."""
+        return self.server_index(server).members.get(role.id, set())
+
+    def count(self, server, role):
+        """Number of members with role."""
+        return len(self.member_ids(server, role))
+
+    def members(self, server, role):
+        """List of members with role."""
+        return self.id2members(server, self.member_ids(server, role))
+
+    def roles_by_name(self, server, name):
+        """Roles by case-insensitive name."""
+        role_ids = self.server_index(server).role_ids(name)
+        return [r for r in server.roles if r.id in role_ids]
+
+    def query(self, server, include=None, exclude=None):
+        """Members having all include role names and none of exclude role names.
+
+        Role names are case-insensitive.
+        """
+        index = self.server_index(server)
+        include = list(include or [])
+        exclude = list(exclude or [])
+        if not include:
+            return []
+        postings = sorted(
+            (index.member_ids_by_name(name) for name in include), key=len)
+        member_ids = set(postings[0])
+        for p in postings[1:]:
+            member_ids &= p
+        for name in exclude:
+            member_ids -= index.member_ids_by_name(name)
+        return self.id2members(server, member_ids)
+
+    @staticmethod
+    def id2members(server, member_ids):
+        members = [server.get_member(member_id) for member_id in member_ids]
+        return [m for m in members if m is not None]
+
+    async def on_ready(self):
+        self.servers = {}
+        for server in self.bot.servers:
+            self.server_index(server)
+
+    async def on_server_join(self, server):
+        self.servers.pop(server.id, None)
+        self.server_index(server)
+
+    async def on_server_remove(self, server):
+        self.servers.pop(server.id, None)
+
+    async def on_member_join(self, member):
+        index = self.servers.get(member.server.id)
+        if index is not None:
+            index.add_member(member)
+
+    async def on_member_remove(self, member):
+        index = self.servers.get(member.server.id)
+        if index is not None:
+            index.remove_member(member)
+
+    async def on_member_update(self, before, after):
+        if before.roles == after.roles:
+            return
+        index = self.servers.get(after.server.id)
+        if index is not None:
+            index.update_member(before, after)
+
+    async def on_server_role_create(self, role):
+        index = self.servers.get(role.server.id)
+        if index is not None:
+            index.add_role(role)
+
+    async def on_server_role_delete(self, role):
+        index = self.servers.get(role.server.id)
+        if index is not None:
+            index.remove_role(role)
+
+    async def on_server_role_update(self, before, after):
+        if before.name == after.name:
+            return
+        index = self.servers.get(after.server.id)
+        if index is not None:
+            index.rename_role(before, after)
+
+    @checks.is_owner()
+    @commands.group(pass_context=True, no_pm=True)
+    async def roleindex(self, ctx):
+        """Role index."""
+        if ctx.invoked_subcommand is None:
+            await send_cmd_help(ctx)
+
+    @roleindex.command(name="rebuild", pass_context=True, no_pm=True)
+    async def roleindex_rebuild(self, ctx):
+        """Rebuild index for this server."""
+        server = ctx.message.server
+        self.servers.pop(server.id, None)
+        index = self.server_index(server)
+        await self.bot.say("Indexed {:,} roles.".format(len(index.members)))
+
+
+def setup(bot):
+    """Setup."""
+    n = RoleIndex(bot)
+    bot.add_cog(n)
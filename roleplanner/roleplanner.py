@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""
+The MIT License (MIT)
+
+Copyright (c) 2017 SML
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+
+import asyncio
+from collections import OrderedDict
+
+import discord
+from cogs.utils.chat_formatting import pagify
+
+# number of members updated at the same time
+CONCURRENCY = 5
+RETRIES = 3
+RETRY_DELAY = 2
+
+
+class RoleChangeReport:
+    """Result of applying role changes."""
+
+    def __init__(self):
+        # (member, added roles, removed roles)
+        self.changed = []
+        # (member, reason)
+        self.failed = []
+        self.unchanged = 0
+
+    def lines(self):
+        out = []
+        for member, added, removed in self.changed:
+            changes = ['+{}'.format(r.name) for r in added]
+            changes.extend('-{}'.format(r.name) for r in removed)
+            out.append("{}: {}".format(member.display_name, ', '.join(changes)))
+        for member, reason in self.failed:
+            out.append("Failed {}: {}".format(member.display_name, reason))
+        out.append(
+            "Updated {:,} members, {:,} unchanged, {:,} failed.".format(
+                len(self.changed), self.unchanged, len(self.failed)))
+        return out
+
+    def pages(self):
+        return pagify('\n'.join(self.lines()), shorten_by=12)
+
+
+class RolePlanner:
+    """Role change planner.
+
+    Merges all role changes requested for a member into the final role set
+    and applies it with a single replace_roles call per member.
+    Members are updated concurrently up to CONCURRENCY; discord.py serializes
+    requests per rate-limit bucket and retries on 429.
+
+    Usage from another cog:
+    planner = self.bot.get_cog("RolePlanner")
+    if planner is not None:
+        report = await planner.apply([(member, to_add_roles, to_remove_roles), ...])
+        for page in report.pages():
+            await self.bot.say(page)
+    """
+
+    def __init__(self, bot):
+        """Init."""
+        self.bot = bot
+        self.semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    @staticmethod
+    def plan(changes):
+        """Merge changes by member.
+
+        changes: iterable of (member, roles to add, roles to remove)
+        Return OrderedDict of member id: (member, add set, remove set)
+        Roles both added and removed for the same member are added.
+        """
+        plan = OrderedDict()
+        for member, to_add, to_remove in changes:
+            if member.id not in plan:
+                plan[member.id] = (member, set(), set())
+            _, add, remove = plan[member.id]
+            remove.update(r for r in to_remove if r is not None)
+            remove.difference_update(to_add)
+            add.update(r for r in to_add if r is not None)
+        return plan
+
+    async def replace_roles(self, member, roles):
+        for attempt in range(RETRIES):
+            try:
+                async with self.semaphore:
+                    await self.bot.replace_roles(member, *roles)
+                return
+            except discord.HTTPException as e:
+                status = getattr(e.response, 'status', None)
+                if isinstance(e, discord.Forbidden) or attempt == RETRIES - 1:
+                    raise
+                if status is not None and status != 429 and status < 500:
+                    raise
+                await asyncio.sleep(RETRY_DELAY * 2 ** attempt)
+
+    async def apply_member(self, report, member, to_add, to_remove):
+        current = set(r for r in member.roles if not r.is_everyone)
+        final = (current - to_remove) | set(r for r in to_add if not r.is_everyone)
+        if final == current:
+            report.unchanged += 1
+            return
+        try:
+            await self.replace_roles(member, final)
+        except discord.Forbidden:
+            report.failed.append((member, "missing permissions"))
+        except discord.HTTPException as e:
+            report.failed.append((member, str(e)))
+        else:
+            added = sorted(final - current, key=lambda r: r.name)
+            removed = sorted(current - final, key=lambda r: r.name)
+            report.changed.append((member, added, removed))
+
+    async def apply(self, changes):
+        """Apply role changes.
+
+        changes: iterable of (member, roles to add, roles to remove)
+        Return RoleChangeReport.
+        """
+        report = RoleChangeReport()
+        plan = self.plan(changes)
+        await asyncio.gather(*[
+            self.apply_member(report, member, to_add, to_remove)
+            for member, to_add, to_remove in plan.values()
+        ])
+        return report
+
+
+def setup(bot):
+    """Setup."""
+    n = RolePlanner(bot)
+    bot.add_cog(n)
@@ -24,7 +24,11 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import asyncio
+import codecs
 import os
+from collections import OrderedDict
+from html.parser import HTMLParser
 from itertools import islice
 
 import discord
@@ -50,11 +54,6 @@ try:
 except ImportError:
     raise ImportError("Please install the aiohttp package.") from None
 
-try:
-    from bs4 import BeautifulSoup
-except ImportError:
-    raise ImportError("Please install the BeautifulSoup4 package.") from None
-
 try:
     from imgurpython import ImgurClient
     from imgurpython.helpers import GalleryAlbum
@@ -65,6 +64,39 @@ except ImportError:
 PATH = os.path.join("data", "search")
 JSON = os.path.join(PATH, "settings.json")
 
+# bytes of a page read while looking for its title
+TITLE_MAX_BYTES = 16 * 1024
+TITLE_CHUNK = 2048
+TITLE_TIMEOUT = 5
+TITLE_CACHE_SIZE = 512
+
+
+class TitleParser(HTMLParser):
+    """Incremental parser which stops collecting after </title>."""
+
+    def __init__(self):
+        super().__init__()
+        self.in_title = False
+        self.done = False
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'title' and not self.done:
+            self.in_title = True
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self.in_title:
+            self.in_title = False
+            self.done = True
+
+    def handle_data(self, data):
+        if self.in_title:
+            self.parts.append(data)
+
+    @property
+    def title(self):
+        title = ' '.join(''.join(self.parts).split())
+        return title or None
 
 class Search:
     """Google API."""
@@ -73,6 +105,52 @@ class Search:
         """Init."""
         self.bot = bot
         self.settings = dataIO.load_json(JSON)
+        self.session = aiohttp.ClientSession(loop=self.bot.loop)
+        self.titles = OrderedDict()
+
+    def __unload(self):
+        self.session.close()
+
+    async def fetch_title(self, url):
+        """Title of a page, reading only the start of the document."""
+        if url in self.titles:
+            self.titles.move_to_end(url)
+            return self.titles[url]
+
+        parser = TitleParser()
+        try:
+            with aiohttp.Timeout(TITLE_TIMEOUT):
+                async with self.session.get(url) as response:
+                    decoder = codecs.getincrementaldecoder(
+                        response.charset or 'utf-8')(errors='replace')
+                    read = 0
+                    while not parser.done and read < TITLE_MAX_BYTES:
+                        chunk = await response.content.read(TITLE_CHUNK)
+                        if not chunk:
+                            break
+                        read += len(chunk)
+                        parser.feed(decoder.decode(chunk))
+        except (aiohttp.ClientError, asyncio.TimeoutError, LookupError):
+            return None
+
+        title = parser.title
+        self.titles[url] = title
+        if len(self.titles) > TITLE_CACHE_SIZE:
+            self.titles.popitem(last=False)
+        return title
+
+    async def search_results(self, ctx, search_func, search_str, stop):
+        """Result URLs with page titles, fetched concurrently."""
+        await self.bot.send_typing(ctx.message.channel)
+        urls = await self.bot.loop.run_in_executor(
+            None, lambda: list(search_func(search_str, num=5, stop=stop)))
+        titles = await asyncio.gather(*[self.fetch_title(url) for url in urls])
+        out = []
+        for url, title in zip(urls, titles):
+            if title is not None:
+                out.append(title)
+            out.append("<{}>\n".format(url))
+        return out
 
     @commands.group(pass_context=True, no_pm=True)
     @checks.serverowner_or_permissions(manage_server=True)
@@ -116,15 +194,7 @@ class Search:
     async def search_google(
             self, ctx: Context, search_str: str, lang='english', stop=1):
         """Google search and return URL results."""
-        out = []
-        await self.bot.send_typing(ctx.message.channel)
-        for url in google.search(search_str, num=5, stop=stop):
-            await self.bot.send_typing(ctx.message.channel)
-            async with aiohttp.get(url) as response:
-                soup = BeautifulSoup(await response.text(), "html.parser")
-                out.append(soup.title.string)
-            out.append("<{}>\n".format(url))
-            # out.append(gout)
+        out = await self.search_results(ctx, google.search, search_str, stop)
         for page in pagify('\n'.join(out)):
             await self.bot.say(page)
 
@@ -133,15 +203,7 @@ class Search:
     async def search_google_images(
             self, ctx: Context, search_str: str, stop=1):
         """Google search images."""
-        out = []
-        await self.bot.send_typing(ctx.message.channel)
-        for url in google.search_images(search_str, num=5, stop=stop):
-            await self.bot.send_typing(ctx.message.channel)
-            async with aiohttp.get(url) as response:
-                soup = BeautifulSoup(await response.text(), "html.parser")
-                out.append(soup.title.string)
-            out.append("<{}>\n".format(url))
-            # out.append(gout)
+        out = await self.search_results(ctx, google.search_images, search_str, stop)
         for page in pagify('\n'.join(out)):
             await self.bot.say(page)
 
@@ -24,24 +24,208 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import asyncio
+import bisect
+import cProfile
+import io
+import logging
 import os
+import pstats
+import time
 from collections import defaultdict
+from collections import deque
 
 import discord
 from __main__ import send_cmd_help
 from cogs.utils import checks
+from cogs.utils.chat_formatting import box
+from cogs.utils.chat_formatting import pagify
 from cogs.utils.dataIO import dataIO
 from discord.ext import commands
 
 PATH = os.path.join("data", "SML-Cogs", "smldebug")
 JSON = os.path.join(PATH, "settings.json")
 
+# event loop lag sampling interval in seconds
+LAG_INTERVAL = 0.5
+# listeners, commands and loop lag above this are logged (seconds)
+SLOW_THRESHOLD = 0.25
+# histogram bucket upper bounds in milliseconds
+BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf')]
+# number of samples kept for percentiles
+SAMPLES = 1000
+
+logger = logging.getLogger("red.smldebug")
+
 
 def nested_dict():
     """Recursively nested defaultdict."""
     return defaultdict(nested_dict)
 
 
+class Histogram:
+    """Latency histogram with fixed buckets and recent samples for percentiles."""
+
+    __slots__ = ['counts', 'samples', 'total', 'count', 'max']
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.samples = deque(maxlen=SAMPLES)
+        self.total = 0
+        self.count = 0
+        self.max = 0
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(BUCKETS, ms)] += 1
+        self.samples.append(ms)
+        self.total += ms
+        self.count += 1
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0
+        values = sorted(self.samples)
+        return values[min(int(len(values) * p / 100), len(values) - 1)]
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def summary_row(self, name):
+        return '{:<40} {:>7,} {:>8.1f} {:>8.1f} {:>8.1f} {:>8.1f}'.format(
+            name[:40], self.count, self.mean, self.percentile(50), self.percentile(95), self.max)
+
+    def buckets_str(self):
+        out = []
+        for bound, count in zip(BUCKETS, self.counts):
+            if count:
+                label = '<{}ms'.format(bound) if bound != float('inf') else '>5s'
+                out.append('{}: {:,}'.format(label, count))
+        return ', '.join(out)
+
+
+HEADER = '{:<40} {:>7} {:>8} {:>8} {:>8} {:>8}'.format('name', 'count', 'mean', 'p50', 'p95', 'max')
+
+
+class TimedListener:
+    """Listener wrapper recording latency.
+
+    Compares equal to the wrapped listener so that bot.remove_listener
+    still works when the cog is unloaded.
+    """
+
+    def __init__(self, profiler, event, func):
+        self.profiler = profiler
+        self.event = event
+        self.func = func
+        cog = getattr(func, '__self__', None)
+        cog_name = type(cog).__name__ if cog is not None else getattr(func, '__module__', '?')
+        self.name = '{}.{}'.format(cog_name, event)
+
+    def __eq__(self, other):
+        if isinstance(other, TimedListener):
+            other = other.func
+        return self.func == other
+
+    def __hash__(self):
+        return hash(self.func)
+
+    def __call__(self, *args, **kwargs):
+        return self.run(*args, **kwargs)
+
+    async def run(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await self.func(*args, **kwargs)
+        finally:
+            self.profiler.record_listener(self.name, time.perf_counter() - start)
+
+
+class Profiler:
+    """Event loop and handler profiler.
+
+    Overhead is one timer per listener call and one sleep per LAG_INTERVAL.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.running = False
+        self.lag_task = None
+        self.lag = Histogram()
+        self.listeners = defaultdict(Histogram)
+        self.commands = defaultdict(Histogram)
+        self.command_start = {}
+
+    def reset(self):
+        self.lag = Histogram()
+        self.listeners = defaultdict(Histogram)
+        self.commands = defaultdict(Histogram)
+        self.command_start = {}
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.wrap_listeners()
+        self.lag_task = self.bot.loop.create_task(self.monitor_lag())
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self.unwrap_listeners()
+        if self.lag_task is not None:
+            self.lag_task.cancel()
+            self.lag_task = None
+
+    def wrap_listeners(self):
+        """Wrap all cog listeners. Run again to include newly loaded cogs."""
+        for event, listeners in self.bot.extra_events.items():
+            for i, func in enumerate(listeners):
+                if isinstance(func, TimedListener):
+                    continue
+                if getattr(func, '__self__', None) is self.bot.get_cog('SMLDebug'):
+                    continue
+                listeners[i] = TimedListener(self, event, func)
+
+    def unwrap_listeners(self):
+        for event, listeners in self.bot.extra_events.items():
+            for i, func in enumerate(listeners):
+                if isinstance(func, TimedListener):
+                    listeners[i] = func.func
+
+    async def monitor_lag(self):
+        """Measure how late the event loop wakes up from sleep."""
+        while self.running:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL)
+            lag = max(time.perf_counter() - start - LAG_INTERVAL, 0)
+            self.lag.add(lag)
+            if lag > SLOW_THRESHOLD:
+                logger.warning("Event loop blocked for %.3fs", lag)
+
+    def record_listener(self, name, seconds):
+        self.listeners[name].add(seconds)
+        if seconds > SLOW_THRESHOLD:
+            logger.warning("Slow listener %s: %.3fs", name, seconds)
+
+    def command_started(self, ctx):
+        if self.running:
+            self.command_start[ctx.message.id] = time.perf_counter()
+
+    def command_finished(self, command, ctx):
+        start = self.command_start.pop(ctx.message.id, None)
+        if start is None:
+            return
+        seconds = time.perf_counter() - start
+        self.commands[command.qualified_name].add(seconds)
+        if seconds > SLOW_THRESHOLD:
+            logger.warning("Slow command %s: %.3fs", command.qualified_name, seconds)
+
+
 class SMLDebug:
     """Discord bug fixing utility."""
 
@@ -50,6 +234,29 @@ class SMLDebug:
         self.bot = bot
         self.settings = nested_dict()
         self.settings.update(dataIO.load_json(JSON))
+        self.profiler = Profiler(bot)
+        if self.settings.get("profile"):
+            bot.loop.create_task(self.start_profiler())
+
+    def __unload(self):
+        self.profiler.stop()
+
+    def save(self):
+        dataIO.save_json(JSON, self.settings)
+
+    async def start_profiler(self):
+        await self.bot.wait_until_ready()
+        self.profiler.start()
+
+    async def on_command(self, command, ctx):
+        self.profiler.command_started(ctx)
+
+    async def on_command_completion(self, command, ctx):
+        self.profiler.command_finished(command, ctx)
+
+    async def on_command_error(self, error, ctx):
+        if ctx.message is not None:
+            self.profiler.command_start.pop(ctx.message.id, None)
 
     @checks.mod_or_permissions()
     @commands.group(pass_context=True)
@@ -68,6 +275,103 @@ class SMLDebug:
                            description="Clash Royale deck import.")
         await self.bot.say(embed=em)
 
+    @smldebug.group(name="profile", pass_context=True)
+    async def smldebug_profile(self, ctx):
+        """Profile event loop, listeners and commands."""
+        if ctx.invoked_subcommand is None:
+            await send_cmd_help(ctx)
+
+    @checks.is_owner()
+    @smldebug_profile.command(name="start", pass_context=True)
+    async def smldebug_profile_start(self, ctx):
+        """Start profiling. Stays on across restarts.
+
+        Run again after loading new cogs to include their listeners.
+        """
+        self.profiler.start()
+        self.profiler.wrap_listeners()
+        self.settings["profile"] = True
+        self.save()
+        await self.bot.say("Profiling started.")
+
+    @checks.is_owner()
+    @smldebug_profile.command(name="stop", pass_context=True)
+    async def smldebug_profile_stop(self, ctx):
+        """Stop profiling."""
+        self.profiler.stop()
+        self.settings["profile"] = False
+        self.save()
+        await self.bot.say("Profiling stopped.")
+
+    @smldebug_profile.command(name="reset", pass_context=True)
+    async def smldebug_profile_reset(self, ctx):
+        """Reset collected stats."""
+        self.profiler.reset()
+        await self.bot.say("Profiling stats reset.")
+
+    @smldebug_profile.command(name="lag", pass_context=True)
+    async def smldebug_profile_lag(self, ctx):
+        """Event loop lag (ms)."""
+        lag = self.profiler.lag
+        out = [HEADER, lag.summary_row('event loop lag'), lag.buckets_str()]
+        await self.bot.say(box('\n'.join(out)))
+
+    async def say_histograms(self, histograms, sort):
+        if not histograms:
+            await self.bot.say("No data.")
+            return
+        if sort == 'count':
+            key = lambda x: x[1].count
+        elif sort == 'max':
+            key = lambda x: x[1].max
+        else:
+            key = lambda x: x[1].percentile(95)
+        out = [HEADER]
+        for name, h in sorted(histograms.items(), key=key, reverse=True):
+            out.append(h.summary_row(name))
+        for page in pagify('\n'.join(out), shorten_by=24):
+            await self.bot.say(box(page))
+
+    @smldebug_profile.command(name="listeners", pass_context=True)
+    async def smldebug_profile_listeners(self, ctx, sort='p95'):
+        """Per-cog listener latency (ms).
+
+        sort: p95 (default), count, max
+        """
+        await self.say_histograms(self.profiler.listeners, sort)
+
+    @smldebug_profile.command(name="commands", pass_context=True)
+    async def smldebug_profile_commands(self, ctx, sort='p95'):
+        """Per-command latency (ms).
+
+        sort: p95 (default), count, max
+        """
+        await self.say_histograms(self.profiler.commands, sort)
+
+    @checks.is_owner()
+    @smldebug_profile.command(name="snapshot", pass_context=True)
+    async def smldebug_profile_snapshot(self, ctx, seconds: int = 10, lines: int = 50):
+        """Run cProfile on the bot for some seconds and upload report."""
+        seconds = max(1, min(seconds, 120))
+        await self.bot.say("Profiling for {} seconds…".format(seconds))
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile.disable()
+
+        with io.StringIO() as f:
+            stats = pstats.Stats(profile, stream=f)
+            stats.sort_stats('cumulative').print_stats(lines)
+            stats.sort_stats('tottime').print_stats(lines)
+            f.seek(0)
+            await ctx.bot.send_file(
+                ctx.message.channel,
+                f,
+                filename="profile-{}.txt".format(int(time.time()))
+            )
+
 
 def check_folder():
     """Check folder."""
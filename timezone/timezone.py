@@ -22,6 +22,7 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import asyncio
 import os
 import datetime as dt
 import re
@@ -35,6 +36,7 @@ from cogs.utils.dataIO import dataIO
 
 PATH = os.path.join("data", "timezone")
 JSON = os.path.join(PATH, "settings.json")
+LOCATIONS_JSON = os.path.join(PATH, "locations.json")
 
 GMAPS_FIELDS = {
     "timeZoneName": "Time Zone Name",
@@ -42,27 +44,27 @@ GMAPS_FIELDS = {
 }
 
 TZ_ABBREV = {
-    "ACDT": "Australia",
-    "ACST": "Australia",
-    "BST": "London",
-    "CET": "France",
-    "CT": "Beijing",
-    "EDT": "New York",
-    "EEST": "Finland",
-    "EET": "Findland",
-    "EST": "New York",
-    "ET": "New York",
-    "GMT": "London",
-    "HKT": "Hong Kong",
-    "JST": "Japan",
-    "KST": "Korea",
-    "MDT": "Idaho",
-    "MYT": "Malaysia",
-    "PDT": "Los Angeles",
-    "PST": "Los Angeles",
-    "SST": "Singapore",
-    "WEST": "Spain",
-    "WET": "London"
+    "ACDT": "Australia/Adelaide",
+    "ACST": "Australia/Adelaide",
+    "BST": "Europe/London",
+    "CET": "Europe/Paris",
+    "CT": "Asia/Shanghai",
+    "EDT": "America/New_York",
+    "EEST": "Europe/Helsinki",
+    "EET": "Europe/Helsinki",
+    "EST": "America/New_York",
+    "ET": "America/New_York",
+    "GMT": "Europe/London",
+    "HKT": "Asia/Hong_Kong",
+    "JST": "Asia/Tokyo",
+    "KST": "Asia/Seoul",
+    "MDT": "America/Boise",
+    "MYT": "Asia/Kuala_Lumpur",
+    "PDT": "America/Los_Angeles",
+    "PST": "America/Los_Angeles",
+    "SST": "Asia/Singapore",
+    "WEST": "Europe/Madrid",
+    "WET": "Europe/London"
 }
 
 try:
@@ -83,6 +85,117 @@ try:
 except ImportError:
     googlemaps_available = False
 
+
+class LocationNotFound(Exception):
+    pass
+
+
+def normalize_location(address):
+    """Lookup key of a location."""
+    return ' '.join(address.replace('_', ' ').lower().split())
+
+
+def build_zone_index():
+    """Offline location index: city, zone and country names to zone ids."""
+    index = {}
+    for zone in pytz.all_timezones:
+        index[normalize_location(zone)] = zone
+    for zone in pytz.common_timezones:
+        index[normalize_location(zone.rsplit('/', 1)[-1])] = zone
+    # countries spanning several zones are left to geocoding
+    for code, zones in pytz.country_timezones.items():
+        if len(zones) == 1:
+            index[normalize_location(pytz.country_names[code])] = zones[0]
+    for abbrev, zone in TZ_ABBREV.items():
+        index[abbrev.lower()] = zone
+    return index
+
+
+def zone_info(zone_id, when=None):
+    """Offsets of a zone at a UTC datetime, computed from tzdata.
+
+    Same keys as the Google Maps timezone result.
+    """
+    if when is None:
+        when = dt.datetime.utcnow()
+    local = pytz.utc.localize(when).astimezone(pytz.timezone(zone_id))
+    dst = local.dst() or dt.timedelta(0)
+    return {
+        'dstOffset': int(dst.total_seconds()),
+        'rawOffset': int((local.utcoffset() - dst).total_seconds()),
+        'status': 'OK',
+        'timeZoneId': zone_id,
+        'timeZoneName': local.tzname()
+    }
+
+
+class LocationResolver:
+    """Resolve locations to time zone ids.
+
+    Zone, city and country names and TZ_ABBREV are answered from an
+    offline index. Other locations are geocoded once with Google Maps in
+    an executor and kept in a persistent cache.
+    """
+
+    def __init__(self, loop, settings):
+        self.loop = loop
+        self.settings = settings
+        self.zones = build_zone_index()
+        self.locations = {}
+        if dataIO.is_valid_json(LOCATIONS_JSON):
+            self.locations = dataIO.load_json(LOCATIONS_JSON)
+        self._client = None
+        self._client_key = None
+
+    @property
+    def client(self):
+        """Google Maps client, rebuilt only when the API key changes."""
+        key = self.settings.get("GOOGLE_API_KEY")
+        if key is None:
+            return None
+        if self._client is None or key != self._client_key:
+            self._client = googlemaps.Client(key=key)
+            self._client_key = key
+        return self._client
+
+    def lookup(self, address):
+        """Geocode and find zone id. Blocking."""
+        client = self.client
+        if client is None:
+            raise LocationNotFound("Google API Key not set.")
+        gc = client.geocode(address)
+        if not gc:
+            raise LocationNotFound("Cannot find {}.".format(address))
+        loc = gc[0]['geometry']['location']
+        result = client.timezone(location=loc)
+        if result['status'] != 'OK':
+            raise LocationNotFound(result['status'])
+        return {
+            'lat': loc['lat'],
+            'lng': loc['lng'],
+            'address': gc[0].get('formatted_address', address),
+            'timeZoneId': result['timeZoneId']
+        }
+
+    async def resolve(self, address):
+        """Return dict with timeZoneId, and lat, lng for geocoded locations."""
+        key = normalize_location(address)
+        if key in self.zones:
+            return {'timeZoneId': self.zones[key], 'address': address}
+        if key not in self.locations:
+            location = await self.loop.run_in_executor(None, self.lookup, address)
+            self.locations[key] = location
+            dataIO.save_json(LOCATIONS_JSON, self.locations)
+        return self.locations[key]
+
+    async def geocode(self, address):
+        """Full geocode results."""
+        client = self.client
+        if client is None:
+            raise LocationNotFound("Google API Key not set.")
+        return await self.loop.run_in_executor(None, client.geocode, address)
+
+
 class TimeZone:
     """Timezone conversion and more."""
 
@@ -90,13 +203,7 @@ class TimeZone:
         """Constructor."""
         self.bot = bot
         self.settings = dataIO.load_json(JSON)
-
-    def gmclient(self):
-        """Return Google Maps client."""
-        if "GOOGLE_API_KEY" in self.settings:
-            key = self.settings["GOOGLE_API_KEY"]
-            return googlemaps.Client(key=key)
-        return None
+        self.resolver = LocationResolver(bot.loop, self.settings)
 
     @commands.group(aliases=['stz'], pass_context=True)
     @checks.serverowner_or_permissions()
@@ -158,35 +265,28 @@ class TimeZone:
     @timezone.command(name="location", aliases=['loc'], pass_context=True)
     async def timezone_location(self, ctx, *, address):
         """Find timezone by location."""
-        gc = self.gmclient().geocode(address)
-        loc = gc[0]['geometry']['location']
-        result = self.gmclient().timezone(location=loc)
-        if result['status'] == 'OK':
-            em = discord.Embed()
-            for k, v in result.items():
-                if k in ['timeZoneName', 'timeZoneId']:
-                    em.add_field(name=GMAPS_FIELDS[k], value=v)
-            await self.bot.say(embed=em)
-        else:
-            await self.bot.say(result['status'])
+        try:
+            result = await self.get_timezone(address)
+        except LocationNotFound as e:
+            await self.bot.say(e)
+            return
+        em = discord.Embed()
+        for k, v in result.items():
+            if k in ['timeZoneName', 'timeZoneId']:
+                em.add_field(name=GMAPS_FIELDS[k], value=v)
+        await self.bot.say(embed=em)
 
     @timezone.command(name="time", pass_context=True)
     async def timezone_time(self, ctx, *, address):
         """Find the time by location."""
-        gc = self.gmclient().geocode(address)
-        loc = gc[0]['geometry']['location']
-        timestamp = dt.datetime.utcnow()
-        result = self.gmclient().timezone(location=loc)
-        if result['status'] == 'OK':
-            result_time = (
-                timestamp +
-                dt.timedelta(seconds=result['dstOffset']) +
-                dt.timedelta(seconds=result['rawOffset'])
-            )
-            await self.bot.say(result_time)
-
-        else:
-            await self.bot.say(result['status'])
+        try:
+            location = await self.resolver.resolve(address)
+        except LocationNotFound as e:
+            await self.bot.say(e)
+            return
+        tz = pytz.timezone(location['timeZoneId'])
+        result_time = pytz.utc.localize(dt.datetime.utcnow()).astimezone(tz)
+        await self.bot.say(result_time.replace(tzinfo=None))
 
     @timezone.command(name="convert", pass_context=True)
     async def timezone_convert(self, ctx, time, from_loc, to_loc):
@@ -195,13 +295,13 @@ class TimeZone:
         !tz convert "2017-05-14 9:00" EST Sydney
         !tz convert "2017-05-14 9:00" "Hong Kong" London
         """
-        if from_loc.upper() in TZ_ABBREV:
-            from_loc = TZ_ABBREV[from_loc.upper()]
-        if to_loc.upper() in TZ_ABBREV:
-            to_loc = TZ_ABBREV[to_loc.upper()]
-
-        from_tz = self.get_timezone(from_loc)
-        to_tz = self.get_timezone(to_loc)
+        try:
+            from_tz, to_tz = await asyncio.gather(
+                self.resolver.resolve(from_loc),
+                self.resolver.resolve(to_loc))
+        except LocationNotFound as e:
+            await self.bot.say(e)
+            return
 
         from_time = delorean.parse(time)
         orig_time = delorean.Delorean(
@@ -224,9 +324,9 @@ class TimeZone:
             "{} \n"
             "for {}.").format(
                 orig_time.datetime.strftime(dt_fmt),
-                "{} ({})".format(from_tz["timeZoneId"], from_tz["timeZoneName"]),
+                "{} ({})".format(from_tz["timeZoneId"], orig_time.datetime.tzname()),
                 converted_time.datetime.strftime(dt_fmt),
-                "{} ({})".format(to_tz["timeZoneId"], to_tz["timeZoneName"])
+                "{} ({})".format(to_tz["timeZoneId"], converted_time.datetime.tzname())
             )
         await self.bot.say(msg)
 
@@ -240,7 +340,11 @@ class TimeZone:
     @gmaps.command(name="geocode", pass_context=True)
     async def gmaps_geocode(self, ctx, *, address):
         """Geocode an address."""
-        results = self.gmclient().geocode(address)
+        try:
+            results = await self.resolver.geocode(address)
+        except LocationNotFound as e:
+            await self.bot.say(e)
+            return
         for result in results:
             em = discord.Embed()
             for k, v in result['geometry'].items():
@@ -250,26 +354,31 @@ class TimeZone:
     @gmaps.command(name="timezone", pass_context=True)
     async def gmaps_timezone(self, ctx, *, address):
         """Find the timezone by address."""
-        result = self.get_timezone(address)
+        try:
+            result = await self.get_timezone(address)
+        except LocationNotFound as e:
+            await self.bot.say(e)
+            return
         await self.bot.say(result)
 
-    def get_timezone(self, address):
+    async def get_timezone(self, address):
         """Return timezone info by location.
 
+        Offsets are computed locally for the current time.
+
         Result format:
         {
             'dstOffset': 3600,
             'rawOffset': -18000,
             'status': 'OK',
             'timeZoneId': 'America/New_York',
-            'timeZoneName': 'Eastern Daylight Time'
+            'timeZoneName': 'EDT'
         }
 
         """
-        gc = self.gmclient().geocode(address)
-        loc = gc[0]['geometry']['location']
-        result = self.gmclient().timezone(location=loc)
-        return result
+        location = await self.resolver.resolve(address)
+        return zone_info(location['timeZoneId'])
+
 
 def check_folder():
     """Check folder."""
@@ -29,8 +29,12 @@ import datetime
 import asyncio
 import discord
 
+import itertools
 import operator
 import string
+from collections import Counter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 from discord import Message
 from discord import Server
@@ -56,6 +60,10 @@ JSON = os.path.join(*PATH_LIST, "settings.json")
 HOST = '127.0.0.1'
 INTERVAL = 5
 
+# max number of messages kept per channel for the rolling model
+ROLLING_SIZE = 5000
+WORKERS = 2
+
 
 
 def isPunct(word):
@@ -68,66 +76,69 @@ def isNumeric(word):
     except ValueError:
         return False
 
+_stopwords = None
+
+
+def get_stopwords():
+    """Stopwords of all languages, loaded once."""
+    global _stopwords
+    if _stopwords is None:
+        _stopwords = frozenset(nltk.corpus.stopwords.words())
+    return _stopwords
+
+
 class RakeKeywordExtractor:
     """RAKE implementation
     http://sujitpal.blogspot.com/2013/03/implementing-rake-algorithm-with-nltk.html
 
     rake = RakeKeywordExtractor()
     keywords = rake.extract(text, incl_scores=True)
+
+    Candidate phrases can be generated separately per text with phrases()
+    and scored together with score(), so that phrases can be cached.
     """
 
-    def __init__(self):
-        self.stopwords = set(nltk.corpus.stopwords.words())
+    def __init__(self, stopwords=None):
+        self.stopwords = stopwords if stopwords is not None else get_stopwords()
         self.top_fraction = 1 # consider top third candidate keywords by score
 
     def _generate_candidate_keywords(self, sentences):
         phrase_list = []
         for sentence in sentences:
-            words = map(lambda x: "|" if x in self.stopwords else x,
-                nltk.word_tokenize(sentence.lower()))
             phrase = []
-            for word in words:
-                if word == "|" or isPunct(word):
+            for word in nltk.word_tokenize(sentence.lower()):
+                if word in self.stopwords or isPunct(word):
                     if len(phrase) > 0:
-                        phrase_list.append(phrase)
+                        phrase_list.append(tuple(phrase))
                         phrase = []
                 else:
                     phrase.append(word)
         return phrase_list
 
     def _calculate_word_scores(self, phrase_list):
-        word_freq = nltk.FreqDist()
-        word_degree = nltk.FreqDist()
+        word_freq = Counter()
+        word_degree = {}
         for phrase in phrase_list:
-            # degree = len(filter(lambda x: not isNumeric(x), phrase)) - 1
-            # SML above cost error
-            degree = len(list(filter(lambda x: not isNumeric(x), phrase))) - 1
-            for word in phrase:
-                # word_freq.inc(word)
-                # SML error above:
-                word_freq[word] += 1
-                # word_degree.inc(word, degree) # other words
-                word_degree[word] = degree
-        for word in word_freq.keys():
-            word_degree[word] = word_degree[word] + word_freq[word] # itself
+            word_freq.update(phrase)
+            # degree is taken from the last phrase containing the word
+            degree = sum(1 for x in phrase if not isNumeric(x)) - 1
+            word_degree.update(dict.fromkeys(phrase, degree))
         # word score = deg(w) / freq(w)
-        word_scores = {}
-        for word in word_freq.keys():
-            word_scores[word] = word_degree[word] / word_freq[word]
-        return word_scores
+        return {
+            word: (word_degree[word] + freq) / freq
+            for word, freq in word_freq.items()}
 
     def _calculate_phrase_scores(self, phrase_list, word_scores):
-        phrase_scores = {}
-        for phrase in phrase_list:
-            phrase_score = 0
-            for word in phrase:
-                phrase_score += word_scores[word]
-            phrase_scores[" ".join(phrase)] = phrase_score
-        return phrase_scores
+        return {
+            " ".join(phrase): sum(map(word_scores.__getitem__, phrase))
+            for phrase in phrase_list}
 
-    def extract(self, text, incl_scores=False):
-        sentences = nltk.sent_tokenize(text)
-        phrase_list = self._generate_candidate_keywords(sentences)
+    def phrases(self, text):
+        """Candidate phrases of text."""
+        return self._generate_candidate_keywords(nltk.sent_tokenize(text))
+
+    def score(self, phrase_list, incl_scores=False):
+        """Score candidate phrases."""
         word_scores = self._calculate_word_scores(phrase_list)
         phrase_scores = self._calculate_phrase_scores(
             phrase_list, word_scores)
@@ -140,6 +151,58 @@ class RakeKeywordExtractor:
             return map(lambda x: x[0],
                 sorted_phrase_scores[0:int(n_phrases/self.top_fraction)])
 
+    def extract(self, text, incl_scores=False):
+        return self.score(self.phrases(text), incl_scores=incl_scores)
+
+
+class ChannelModel:
+    """Rolling window of recent messages in a channel.
+
+    Candidate phrases are computed once per message and kept
+    so that keywords can be re-scored without reprocessing history.
+    """
+
+    def __init__(self, size=ROLLING_SIZE):
+        # each entry is [message_id, content, phrases]
+        # phrases is None until processed
+        self.messages = deque(maxlen=size)
+        # True if there is no older history to fetch
+        self.complete = False
+
+    def __len__(self):
+        return len(self.messages)
+
+    @property
+    def oldest_id(self):
+        if not len(self.messages):
+            return None
+        return self.messages[0][0]
+
+    def append(self, message):
+        self.messages.append([message.id, message.content, None])
+
+    def extend_history(self, messages):
+        """Add older messages, ordered newest first."""
+        for message in messages:
+            if len(self.messages) == self.messages.maxlen:
+                break
+            self.messages.appendleft([message.id, message.content, None])
+
+    def recent(self, count):
+        """Last count entries."""
+        start = max(len(self.messages) - count, 0)
+        return list(itertools.islice(self.messages, start, None))
+
+    @staticmethod
+    def phrases(rake, entries):
+        """Candidate phrases of entries, processing new entries as needed."""
+        phrase_list = []
+        for entry in entries:
+            if entry[2] is None:
+                entry[2] = rake.phrases(entry[1])
+            phrase_list.extend(entry[2])
+        return phrase_list
+
 
 class TLDR:
     """Too Lazy; Didn’t Read.
@@ -150,10 +213,55 @@ class TLDR:
         self.bot = bot
         self.tags = []
         self.settings = dataIO.load_json(JSON)
+        self.executor = ThreadPoolExecutor(max_workers=WORKERS)
+        self.rake = None
+        self.channel_models = {}
+
+    def __unload(self):
+        self.executor.shutdown(wait=False)
 
     def save(self):
         dataIO.save_json(JSON, self.settings)
 
+    async def run_in_executor(self, func, *args):
+        """Run blocking NLTK processing in worker pool."""
+        return await self.bot.loop.run_in_executor(self.executor, func, *args)
+
+    async def get_rake(self):
+        """Keyword extractor with stopwords preloaded."""
+        if self.rake is None:
+            stopwords = await self.run_in_executor(get_stopwords)
+            self.rake = RakeKeywordExtractor(stopwords=stopwords)
+        return self.rake
+
+    async def channel_model(self, channel, count):
+        """Rolling model of channel with up to count messages.
+
+        Channels are only tracked after tldr is first used in them.
+        """
+        model = self.channel_models.get(channel.id)
+        if model is None:
+            model = ChannelModel()
+            self.channel_models[channel.id] = model
+        if len(model) < count and not model.complete:
+            limit = count - len(model)
+            before = None
+            if model.oldest_id is not None:
+                before = discord.Object(id=model.oldest_id)
+            messages = []
+            async for message in self.bot.logs_from(channel, limit=limit, before=before):
+                messages.append(message)
+            model.extend_history(messages)
+            if len(messages) < limit:
+                model.complete = True
+        return model
+
+    async def on_message(self, message):
+        """Feed rolling channel models."""
+        model = self.channel_models.get(message.channel.id)
+        if model is None:
+            return
+        model.append(message)
 
     @commands.group(pass_context=True, no_pm=True)
     async def tldr(self, ctx: Context):
@@ -170,8 +278,8 @@ class TLDR:
         channel = ctx.message.channel
         message = await self.bot.get_message(channel, message_id)
 
-        rake = RakeKeywordExtractor()
-        keywords = rake.extract(message.content, incl_scores=True)
+        rake = await self.get_rake()
+        keywords = await self.run_in_executor(rake.extract, message.content, True)
 
         await self.bot.say("original")
         await self.bot.say(message.content)
@@ -183,12 +291,16 @@ class TLDR:
     async def tldr_messages(self, ctx, count: int, top=10):
         """Extract keywords from last X messages."""
         channel = ctx.message.channel
-        messages = []
-        async for message in self.bot.logs_from(channel, limit=count + 1):
-            messages.append(message.content)
+        count = min(count, ROLLING_SIZE)
+        rake = await self.get_rake()
+        model = await self.channel_model(channel, count + 1)
+
+        entries = model.recent(count + 1)
+
+        def extract():
+            return rake.score(model.phrases(rake, entries), incl_scores=True)
 
-        rake = RakeKeywordExtractor()
-        keywords = rake.extract(" ".join(messages), incl_scores=True)
+        keywords = await self.run_in_executor(extract)
 
         out = []
         out.append("Keywords found in last {} messages: ".format(count))
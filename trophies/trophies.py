@@ -256,6 +256,12 @@ class Trophies:
         clans = self.settings[server.id]["Trophies"][clan_type]
         names = [c['name'] for c in RACF_CLANS[clan_type]]
 
+        # member counts from the family roster snapshot, if loaded
+        snapshot = None
+        roster = self.bot.get_cog("FamilyRoster")
+        if roster is not None and clan_type == ClanType.CR:
+            snapshot = roster.usable_snapshot([])
+
         for clan in clans:
             name = clan["name"]
             if name in names:
@@ -265,6 +271,10 @@ class Trophies:
                 if str(value).isdigit():
                     value = '{:,}'.format(int(value))
 
+                if snapshot is not None and snapshot.clan(tag) is not None:
+                    value = '{} ({} / 50)'.format(
+                        value, len(snapshot.members_by_clan[tag]))
+
                 data.add_field(name='{} #{}'.format(name, tag), value=value)
 
         if server.icon_url: